@@ -0,0 +1,111 @@
+"""
+Benchmark - Event loop blocking from CPU-bound work, run inline vs offloaded by CPUExecutor
+
+Usage: python benchmarks/cpu_offload.py [--requests N] [--prices N] [--concurrency N]
+Issues indicator requests (on --prices closes; /analysis passes ~31) and address derivations
+the way handlers do, once per route ('inline', 'thread', 'process') and once with the configured
+routing (CPU_TASK_ROUTES and CPU_TASK_MIN_SIZE), while a LoopMonitor measures how long the loop
+was blocked and a ticker measures how late a cheap concurrent handler gets to run.
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from services.cpu_executor import CPUExecutor
+from services.loop_monitor import LoopMonitor
+from services.technical_analysis import TechnicalAnalysis
+from services.wallet_utils import WalletUtils
+
+def make_prices(count: int):
+    """Random-walk hourly prices"""
+    prices = [100.0]
+    for _ in range(count - 1):
+        prices.append(prices[-1] * math.exp(random.gauss(0, 0.01)))
+    return prices
+
+async def run_route(route: str, task: str, args, prices, keys):
+    """Run one task's requests on one executor ('configured' keeps the config); return figures"""
+    if route != 'configured':
+        Config.CPU_TASK_ROUTES[task] = route
+        Config.CPU_TASK_MIN_SIZE.pop(task, None)
+    technical = TechnicalAnalysis()
+    wallet_utils = WalletUtils()
+    
+    # Start the pool before measuring, as a running bot would have
+    executor = CPUExecutor.get_executor(CPUExecutor.route(task, len(prices)))
+    if executor is not None:
+        await asyncio.get_running_loop().run_in_executor(executor, abs, 0)
+    
+    monitor = LoopMonitor(interval=0.005, warn_after=0)
+    ticks = []
+    done = asyncio.Event()
+    
+    async def ticker():
+        # A cheap handler that should answer within a few milliseconds
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            ticks.append(time.perf_counter() - start - 0.01)
+    
+    semaphore = asyncio.Semaphore(args.concurrency)
+    
+    async def request(i: int):
+        async with semaphore:
+            if task == 'derive_address':
+                await wallet_utils.private_key_to_address_async(keys[i % len(keys)])
+            else:
+                await technical.get_technical_indicators_async(prices)
+    
+    monitor.start()
+    tick_task = asyncio.ensure_future(ticker())
+    begin = time.perf_counter()
+    await asyncio.gather(*(request(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - begin
+    done.set()
+    await tick_task
+    await monitor.stop()
+    
+    ticks.sort()
+    stats = monitor.stats()
+    return {
+        'elapsed': elapsed,
+        'blocked': stats['blocked'],
+        'max_lag': stats['max_lag'],
+        'tick_p99': ticks[min(int(0.99 * len(ticks)), len(ticks) - 1)] if ticks else float('nan')
+    }
+
+async def run(args):
+    random.seed(1)
+    prices = make_prices(args.prices)
+    keys = [os.urandom(32).hex() for _ in range(64)]
+    
+    print(f"{args.requests} requests per task, {args.concurrency} at a time")
+    print(f"{'task':28} {'route':11} {'total':>9} {'loop blocked':>13} {'max stall':>10} {'handler p99 delay':>18}")
+    for task, label in (('indicators', f"indicators ({args.prices} prices)"), ('derive_address', 'derive_address')):
+        configured = (dict(Config.CPU_TASK_ROUTES), dict(Config.CPU_TASK_MIN_SIZE))
+        for route in ('configured', 'inline', 'thread', 'process'):
+            result = await run_route(route, task, args, prices, keys)
+            shown = f"{CPUExecutor.route(task, len(prices))}*" if route == 'configured' else route
+            print(f"{label:28} {shown:11} {result['elapsed'] * 1000:7.0f}ms {result['blocked'] * 1000:11.0f}ms "
+                  f"{result['max_lag'] * 1000:8.1f}ms {result['tick_p99'] * 1000:16.1f}ms")
+        Config.CPU_TASK_ROUTES, Config.CPU_TASK_MIN_SIZE = configured
+    print("* route chosen by the configuration")
+    CPUExecutor.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=400, help='requests issued')
+    parser.add_argument('--prices', type=int, default=31, help='prices per indicator request (/analysis passes ~31 daily closes)')
+    parser.add_argument('--concurrency', type=int, default=16, help='requests in flight at once')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
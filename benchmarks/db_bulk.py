@@ -0,0 +1,58 @@
+"""
+Benchmark - Transaction import throughput, one add_transaction per row vs add_transactions_bulk
+
+Usage: python benchmarks/db_bulk.py [--rows N]
+Runs in a temporary directory, so no database or encryption.key is touched.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import DatabaseManager
+
+def shift_records(count: int, offset: int = 0) -> list:
+    """Transaction rows shaped like replayed SideShift shifts"""
+    return [{
+        'user_id': i % 1000,
+        'transaction_type': 'swap',
+        'from_token': 'usdt',
+        'to_token': 'eth',
+        'amount': 100.0,
+        'network': 'ethereum',
+        'transaction_hash': f'0x{offset + i:064x}',
+        'status': 'settled'
+    } for i in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000, help='rows imported in bulk')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        db = DatabaseManager(os.path.join(workdir, 'bulk.db'))
+        
+        # Per-row inserts commit every row, so time a smaller sample
+        sample = shift_records(min(args.rows, 2000))
+        start = time.perf_counter()
+        for record in sample:
+            db.add_transaction(record['user_id'], record['transaction_type'], record['from_token'],
+                               record['to_token'], record['amount'], record['network'],
+                               record['transaction_hash'])
+        per_row = len(sample) / (time.perf_counter() - start)
+        
+        records = shift_records(args.rows, offset=len(sample))
+        start = time.perf_counter()
+        db.add_transactions_bulk(records)
+        bulk = len(records) / (time.perf_counter() - start)
+        db.engine.close()
+    
+    print(f"add_transaction:       {per_row:>10,.0f} rows/s")
+    print(f"add_transactions_bulk: {bulk:>10,.0f} rows/s ({bulk / per_row:.0f}x)")
+
+if __name__ == "__main__":
+    main()
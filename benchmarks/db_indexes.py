@@ -0,0 +1,130 @@
+"""
+Benchmark - Wallet and transaction lookups at 1M rows, legacy schema vs migrated schema
+
+Usage: python benchmarks/db_indexes.py [--rows N] [--lookups N]
+Builds a legacy (unindexed, one wallets row per network) database in a temporary directory,
+times lookups, migrates it with database.migrations and times the same lookups again.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.migrations import migrate
+
+NETWORKS = ['ethereum', 'arbitrum', 'polygon', 'bsc', 'avalanche', 'optimism']
+
+# Schema as it was before the wallet normalization migration
+LEGACY_SCHEMA = '''
+    CREATE TABLE users (
+        user_id INTEGER PRIMARY KEY, username TEXT, first_name TEXT, last_name TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE wallets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, network TEXT NOT NULL,
+        address TEXT NOT NULL, encrypted_private_key TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, transaction_type TEXT NOT NULL,
+        from_token TEXT, to_token TEXT, amount REAL, network TEXT, transaction_hash TEXT,
+        status TEXT DEFAULT 'pending', created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE portfolio (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, token_symbol TEXT NOT NULL,
+        amount REAL NOT NULL, network TEXT, average_price REAL,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+'''
+
+LEGACY_QUERIES = {
+    'has_wallets': 'SELECT COUNT(*) FROM wallets WHERE user_id = ?',
+    'get_user_wallets': 'SELECT network, address FROM wallets WHERE user_id = ?',
+    'get_wallet': "SELECT address, encrypted_private_key FROM wallets WHERE user_id = ? AND network = 'polygon'",
+    'transaction_by_hash': 'SELECT id, status FROM transactions WHERE transaction_hash = ?'
+}
+
+MIGRATED_QUERIES = {
+    'has_wallets': 'SELECT EXISTS (SELECT 1 FROM wallet_networks WHERE user_id = ?)',
+    'get_user_wallets': '''
+        SELECT n.network, k.address FROM wallet_networks n JOIN wallet_keys k ON k.id = n.key_id
+        WHERE n.user_id = ? ORDER BY n.rowid
+    ''',
+    'get_wallet': '''
+        SELECT k.address, k.encrypted_private_key FROM wallet_networks n JOIN wallet_keys k ON k.id = n.key_id
+        WHERE n.user_id = ? AND n.network = 'polygon' ORDER BY n.rowid LIMIT 1
+    ''',
+    'transaction_by_hash': 'SELECT id, status FROM transactions WHERE transaction_hash = ?'
+}
+
+def build(conn: sqlite3.Connection, rows: int):
+    """Fill the legacy schema with `rows` wallet rows and `rows` transactions"""
+    users = rows // len(NETWORKS)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany('INSERT INTO users (user_id, username) VALUES (?, ?)',
+                     ((user_id, f'user{user_id}') for user_id in range(users)))
+    # Ciphertext stand-ins: a fresh "encryption" per network row, as add_wallet used to store
+    conn.executemany('''
+        INSERT INTO wallets (user_id, network, address, encrypted_private_key) VALUES (?, ?, ?, ?)
+    ''', ((user_id, network, f'0x{user_id:040x}', f'gAAAA{user_id:060x}{index}')
+          for user_id in range(users) for index, network in enumerate(NETWORKS)))
+    conn.executemany('''
+        INSERT INTO transactions (user_id, transaction_type, amount, network, transaction_hash)
+        VALUES (?, 'swap', 1.0, 'ethereum', ?)
+    ''', ((i % users, f'0x{i:064x}') for i in range(rows)))
+    conn.commit()
+
+def measure(conn: sqlite3.Connection, queries: dict, users: int, rows: int, lookups: int) -> dict:
+    """Average microseconds per lookup"""
+    rng = random.Random(7)
+    results = {}
+    for name, sql in queries.items():
+        if name == 'transaction_by_hash':
+            args = [(f'0x{rng.randrange(rows):064x}',) for _ in range(lookups)]
+        else:
+            args = [(rng.randrange(users),) for _ in range(lookups)]
+        start = time.perf_counter()
+        for arg in args:
+            conn.execute(sql, arg).fetchall()
+        results[name] = (time.perf_counter() - start) / lookups * 1e6
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help='wallet rows and transaction rows')
+    parser.add_argument('--lookups', type=int, default=200, help='lookups per query')
+    args = parser.parse_args()
+    users = args.rows // len(NETWORKS)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, 'bench.db')
+        conn = sqlite3.connect(db_path)
+        
+        start = time.perf_counter()
+        build(conn, args.rows)
+        print(f"built {args.rows:,} wallet rows and {args.rows:,} transactions in {time.perf_counter() - start:.1f}s")
+        size_before = os.path.getsize(db_path)
+        
+        before = measure(conn, LEGACY_QUERIES, users, args.rows, args.lookups)
+        
+        start = time.perf_counter()
+        migrate(conn)
+        migrated_in = time.perf_counter() - start
+        conn.execute('VACUUM')
+        size_after = os.path.getsize(db_path)
+        
+        after = measure(conn, MIGRATED_QUERIES, users, args.rows, args.lookups)
+        conn.close()
+    
+    print(f"migration: {migrated_in:.1f}s, file {size_before / 1e6:.0f} MB -> {size_after / 1e6:.0f} MB")
+    print(f"{'lookup':<22}{'legacy':>14}{'migrated':>14}{'speedup':>10}")
+    for name in before:
+        print(f"{name:<22}{before[name]:>11.1f} us{after[name]:>11.1f} us{before[name] / after[name]:>9.0f}x")
+
+if __name__ == "__main__":
+    main()
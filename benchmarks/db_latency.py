@@ -0,0 +1,98 @@
+"""
+Benchmark - Per-call DatabaseManager latency, per-call connections vs the shared engine
+
+Usage: python benchmarks/db_latency.py [--calls N]
+Runs in a temporary directory, so no database or encryption.key is touched.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import DatabaseManager
+
+class LegacyDatabaseManager(DatabaseManager):
+    """DatabaseManager as it was before the shared engine: one connection and commit per call"""
+    
+    def add_user(self, user_id, username=None, first_name=None, last_name=None):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO users (user_id, username, first_name, last_name, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (user_id, username, first_name, last_name))
+            conn.commit()
+    
+    def add_transaction(self, user_id, transaction_type, from_token=None, to_token=None,
+                        amount=None, network=None, transaction_hash=None):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT INTO transactions (user_id, transaction_type, from_token, to_token,
+                                       amount, network, transaction_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, transaction_type, from_token, to_token, amount, network, transaction_hash))
+            conn.commit()
+    
+    def get_user_wallets(self, user_id):
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute('''
+                SELECT n.network, k.address
+                FROM wallet_networks n JOIN wallet_keys k ON k.id = n.key_id
+                WHERE n.user_id = ?
+                ORDER BY n.rowid
+            ''', (user_id,))
+            return [{'network': row[0], 'address': row[1]} for row in cursor.fetchall()]
+    
+    def has_wallets(self, user_id):
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute('SELECT EXISTS (SELECT 1 FROM wallet_networks WHERE user_id = ?)', (user_id,))
+            return bool(cursor.fetchone()[0])
+
+def measure(db: DatabaseManager, calls: int) -> dict:
+    """Average microseconds per call for a mix of reads and writes"""
+    operations = {
+        'add_user': lambda i: db.add_user(i % 100, f'user{i}'),
+        'add_transaction': lambda i: db.add_transaction(i % 100, 'swap', 'btc', 'eth', 1.0, 'ethereum'),
+        'get_user_wallets': lambda i: db.get_user_wallets(i % 100),
+        'has_wallets': lambda i: db.has_wallets(i % 100)
+    }
+    results = {}
+    for name, operation in operations.items():
+        start = time.perf_counter()
+        for i in range(calls):
+            operation(i)
+        results[name] = (time.perf_counter() - start) / calls * 1e6
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=2000, help='calls per operation')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        
+        legacy = LegacyDatabaseManager(os.path.join(workdir, 'legacy.db'))
+        pooled = DatabaseManager(os.path.join(workdir, 'pooled.db'))
+        for db in (legacy, pooled):
+            for user_id in range(100):
+                db.add_wallet(user_id, 'ethereum', f'0x{user_id:040x}', f'{user_id:064x}')
+        
+        # Seeding went through the engine; restore the default rollback journal for the baseline
+        legacy.engine.close()
+        with sqlite3.connect(legacy.db_path) as conn:
+            conn.execute('PRAGMA journal_mode=DELETE')
+        
+        before = measure(legacy, args.calls)
+        after = measure(pooled, args.calls)
+        pooled.engine.close()
+    
+    print(f"{'operation':<18}{'per-call connect':>18}{'shared engine':>16}{'speedup':>10}")
+    for name in before:
+        print(f"{name:<18}{before[name]:>15.1f} us{after[name]:>13.1f} us{before[name] / after[name]:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark - Webhook mode under load: replay Update JSON at a target rate and measure latency
+
+Usage: python benchmarks/webhook_load.py [--updates FILE] [--rate N] [--duration S] [--work-ms MS]
+                                         [--concurrency N] [--queue-size N] [--connections N]
+Runs the bot's BoundedApplication with its bounded update queue behind a local webhook server,
+with an offline bot so nothing reaches Telegram. FILE holds recorded updates, one Update JSON
+object per line; without it, text-message updates from 100 users are generated. Reports p50/p99
+of the webhook response time and of handler latency (POST sent to handler finished), and
+counts updates handled out of order within their chat.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Update, User
+from telegram.ext import Application, ContextTypes, ExtBot, TypeHandler
+from bot_application import BoundedApplication
+from config import Config
+
+SECRET_TOKEN = 'webhook-load-test'
+
+class OfflineBot(ExtBot):
+    """Bot that answers the startup calls itself, so the benchmark needs no network"""
+    
+    async def get_me(self, *args, **kwargs) -> User:
+        self._bot_user = User(id=1, first_name='TokenShift', is_bot=True, username='tokenshift_load_bot')
+        return self._bot_user
+    
+    async def set_webhook(self, *args, **kwargs) -> bool:
+        return True
+    
+    async def delete_webhook(self, *args, **kwargs) -> bool:
+        return True
+
+def load_updates(path: str) -> List[Dict]:
+    """Read recorded updates, or generate text messages from 100 users"""
+    if path:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    
+    return [{
+        'update_id': i,
+        'message': {
+            'message_id': i,
+            'date': int(time.time()),
+            'chat': {'id': 1000 + i % 100, 'type': 'private'},
+            'from': {'id': 1000 + i % 100, 'is_bot': False, 'first_name': 'Load'},
+            'text': 'hello'
+        }
+    } for i in range(1, 1001)]
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of samples (seconds), in milliseconds"""
+    if not samples:
+        return float('nan')
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] * 1000
+
+async def run(args):
+    Config.UPDATE_CONCURRENCY = args.concurrency
+    handled: Dict[int, float] = {}
+    last_in_chat: Dict[int, int] = {}
+    out_of_order = 0
+    
+    async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        nonlocal out_of_order
+        chat_id = update.effective_chat.id if update.effective_chat else None
+        # Updates of a chat are sent with increasing update_id
+        if chat_id is not None:
+            if last_in_chat.get(chat_id, 0) > update.update_id:
+                out_of_order += 1
+            last_in_chat[chat_id] = update.update_id
+        await asyncio.sleep(args.work_ms / 1000)
+        handled[update.update_id] = time.perf_counter()
+    
+    application = (
+        Application.builder()
+        .bot(OfflineBot('1:load-test'))
+        .application_class(BoundedApplication)
+        .update_queue(asyncio.Queue(maxsize=args.queue_size))
+        .build()
+    )
+    application.add_handler(TypeHandler(Update, handle))
+    
+    await application.initialize()
+    await application.start()
+    await application.updater.start_webhook(listen='127.0.0.1', port=args.port, url_path='telegram',
+                                            secret_token=SECRET_TOKEN)
+    
+    templates = load_updates(args.updates)
+    total = int(args.rate * args.duration)
+    sent: Dict[int, float] = {}
+    responses: List[float] = []
+    errors = 0
+    
+    url = f"http://127.0.0.1:{args.port}/telegram"
+    headers = {'X-Telegram-Bot-Api-Secret-Token': SECRET_TOKEN}
+    limits = httpx.Limits(max_connections=args.connections)
+    
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        async def post(update_id: int, body: Dict):
+            nonlocal errors
+            start = time.perf_counter()
+            sent[update_id] = start
+            try:
+                response = await client.post(url, json=body, headers=headers)
+                response.raise_for_status()
+                responses.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+        
+        # Send on a fixed schedule; each update gets a fresh update_id
+        begin = time.perf_counter()
+        posts = []
+        for i in range(total):
+            delay = begin + i / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            body = dict(templates[i % len(templates)], update_id=i + 1)
+            posts.append(asyncio.ensure_future(post(i + 1, body)))
+        await asyncio.gather(*posts)
+        send_time = time.perf_counter() - begin
+    
+    # Let the backlog drain
+    deadline = time.perf_counter() + 60
+    while len(handled) < total - errors and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - begin
+    
+    await application.updater.stop()
+    await application.stop()
+    await application.shutdown()
+    
+    latencies = [handled[update_id] - sent[update_id] for update_id in handled]
+    print(f"updates: {total} sent in {send_time:.1f}s ({total / send_time:,.0f}/s target {args.rate:,.0f}/s), "
+          f"{len(handled)} handled in {elapsed:.1f}s, {errors} errors, {out_of_order} out of order within a chat")
+    print(f"concurrency {args.concurrency}, queue size {args.queue_size}, handler work {args.work_ms} ms")
+    print(f"webhook response: p50 {percentile(responses, 0.5):8.1f} ms   p99 {percentile(responses, 0.99):8.1f} ms")
+    print(f"handler latency:  p50 {percentile(latencies, 0.5):8.1f} ms   p99 {percentile(latencies, 0.99):8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--updates', help='recorded updates, one Update JSON object per line')
+    parser.add_argument('--rate', type=float, default=500, help='updates sent per second')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of sending')
+    parser.add_argument('--work-ms', type=float, default=5, help='simulated handler time per update')
+    parser.add_argument('--concurrency', type=int, default=Config.UPDATE_CONCURRENCY, help='updates processed at once')
+    parser.add_argument('--queue-size', type=int, default=Config.UPDATE_QUEUE_MAX_SIZE, help='update queue bound')
+    parser.add_argument('--connections', type=int, default=Config.WEBHOOK_MAX_CONNECTIONS,
+                        help='concurrent webhook connections, as Telegram would open')
+    parser.add_argument('--port', type=int, default=8743, help='local webhook port')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
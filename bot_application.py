@@ -0,0 +1,174 @@
+"""
+Bot application - Concurrent update processing with per-chat ordering and per-command caps
+"""
+import asyncio
+import logging
+from collections import deque
+from contextlib import nullcontext
+from typing import Deque, Dict, Optional, Any, Hashable, Set
+from telegram import Update
+from telegram.ext import Application
+from telegram.ext._application import _STOP_SIGNAL
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class BoundedApplication(Application):
+    """Application that processes updates concurrently while keeping each chat in order
+
+    - Up to UPDATE_CONCURRENCY handlers run at once.
+    - Updates of one chat (or of one user, for updates without a chat) are processed one
+      after another in arrival order, so a /swap is always handled before the /checkout
+      that follows it.
+    - Commands listed in COMMAND_CONCURRENCY_LIMITS are additionally capped. An update
+      waiting for its command's cap does not hold a processing slot, so expensive commands
+      cannot starve cheap ones.
+    - At most UPDATE_QUEUE_MAX_SIZE updates are taken off the update queue and left
+      unfinished. Beyond that the queue (bounded by the same size) fills up, and the webhook
+      server or poller blocks on it instead of buffering without limit.
+    - A chat may have at most CHAT_BACKLOG_MAX_SIZE updates waiting behind the one being
+      processed. Further updates from that chat are dropped and the chat is told to retry
+      (once per freed backlog place), so one flooding chat cannot hold the whole buffer while
+      other chats stall behind it.
+    
+    This overrides Application._update_fetcher, a private python-telegram-bot 20.3 method,
+    which is why requirements.txt pins that exact version. PTB 20.4 added
+    BaseUpdateProcessor (ApplicationBuilder.concurrent_updates(processor)), which can express
+    the per-chat ordering and caps without touching internals; move to it when upgrading.
+    """
+    
+    backlog_full_message = "⏳ Too many pending requests, please wait a moment and send that again"
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_concurrent_updates = max(Config.UPDATE_CONCURRENCY, 1)
+        self._update_slots = asyncio.Semaphore(self.max_concurrent_updates)
+        self._pending_updates = asyncio.BoundedSemaphore(max(Config.UPDATE_QUEUE_MAX_SIZE, 1))
+        self._command_limits = {
+            command: asyncio.Semaphore(limit) for command, limit in Config.COMMAND_CONCURRENCY_LIMITS.items()
+        }
+        self.chat_backlog_max_size = max(Config.CHAT_BACKLOG_MAX_SIZE, 0)
+        self._chat_backlogs: Dict[Hashable, Deque[object]] = {}  # chats with a worker -> updates waiting
+        self._backlog_full_notified: Set[Hashable] = set()  # chats told to retry since their backlog last moved
+        self.updates_in_flight = 0
+        self.updates_processed = 0
+        self.updates_dropped = 0
+    
+    @staticmethod
+    def _ordering_key(update: object) -> Optional[Hashable]:
+        """Key whose updates must be processed in order, or None if the update can run anywhere"""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat:
+            return ('chat', update.effective_chat.id)
+        if update.effective_user:
+            return ('user', update.effective_user.id)
+        return None
+    
+    @staticmethod
+    def _command(update: object) -> Optional[str]:
+        """Command name of a command message (/analysis@bot btc -> analysis)"""
+        message = update.effective_message if isinstance(update, Update) else None
+        text = message.text if message else None
+        if not text or not text.startswith('/'):
+            return None
+        return text.split()[0][1:].split('@')[0].lower()
+    
+    async def _update_fetcher(self):
+        """Hand updates to their chat's worker as they arrive; exit on the stop signal"""
+        while True:
+            try:
+                await self._pending_updates.acquire()
+                try:
+                    update = await self.update_queue.get()
+                except asyncio.CancelledError:
+                    self._pending_updates.release()
+                    raise
+            except asyncio.CancelledError:
+                # Only Application.stop may end this loop, as in the stock fetcher
+                logger.warning("Fetching updates got a asyncio.CancelledError. Ignoring as this task may "
+                               "only be closed via `Application.stop`.")
+                continue
+            
+            if update is _STOP_SIGNAL:
+                self._pending_updates.release()
+                logger.debug("Dropping pending updates")
+                while not self.update_queue.empty():
+                    self.update_queue.task_done()
+                self.update_queue.task_done()
+                return
+            
+            key = self._ordering_key(update)
+            if key is None:
+                self.create_task(self._process_one(update), update=update)
+            elif key in self._chat_backlogs:
+                backlog = self._chat_backlogs[key]
+                if len(backlog) >= self.chat_backlog_max_size:
+                    # The chat is flooding; shed the update instead of letting it hold a buffer slot
+                    self._drop_update(update, key)
+                    continue
+                # The chat's worker picks it up after the updates before it
+                backlog.append(update)
+            else:
+                self._chat_backlogs[key] = deque([update])
+                self.create_task(self._process_chat(key))
+    
+    def _drop_update(self, update: object, key: Hashable):
+        """Discard an update without processing it"""
+        self.updates_dropped += 1
+        self.update_queue.task_done()
+        self._pending_updates.release()
+        logger.warning("Dropping update %s: %s already has %d updates waiting",
+                       getattr(update, 'update_id', None), key, self.chat_backlog_max_size)
+        
+        # Tell the chat its message was not handled, once until the backlog moves again
+        if key[0] == 'chat' and key not in self._backlog_full_notified:
+            self._backlog_full_notified.add(key)
+            self.create_task(self._notify_backlog_full(key[1]))
+    
+    async def _notify_backlog_full(self, chat_id: int):
+        """Ask a flooding chat to resend later"""
+        try:
+            await self.bot.send_message(chat_id=chat_id, text=self.backlog_full_message)
+        except Exception as e:
+            logger.warning("Could not notify chat %s of dropped updates: %s", chat_id, e)
+    
+    async def _process_chat(self, key: Hashable):
+        """Work through one chat's updates in order until its backlog is empty"""
+        backlog = self._chat_backlogs[key]
+        try:
+            while backlog:
+                update = backlog.popleft()
+                # A place in the backlog is free again; the next dropped update is reported
+                self._backlog_full_notified.discard(key)
+                await self._process_one(update)
+        finally:
+            del self._chat_backlogs[key]
+            self._backlog_full_notified.discard(key)
+    
+    async def _process_one(self, update: object):
+        """Process one update within its command cap and a processing slot"""
+        try:
+            async with self._command_limits.get(self._command(update)) or nullcontext():
+                async with self._update_slots:
+                    self.updates_in_flight += 1
+                    try:
+                        await self.process_update(update)
+                    finally:
+                        self.updates_in_flight -= 1
+        finally:
+            self.updates_processed += 1
+            self.update_queue.task_done()
+            self._pending_updates.release()
+    
+    def update_stats(self) -> Dict[str, Any]:
+        """Get update processing counters"""
+        return {
+            'max_concurrent_updates': self.max_concurrent_updates,
+            'in_flight': self.updates_in_flight,
+            'processed': self.updates_processed,
+            'dropped': self.updates_dropped,
+            'busy_chats': len(self._chat_backlogs),
+            'queued_in_chats': sum(len(backlog) for backlog in self._chat_backlogs.values()),
+            'queue_size': self.update_queue.qsize()
+        }
@@ -13,22 +13,161 @@ class Config:
     # Telegram Bot Configuration
     BOT_TOKEN = os.getenv('BOT_TOKEN')
     
+    # Webhook mode: set WEBHOOK_URL (public HTTPS base URL) to receive updates on an embedded
+    # server instead of long polling
+    WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+    WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+    WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+    WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN')
+    # Concurrent HTTPS connections Telegram may open to the webhook (1-100)
+    WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+    
+    # Update processing: updates handled at once (each chat stays in order), and updates
+    # buffered before receiving blocks
+    UPDATE_CONCURRENCY = int(os.getenv('UPDATE_CONCURRENCY', '16'))
+    UPDATE_QUEUE_MAX_SIZE = int(os.getenv('UPDATE_QUEUE_MAX_SIZE', '256'))
+    # Updates one chat may have waiting behind its running update; newer ones are dropped so a
+    # flooding chat cannot fill the shared buffer
+    CHAT_BACKLOG_MAX_SIZE = int(os.getenv('CHAT_BACKLOG_MAX_SIZE', '8'))
+    # Most updates of one command processed at once, for commands that call slow upstream APIs
+    COMMAND_CONCURRENCY_LIMITS = {
+        'analysis': 4,
+        'daily': 4,
+        'balance': 8
+    }
+    
     # SideShift.ai API Configuration
     SIDESHIFT_SECRET = os.getenv('SIDESHIFT_SECRET')
     SIDESHIFT_AFFILIATE_ID = os.getenv('SIDESHIFT_AFFILIATE_ID')
     SIDESHIFT_API_BASE = 'https://sideshift.ai/api/v2'
+    # Seconds between revalidations of the cached SideShift coin list
+    SIDESHIFT_COINS_REFRESH_INTERVAL = float(os.getenv('SIDESHIFT_COINS_REFRESH_INTERVAL', '600'))
+    
+    # SideShift quote cache: quotes are reused for the same pair and amount (to QUOTE_CACHE_AMOUNT_DIGITS
+    # significant digits) while at least QUOTE_CACHE_MIN_REMAINING seconds remain before expiresAt
+    QUOTE_CACHE_MAX_ENTRIES = int(os.getenv('QUOTE_CACHE_MAX_ENTRIES', '512'))
+    QUOTE_CACHE_AMOUNT_DIGITS = int(os.getenv('QUOTE_CACHE_AMOUNT_DIGITS', '6'))
+    QUOTE_CACHE_MIN_REMAINING = float(os.getenv('QUOTE_CACHE_MIN_REMAINING', '60'))
+    # A pending /checkout quote is replaced this many seconds before it expires, at most
+    # QUOTE_PREFETCH_MAX_REFRESHES times per /swap
+    QUOTE_PREFETCH_LEAD = float(os.getenv('QUOTE_PREFETCH_LEAD', '90'))
+    QUOTE_PREFETCH_MAX_REFRESHES = int(os.getenv('QUOTE_PREFETCH_MAX_REFRESHES', '4'))
+    
+    # Background shift tracking: every SHIFT_TRACKER_INTERVAL seconds, up to SHIFT_TRACKER_MAX_BATCHES
+    # bulk status requests of SHIFT_TRACKER_BATCH_SIZE shifts each
+    SHIFT_TRACKER_INTERVAL = float(os.getenv('SHIFT_TRACKER_INTERVAL', '5'))
+    SHIFT_TRACKER_BATCH_SIZE = int(os.getenv('SHIFT_TRACKER_BATCH_SIZE', '50'))
+    SHIFT_TRACKER_MAX_BATCHES = int(os.getenv('SHIFT_TRACKER_MAX_BATCHES', '2'))
+    # Seconds between polls by shift status, stretched by SHIFT_POLL_BACKOFF per unchanged poll
+    SHIFT_POLL_INTERVALS = {
+        'waiting': 10,
+        'pending': 15,
+        'processing': 15,
+        'review': 120,
+        'settling': 60,
+        'refunding': 60,
+        'refund': 120,
+        'default': 30
+    }
+    SHIFT_POLL_BACKOFF = float(os.getenv('SHIFT_POLL_BACKOFF', '1.5'))
+    SHIFT_POLL_MAX_INTERVAL = float(os.getenv('SHIFT_POLL_MAX_INTERVAL', '300'))
     
     # Price Data APIs
     COINGECKO_API_KEY = os.getenv('COINGECKO_API_KEY')
     COINGECKO_API_BASE = 'https://api.coingecko.com/api/v3'
     
+    # CoinGecko request budget (requests per minute, burst size); 0 disables the limit
+    COINGECKO_RATE_LIMIT = float(os.getenv('COINGECKO_RATE_LIMIT', '30'))
+    COINGECKO_RATE_BURST = int(os.getenv('COINGECKO_RATE_BURST', '10'))
+    
+    # CoinGecko response cache: TTL in seconds per endpoint ({id} matches one path segment)
+    COINGECKO_CACHE_MAX_ENTRIES = int(os.getenv('COINGECKO_CACHE_MAX_ENTRIES', '1024'))
+    COINGECKO_CACHE_TTLS = {
+        '/coins/markets': 60,
+        '/coins/{id}/market_chart': 300,
+        '/coins/{id}': 120,
+        '/search/trending': 300,
+        '/search': 3600,
+        '/simple/price': 30,
+        '/simple/supported_vs_currencies': 86400,
+        '/global': 120
+    }
+    
+    # Local price history (seconds between CoinGecko tail refreshes, days of history kept)
+    PRICE_HISTORY_REFRESH_INTERVAL = int(os.getenv('PRICE_HISTORY_REFRESH_INTERVAL', '300'))
+    PRICE_HISTORY_RETENTION_DAYS = int(os.getenv('PRICE_HISTORY_RETENTION_DAYS', '90'))
+    
+    # Seconds between background recomputations of the /daily leaderboard
+    DAILY_REFRESH_INTERVAL = float(os.getenv('DAILY_REFRESH_INTERVAL', '300'))
+    
+    # Paged top gainers scan (CoinGecko allows up to 250 coins per page)
+    MARKET_SCAN_PER_PAGE = int(os.getenv('MARKET_SCAN_PER_PAGE', '250'))
+    MARKET_SCAN_MAX_PAGES = int(os.getenv('MARKET_SCAN_MAX_PAGES', '4'))
+    MARKET_SCAN_CONCURRENCY = int(os.getenv('MARKET_SCAN_CONCURRENCY', '2'))
+    
     # OpenRouter API Configuration
     OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
     OPENROUTER_API_BASE = os.getenv('OPENROUTER_API_BASE', 'https://openrouter.ai/api/v1')
+    OPENROUTER_TIMEOUT = 60
+    
+    # Technical analysis backend: 'python' (default) or 'numpy' (vectorized, batch capable)
+    TECHNICAL_ANALYSIS_BACKEND = os.getenv('TECHNICAL_ANALYSIS_BACKEND', 'python')
+    
+    # CPU-bound work: executor per task ('process' for GIL-bound Python, 'thread' for work that
+    # releases the GIL or handles secrets, 'inline' to run on the event loop)
+    CPU_TASK_ROUTES = {
+        'indicators': os.getenv('CPU_ROUTE_INDICATORS', 'process'),
+        'indicators_numpy': os.getenv('CPU_ROUTE_INDICATORS_NUMPY', 'thread'),
+        'derive_address': os.getenv('CPU_ROUTE_DERIVE_ADDRESS', 'thread'),
+        'default': 'thread'
+    }
+    # Inputs smaller than this run inline: handing them to a pool costs more than the work
+    # (/analysis passes ~31 daily closes, ~40us of indicator math vs ~600us through a process)
+    CPU_TASK_MIN_SIZE = {
+        'indicators': int(os.getenv('CPU_INDICATORS_MIN_PRICES', '500'))
+    }
+    CPU_THREAD_WORKERS = int(os.getenv('CPU_THREAD_WORKERS', '4'))
+    CPU_PROCESS_WORKERS = int(os.getenv('CPU_PROCESS_WORKERS', '2'))
+    # Event loop lag sampling (seconds between samples, stalls longer than this are logged)
+    LOOP_MONITOR_INTERVAL = float(os.getenv('LOOP_MONITOR_INTERVAL', '0.05'))
+    LOOP_MONITOR_WARN_AFTER = float(os.getenv('LOOP_MONITOR_WARN_AFTER', '0.25'))
+    
+    # HTTP client Configuration (shared async connection pool)
+    HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '10'))
+    HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20'))
+    
+    # Balance query Configuration (seconds before /balance replies with partial results)
+    BALANCE_QUERY_DEADLINE = float(os.getenv('BALANCE_QUERY_DEADLINE', '8'))
+    
+    # Maximum calls packed into one Multicall3 aggregate3 eth_call
+    MULTICALL_MAX_CALLS = int(os.getenv('MULTICALL_MAX_CALLS', '300'))
     
     # Database Configuration
     DATABASE_PATH = 'tokenshift.db'
     
+    # SQLite tuning for the shared connections (WAL journal; NORMAL sync is durable across app crashes)
+    DATABASE_SYNCHRONOUS = os.getenv('DATABASE_SYNCHRONOUS', 'NORMAL')
+    DATABASE_CACHE_SIZE_KB = int(os.getenv('DATABASE_CACHE_SIZE_KB', '16384'))
+    DATABASE_MMAP_SIZE = int(os.getenv('DATABASE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    DATABASE_BUSY_TIMEOUT = float(os.getenv('DATABASE_BUSY_TIMEOUT', '5'))
+    DATABASE_STATEMENT_CACHE_SIZE = int(os.getenv('DATABASE_STATEMENT_CACHE_SIZE', '256'))
+    # Threads serving async reads (writes always go through one writer thread)
+    DATABASE_READER_THREADS = int(os.getenv('DATABASE_READER_THREADS', '4'))
+    
+    # User activity write-behind (seconds between flushes, buffered users that force a flush)
+    ACTIVITY_FLUSH_INTERVAL = float(os.getenv('ACTIVITY_FLUSH_INTERVAL', '5'))
+    ACTIVITY_FLUSH_MAX_PENDING = int(os.getenv('ACTIVITY_FLUSH_MAX_PENDING', '500'))
+    
+    # Seconds between writes of changed context.user_data keys to SQLite
+    PERSISTENCE_FLUSH_INTERVAL = float(os.getenv('PERSISTENCE_FLUSH_INTERVAL', '10'))
+    
+    # Decrypted wallet key cache (set WALLET_KEY_CACHE_ENABLED=false to never keep plaintext keys in memory)
+    WALLET_KEY_CACHE_ENABLED = os.getenv('WALLET_KEY_CACHE_ENABLED', 'true').lower() == 'true'
+    WALLET_KEY_CACHE_TTL = float(os.getenv('WALLET_KEY_CACHE_TTL', '60'))
+    WALLET_KEY_CACHE_MAX_ENTRIES = int(os.getenv('WALLET_KEY_CACHE_MAX_ENTRIES', '1024'))
+    
     # Supported networks for SideShift
     SUPPORTED_NETWORKS = {
         'ethereum': 'mainnet',
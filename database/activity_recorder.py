@@ -0,0 +1,92 @@
+"""
+Activity recorder - Write-behind buffer for user upserts and last-seen times
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Any
+from config import Config
+from database.models import DatabaseManager
+
+class ActivityRecorder:
+    """Buffer user activity in memory and flush it to SQLite in batched transactions
+
+    record() is a dict update; a flush runs every flush_interval seconds, or as soon as
+    max_pending users are buffered, and once more on stop().
+    """
+    
+    def __init__(self, db: DatabaseManager = None, flush_interval: float = None, max_pending: int = None):
+        self.db = db or DatabaseManager()
+        self.flush_interval = flush_interval if flush_interval is not None else Config.ACTIVITY_FLUSH_INTERVAL
+        self.max_pending = max_pending if max_pending is not None else Config.ACTIVITY_FLUSH_MAX_PENDING
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._size_flush: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.flushes = 0
+        self.flushed = 0
+    
+    def record(self, user_id: int, username: str = None, first_name: str = None, last_name: str = None):
+        """Record that a user was active; later records for the same user overwrite earlier ones"""
+        self._pending[user_id] = {
+            'user_id': user_id,
+            'username': username,
+            'first_name': first_name,
+            'last_name': last_name,
+            'last_seen': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        }
+        self.recorded += 1
+        
+        if len(self._pending) >= self.max_pending and (self._size_flush is None or self._size_flush.done()):
+            self._size_flush = asyncio.ensure_future(self.flush())
+    
+    async def flush(self) -> int:
+        """Write buffered activity in one transaction; returns users written"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            
+            users, self._pending = list(self._pending.values()), {}
+            try:
+                await self.db.upsert_users_bulk_async(users)
+            except Exception as e:
+                # Put the batch back unless newer activity for the same user arrived meanwhile
+                for user in users:
+                    self._pending.setdefault(user['user_id'], user)
+                print(f"Activity flush error: {e}")
+                return 0
+            
+            self.flushes += 1
+            self.flushed += len(users)
+            return len(users)
+    
+    async def _run(self):
+        """Flush on the interval until stopped"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+    
+    def start(self):
+        """Start periodic flushing on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+    
+    async def stop(self):
+        """Stop periodic flushing and write everything still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get recorder counters"""
+        return {
+            'pending': len(self._pending),
+            'recorded': self.recorded,
+            'flushes': self.flushes,
+            'flushed': self.flushed
+        }
@@ -0,0 +1,128 @@
+"""
+Database engine - Shared SQLite connections for TokenShift bot
+"""
+import asyncio
+import functools
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Iterator, Any
+from config import Config
+
+class DatabaseEngine:
+    """Process-wide SQLite engine: one tuned, reused connection per thread for each database file
+
+    Async callers go through run_write (one dedicated writer thread, so writes never contend
+    for the lock) and run_read (a pool of reader threads; WAL lets them read during writes).
+    """
+    
+    # Every engine by database path
+    engines: Dict[str, 'DatabaseEngine'] = {}
+    _engines_lock = threading.Lock()
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._initialized = set()
+        self._init_lock = threading.Lock()
+        self._writer = None
+        self._readers = None
+        self.connects = 0
+    
+    @classmethod
+    def get(cls, db_path: str = 'tokenshift.db') -> 'DatabaseEngine':
+        """Get the shared engine for a database file"""
+        with cls._engines_lock:
+            engine = cls.engines.get(db_path)
+            if engine is None:
+                engine = cls(db_path)
+                cls.engines[db_path] = engine
+            return engine
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the configured pragmas"""
+        # Statements are compiled once per connection and reused from its statement cache.
+        # Each connection is only used by the thread that opened it; check_same_thread is
+        # off so close() can release them all from the shutdown thread.
+        conn = sqlite3.connect(self.db_path, timeout=Config.DATABASE_BUSY_TIMEOUT,
+                               cached_statements=Config.DATABASE_STATEMENT_CACHE_SIZE,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={Config.DATABASE_SYNCHRONOUS}')
+        conn.execute(f'PRAGMA cache_size={-Config.DATABASE_CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA mmap_size={Config.DATABASE_MMAP_SIZE}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+    
+    def connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+                self.connects += 1
+        return conn
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Use this thread's connection, committing on success and rolling back on error"""
+        conn = self.connection()
+        with conn:
+            yield conn
+    
+    def _executors(self):
+        """Create the writer thread and reader pool on first use"""
+        with self._lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+                self._readers = ThreadPoolExecutor(max_workers=Config.DATABASE_READER_THREADS,
+                                                   thread_name_prefix='db-reader')
+            return self._writer, self._readers
+    
+    async def run_write(self, call: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a writing DatabaseManager call on the writer thread"""
+        writer, _ = self._executors()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(writer, functools.partial(call, *args, **kwargs))
+    
+    async def run_read(self, call: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a read-only DatabaseManager call on the reader pool"""
+        _, readers = self._executors()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(readers, functools.partial(call, *args, **kwargs))
+    
+    def init_once(self, name: str, init: Callable[[], None]):
+        """Run a schema initializer once per process for this database"""
+        with self._init_lock:
+            if name in self._initialized:
+                return
+            init()
+            self._initialized.add(name)
+    
+    def close(self):
+        """Finish queued work, then close every connection opened by this engine"""
+        with self._lock:
+            executors, self._writer, self._readers = (self._writer, self._readers), None, None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            # Connections of other threads are closed above; drop this thread's reference
+            self._local = threading.local()
+    
+    @classmethod
+    def close_all(cls):
+        """Close the connections of every engine"""
+        with cls._engines_lock:
+            engines = list(cls.engines.values())
+        for engine in engines:
+            engine.close()
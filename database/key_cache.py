@@ -0,0 +1,129 @@
+"""
+Key cache - Short-lived cache of decrypted wallet keys
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Any, Tuple
+
+class KeyCache:
+    """Thread-safe LRU cache of decrypted keys that expire after a TTL
+
+    Plaintext is held in bytearrays and overwritten with zeros whenever an entry leaves the
+    cache (expiry, eviction, explicit eviction or clear). Strings handed to callers are
+    copies and cannot be zeroized. With enabled=False nothing is ever stored.
+    
+    Readers take generation(owner) before reading the encrypted key and pass it to set; if
+    the owner was evicted (or the cache cleared) in between, the plaintext is not cached.
+    """
+    
+    def __init__(self, max_entries: int = 1024, ttl: float = 60, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries = OrderedDict()  # key -> (expires_at, owner, bytearray)
+        self._owners: Dict[Hashable, set] = {}  # owner -> keys
+        self._generations: Dict[Hashable, int] = {}  # owner -> evictions so far
+        self._clears = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.zeroized = 0
+        self.stale_sets = 0
+    
+    @staticmethod
+    def _zeroize(secret: bytearray):
+        """Overwrite plaintext in place"""
+        for i in range(len(secret)):
+            secret[i] = 0
+    
+    def _remove(self, key: Hashable):
+        """Drop an entry and wipe its plaintext (lock held)"""
+        _, owner, secret = self._entries.pop(key)
+        keys = self._owners.get(owner)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._owners[owner]
+        self._zeroize(secret)
+        self.zeroized += 1
+    
+    def get(self, key: Hashable) -> Optional[str]:
+        """Return cached plaintext, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2].decode()
+    
+    def generation(self, owner: Hashable) -> Tuple[int, int]:
+        """Current eviction generation of an owner, to pass to set"""
+        with self._lock:
+            return self._clears, self._generations.get(owner, 0)
+    
+    def set(self, key: Hashable, owner: Hashable, plaintext: str, generation: Tuple[int, int] = None):
+        """Cache plaintext for ttl seconds under an owner (e.g. user) for bulk eviction
+
+        With a generation from before the read, nothing is cached if the owner has been
+        evicted since.
+        """
+        if not self.enabled or self.ttl <= 0:
+            return
+        
+        with self._lock:
+            if generation is not None and generation != (self._clears, self._generations.get(owner, 0)):
+                self.stale_sets += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, owner, bytearray(plaintext.encode()))
+            self._owners.setdefault(owner, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def evict_owner(self, owner: Hashable) -> int:
+        """Wipe every entry of an owner; returns entries removed"""
+        with self._lock:
+            self._generations[owner] = self._generations.get(owner, 0) + 1
+            keys = list(self._owners.get(owner, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+    
+    def clear(self):
+        """Wipe every cached entry"""
+        with self._lock:
+            self._clears += 1
+            for key in list(self._entries):
+                self._remove(key)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'zeroized': self.zeroized,
+                'stale_sets': self.stale_sets,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
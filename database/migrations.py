@@ -0,0 +1,167 @@
+"""
+Database migrations - Versioned schema changes for TokenShift bot
+
+Run ahead of a deploy with: python -m database.migrations [db_path]
+"""
+import os
+import sqlite3
+import sys
+import time
+from typing import Callable, List
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    """Check whether a table exists"""
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone() is not None
+
+def _normalize_wallets(conn: sqlite3.Connection):
+    """Store one encrypted key per address with a network mapping, and index user lookups"""
+    cursor = conn.cursor()
+    
+    # One row per (user, address); the private key is encrypted once. The UNIQUE index
+    # also serves user_id lookups.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS wallet_keys (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            address TEXT NOT NULL,
+            encrypted_private_key TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (user_id, address),
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        )
+    ''')
+    
+    # Networks a wallet key is bound on
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS wallet_networks (
+            key_id INTEGER NOT NULL,
+            user_id INTEGER,
+            network TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (key_id, network),
+            FOREIGN KEY (key_id) REFERENCES wallet_keys (id)
+        )
+    ''')
+    
+    if _table_exists(conn, 'wallets'):
+        # Keep the first encrypted copy of each key; the others are duplicates of it
+        cursor.execute('''
+            INSERT OR IGNORE INTO wallet_keys (user_id, address, encrypted_private_key, created_at)
+            SELECT user_id, address, encrypted_private_key, created_at FROM wallets ORDER BY id
+        ''')
+        cursor.execute('''
+            INSERT OR IGNORE INTO wallet_networks (key_id, user_id, network, created_at)
+            SELECT k.id, w.user_id, w.network, w.created_at
+            FROM wallets w JOIN wallet_keys k ON k.user_id IS w.user_id AND k.address = w.address
+            ORDER BY w.id
+        ''')
+        cursor.execute('DROP TABLE wallets')
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_wallet_networks_user_network ON wallet_networks (user_id, network)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions (user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_hash ON transactions (transaction_hash)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_portfolio_user ON portfolio (user_id)')
+
+def _unique_portfolio_positions(conn: sqlite3.Connection):
+    """Make portfolio writes real upserts: one row per (user, token, network)"""
+    cursor = conn.cursor()
+    
+    # INSERT OR REPLACE had no unique key to replace on, so keep only the newest row per position
+    cursor.execute('''
+        DELETE FROM portfolio WHERE id NOT IN (
+            SELECT MAX(id) FROM portfolio GROUP BY user_id, token_symbol, IFNULL(network, '')
+        )
+    ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_portfolio_position
+        ON portfolio (user_id, token_symbol, IFNULL(network, ''))
+    ''')
+    # Covered by the position index
+    cursor.execute('DROP INDEX IF EXISTS idx_portfolio_user')
+
+def _user_last_seen(conn: sqlite3.Connection):
+    """Track when each user was last active"""
+    conn.execute('ALTER TABLE users ADD COLUMN last_seen TIMESTAMP')
+
+def _shift_tracking(conn: sqlite3.Connection):
+    """Persist shifts so their status can be tracked in the background"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS shifts (
+            shift_id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            deposit_coin TEXT,
+            settle_coin TEXT,
+            deposit_amount TEXT,
+            settle_amount TEXT,
+            deposit_address TEXT,
+            polls INTEGER NOT NULL DEFAULT 0,
+            unchanged_polls INTEGER NOT NULL DEFAULT 0,
+            next_poll_at REAL,
+            closed INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        )
+    ''')
+    # The tracker only ever scans open shifts by due time
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_shifts_due ON shifts (next_poll_at) WHERE closed = 0')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_shifts_user ON shifts (user_id, closed)')
+
+def _user_data(conn: sqlite3.Connection):
+    """Persist the bot's per-user conversation state, one JSON value per key"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_data (
+            user_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, key)
+        ) WITHOUT ROWID
+    ''')
+
+# Migration N upgrades the schema from user_version N to N + 1; only ever append
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _normalize_wallets,
+    _unique_portfolio_positions,
+    _user_last_seen,
+    _shift_tracking,
+    _user_data
+]
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations, each in its own transaction; returns the schema version"""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number in range(version, len(MIGRATIONS)):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            MIGRATIONS[number](conn)
+            conn.execute(f'PRAGMA user_version = {number + 1}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return max(version, len(MIGRATIONS))
+
+def main():
+    """Migrate an existing database file in place"""
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'tokenshift.db'
+    if not os.path.exists(db_path):
+        print(f"{db_path}: no such database (new databases are created at the latest version)")
+        sys.exit(1)
+    
+    conn = sqlite3.connect(db_path)
+    if not _table_exists(conn, 'users'):
+        print(f"{db_path}: not a TokenShift database")
+        sys.exit(1)
+    
+    before = conn.execute('PRAGMA user_version').fetchone()[0]
+    start = time.perf_counter()
+    version = migrate(conn)
+    conn.close()
+    print(f"{db_path}: schema version {before} -> {version} in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
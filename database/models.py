@@ -3,36 +3,55 @@ Database models for TokenShift bot
 """
 import sqlite3
 import json
+import threading
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from cryptography.fernet import Fernet
 import base64
 import os
+from database.engine import DatabaseEngine
+from database.migrations import migrate
+from database.key_cache import KeyCache
+from config import Config
+
+# Encryption keys by key file, read once per process
+_keys: Dict[str, bytes] = {}
+_keys_lock = threading.Lock()
 
 class DatabaseManager:
     """Database manager for handling encrypted storage"""
     
+    # Decrypted private keys shared by every instance, keyed by (db_path, wallet key id)
+    key_cache = KeyCache(Config.WALLET_KEY_CACHE_MAX_ENTRIES, Config.WALLET_KEY_CACHE_TTL,
+                         Config.WALLET_KEY_CACHE_ENABLED)
+    
     def __init__(self, db_path: str = 'tokenshift.db'):
         self.db_path = db_path
+        self.engine = DatabaseEngine.get(db_path)
         self.key = self._get_or_create_key()
         self.cipher = Fernet(self.key)
-        self._init_database()
+        self.engine.init_once('models', self._init_database)
     
     def _get_or_create_key(self) -> bytes:
         """Get or create encryption key"""
         key_file = 'encryption.key'
-        if os.path.exists(key_file):
-            with open(key_file, 'rb') as f:
-                return f.read()
-        else:
-            key = Fernet.generate_key()
-            with open(key_file, 'wb') as f:
-                f.write(key)
+        with _keys_lock:
+            if key_file in _keys:
+                return _keys[key_file]
+            
+            if os.path.exists(key_file):
+                with open(key_file, 'rb') as f:
+                    key = f.read()
+            else:
+                key = Fernet.generate_key()
+                with open(key_file, 'wb') as f:
+                    f.write(key)
+            _keys[key_file] = key
             return key
     
     def _init_database(self):
         """Initialize database tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.engine.transaction() as conn:
             cursor = conn.cursor()
             
             # Users table
@@ -47,19 +66,6 @@ class DatabaseManager:
                 )
             ''')
             
-            # Wallets table (encrypted private keys)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS wallets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    network TEXT NOT NULL,
-                    address TEXT NOT NULL,
-                    encrypted_private_key TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)
-                )
-            ''')
-            
             # Transactions table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS transactions (
@@ -91,7 +97,8 @@ class DatabaseManager:
                 )
             ''')
             
-            conn.commit()
+            # Wallet tables (encrypted private keys) and indexes are created by the migrations
+            migrate(conn)
     
     def encrypt_data(self, data: str) -> str:
         """Encrypt sensitive data"""
@@ -103,79 +110,237 @@ class DatabaseManager:
     
     def add_user(self, user_id: int, username: str = None, first_name: str = None, last_name: str = None):
         """Add or update user"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.engine.transaction() as conn:
             cursor = conn.cursor()
+            # Upsert rather than REPLACE so created_at and last_seen survive
             cursor.execute('''
-                INSERT OR REPLACE INTO users (user_id, username, first_name, last_name, updated_at)
+                INSERT INTO users (user_id, username, first_name, last_name, updated_at)
                 VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    username = excluded.username,
+                    first_name = excluded.first_name,
+                    last_name = excluded.last_name,
+                    updated_at = CURRENT_TIMESTAMP
             ''', (user_id, username, first_name, last_name))
-            conn.commit()
+    
+    async def add_user_async(self, user_id: int, username: str = None, first_name: str = None,
+                             last_name: str = None):
+        """Add or update user (async)"""
+        await self.engine.run_write(self.add_user, user_id, username, first_name, last_name)
+    
+    def upsert_users_bulk(self, users: List[Dict[str, Any]]):
+        """Add or update users (dicts with user_id, username, first_name, last_name, last_seen) in one transaction"""
+        rows = [(
+            user['user_id'],
+            user.get('username'),
+            user.get('first_name'),
+            user.get('last_name'),
+            user.get('last_seen')
+        ) for user in users]
+        
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            # Upsert rather than REPLACE so created_at survives
+            cursor.executemany('''
+                INSERT INTO users (user_id, username, first_name, last_name, last_seen, updated_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    username = excluded.username,
+                    first_name = excluded.first_name,
+                    last_name = excluded.last_name,
+                    last_seen = COALESCE(MAX(users.last_seen, excluded.last_seen), excluded.last_seen, users.last_seen),
+                    updated_at = CURRENT_TIMESTAMP
+            ''', rows)
+    
+    async def upsert_users_bulk_async(self, users: List[Dict[str, Any]]):
+        """Add or update users in one transaction (async)"""
+        await self.engine.run_write(self.upsert_users_bulk, users)
     
     def add_wallet(self, user_id: int, network: str, address: str, private_key: str):
         """Add encrypted wallet"""
-        encrypted_key = self.encrypt_data(private_key)
-        with sqlite3.connect(self.db_path) as conn:
+        with self.engine.transaction() as conn:
             cursor = conn.cursor()
+            key_id = self._get_or_add_wallet_key(cursor, user_id, address, private_key)
             cursor.execute('''
-                INSERT INTO wallets (user_id, network, address, encrypted_private_key)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, network, address, encrypted_key))
-            conn.commit()
+                INSERT OR IGNORE INTO wallet_networks (key_id, user_id, network)
+                VALUES (?, ?, ?)
+            ''', (key_id, user_id, network))
+    
+    def _get_or_add_wallet_key(self, cursor: sqlite3.Cursor, user_id: int, address: str, private_key: str) -> int:
+        """Get the key row for an address, encrypting and storing the private key only the first time"""
+        cursor.execute('SELECT id FROM wallet_keys WHERE user_id = ? AND address = ?', (user_id, address))
+        result = cursor.fetchone()
+        if result:
+            return result[0]
+        
+        cursor.execute('''
+            INSERT INTO wallet_keys (user_id, address, encrypted_private_key)
+            VALUES (?, ?, ?)
+        ''', (user_id, address, self.encrypt_data(private_key)))
+        return cursor.lastrowid
+    
+    async def add_wallet_async(self, user_id: int, network: str, address: str, private_key: str):
+        """Add encrypted wallet (async)"""
+        await self.engine.run_write(self.add_wallet, user_id, network, address, private_key)
+    
+    def add_wallets_bulk(self, wallets: List[Dict[str, Any]]):
+        """Add encrypted wallets (dicts with user_id, network, address, private_key) in one transaction"""
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            key_ids = {}
+            rows = []
+            for wallet in wallets:
+                key = (wallet['user_id'], wallet['address'])
+                if key not in key_ids:
+                    key_ids[key] = self._get_or_add_wallet_key(cursor, wallet['user_id'], wallet['address'],
+                                                               wallet['private_key'])
+                rows.append((key_ids[key], wallet['user_id'], wallet['network']))
+            
+            cursor.executemany('''
+                INSERT OR IGNORE INTO wallet_networks (key_id, user_id, network)
+                VALUES (?, ?, ?)
+            ''', rows)
+    
+    async def add_wallets_bulk_async(self, wallets: List[Dict[str, Any]]):
+        """Add encrypted wallets in one transaction (async)"""
+        await self.engine.run_write(self.add_wallets_bulk, wallets)
     
     def get_wallet(self, user_id: int, network: str) -> Optional[Dict[str, Any]]:
         """Get user's wallet for specific network"""
-        with sqlite3.connect(self.db_path) as conn:
+        # Taken before the read so a concurrent delete_user_wallets keeps the key out of the cache
+        owner = (self.db_path, user_id)
+        generation = self.key_cache.generation(owner)
+        with self.engine.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT address, encrypted_private_key FROM wallets
-                WHERE user_id = ? AND network = ?
+                SELECT k.id, k.address, k.encrypted_private_key
+                FROM wallet_networks n JOIN wallet_keys k ON k.id = n.key_id
+                WHERE n.user_id = ? AND n.network = ?
+                ORDER BY n.rowid LIMIT 1
             ''', (user_id, network))
             result = cursor.fetchone()
-            if result:
-                return {
-                    'address': result[0],
-                    'private_key': self.decrypt_data(result[1])
-                }
+        
+        if not result:
             return None
+        
+        # Skip the Fernet decrypt (and its HMAC check) while the key is cached
+        cache_key = (self.db_path, result[0])
+        private_key = self.key_cache.get(cache_key)
+        if private_key is None:
+            private_key = self.decrypt_data(result[2])
+            self.key_cache.set(cache_key, owner, private_key, generation)
+        
+        return {
+            'address': result[1],
+            'private_key': private_key
+        }
+    
+    async def get_wallet_async(self, user_id: int, network: str) -> Optional[Dict[str, Any]]:
+        """Get user's wallet for specific network (async)"""
+        return await self.engine.run_read(self.get_wallet, user_id, network)
     
     def get_user_wallets(self, user_id: int) -> List[Dict[str, Any]]:
         """Get all user's wallets"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.engine.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT network, address FROM wallets
-                WHERE user_id = ?
+                SELECT n.network, k.address
+                FROM wallet_networks n JOIN wallet_keys k ON k.id = n.key_id
+                WHERE n.user_id = ?
+                ORDER BY n.rowid
             ''', (user_id,))
             return [{'network': row[0], 'address': row[1]} for row in cursor.fetchall()]
     
+    async def get_user_wallets_async(self, user_id: int) -> List[Dict[str, Any]]:
+        """Get all user's wallets (async)"""
+        return await self.engine.run_read(self.get_user_wallets, user_id)
+    
     def add_transaction(self, user_id: int, transaction_type: str, from_token: str = None, 
                        to_token: str = None, amount: float = None, network: str = None, 
                        transaction_hash: str = None):
         """Add transaction record"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.engine.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO transactions (user_id, transaction_type, from_token, to_token, 
                                        amount, network, transaction_hash)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (user_id, transaction_type, from_token, to_token, amount, network, transaction_hash))
-            conn.commit()
+    
+    async def add_transaction_async(self, user_id: int, transaction_type: str, from_token: str = None,
+                                    to_token: str = None, amount: float = None, network: str = None,
+                                    transaction_hash: str = None):
+        """Add transaction record (async)"""
+        await self.engine.run_write(self.add_transaction, user_id, transaction_type, from_token, to_token,
+                                    amount, network, transaction_hash)
+    
+    def add_transactions_bulk(self, transactions: List[Dict[str, Any]]):
+        """Add transaction records (dicts with add_transaction's arguments, plus optional status) in one transaction"""
+        rows = [(
+            transaction['user_id'],
+            transaction['transaction_type'],
+            transaction.get('from_token'),
+            transaction.get('to_token'),
+            transaction.get('amount'),
+            transaction.get('network'),
+            transaction.get('transaction_hash'),
+            transaction.get('status', 'pending')
+        ) for transaction in transactions]
+        
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO transactions (user_id, transaction_type, from_token, to_token,
+                                       amount, network, transaction_hash, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+    
+    async def add_transactions_bulk_async(self, transactions: List[Dict[str, Any]]):
+        """Add transaction records in one transaction (async)"""
+        await self.engine.run_write(self.add_transactions_bulk, transactions)
     
     def update_portfolio(self, user_id: int, token_symbol: str, amount: float, 
                         network: str = None, average_price: float = None):
         """Update user's portfolio"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.engine.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT OR REPLACE INTO portfolio (user_id, token_symbol, amount, network, 
                                                 average_price, last_updated)
                 VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             ''', (user_id, token_symbol, amount, network, average_price))
-            conn.commit()
+    
+    async def update_portfolio_async(self, user_id: int, token_symbol: str, amount: float,
+                                     network: str = None, average_price: float = None):
+        """Update user's portfolio (async)"""
+        await self.engine.run_write(self.update_portfolio, user_id, token_symbol, amount,
+                                    network, average_price)
+    
+    def upsert_portfolio_bulk(self, entries: List[Dict[str, Any]]):
+        """Update portfolio entries (dicts with update_portfolio's arguments) in one transaction"""
+        rows = [(
+            entry['user_id'],
+            entry['token_symbol'],
+            entry['amount'],
+            entry.get('network'),
+            entry.get('average_price')
+        ) for entry in entries]
+        
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT OR REPLACE INTO portfolio (user_id, token_symbol, amount, network,
+                                                average_price, last_updated)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ''', rows)
+    
+    async def upsert_portfolio_bulk_async(self, entries: List[Dict[str, Any]]):
+        """Update portfolio entries in one transaction (async)"""
+        await self.engine.run_write(self.upsert_portfolio_bulk, entries)
     
     def get_portfolio(self, user_id: int) -> List[Dict[str, Any]]:
         """Get user's portfolio"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.engine.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT token_symbol, amount, network, average_price, last_updated
@@ -189,16 +354,178 @@ class DatabaseManager:
                 'last_updated': row[4]
             } for row in cursor.fetchall()]
     
+    async def get_portfolio_async(self, user_id: int) -> List[Dict[str, Any]]:
+        """Get user's portfolio (async)"""
+        return await self.engine.run_read(self.get_portfolio, user_id)
+    
     def delete_user_wallets(self, user_id: int):
         """Delete all user's wallets"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.engine.transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute('DELETE FROM wallets WHERE user_id = ?', (user_id,))
-            conn.commit()
+            cursor.execute('DELETE FROM wallet_networks WHERE user_id = ?', (user_id,))
+            cursor.execute('DELETE FROM wallet_keys WHERE user_id = ?', (user_id,))
+        
+        # Wipe any decrypted copies of the deleted keys
+        self.key_cache.evict_owner((self.db_path, user_id))
+    
+    async def delete_user_wallets_async(self, user_id: int):
+        """Delete all user's wallets (async)"""
+        await self.engine.run_write(self.delete_user_wallets, user_id)
     
     def has_wallets(self, user_id: int) -> bool:
         """Check if user has any wallets"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT EXISTS (SELECT 1 FROM wallet_networks WHERE user_id = ?)', (user_id,))
+            return bool(cursor.fetchone()[0])
+    
+    async def has_wallets_async(self, user_id: int) -> bool:
+        """Check if user has any wallets (async)"""
+        return await self.engine.run_read(self.has_wallets, user_id)
+    
+    def add_shift(self, shift: Dict[str, Any]):
+        """Start tracking a shift (dict with shift_id, user_id, chat_id, status, next_poll_at and
+        optional deposit_coin, settle_coin, deposit_amount, settle_amount, deposit_address)"""
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR IGNORE INTO shifts
+                (shift_id, user_id, chat_id, status, deposit_coin, settle_coin, deposit_amount,
+                 settle_amount, deposit_address, next_poll_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                shift['shift_id'],
+                shift['user_id'],
+                shift['chat_id'],
+                shift['status'],
+                shift.get('deposit_coin'),
+                shift.get('settle_coin'),
+                shift.get('deposit_amount'),
+                shift.get('settle_amount'),
+                shift.get('deposit_address'),
+                shift['next_poll_at']
+            ))
+    
+    async def add_shift_async(self, shift: Dict[str, Any]):
+        """Start tracking a shift (async)"""
+        await self.engine.run_write(self.add_shift, shift)
+    
+    def _shift_from_row(self, row: tuple) -> Dict[str, Any]:
+        """Convert a shifts row to a dict"""
+        return {
+            'shift_id': row[0],
+            'user_id': row[1],
+            'chat_id': row[2],
+            'status': row[3],
+            'deposit_coin': row[4],
+            'settle_coin': row[5],
+            'deposit_amount': row[6],
+            'settle_amount': row[7],
+            'deposit_address': row[8],
+            'polls': row[9],
+            'unchanged_polls': row[10],
+            'next_poll_at': row[11]
+        }
+    
+    def get_due_shifts(self, now: float, limit: int) -> List[Dict[str, Any]]:
+        """Get open shifts whose next poll is due, most overdue first"""
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT shift_id, user_id, chat_id, status, deposit_coin, settle_coin, deposit_amount,
+                       settle_amount, deposit_address, polls, unchanged_polls, next_poll_at
+                FROM shifts WHERE closed = 0 AND next_poll_at <= ?
+                ORDER BY next_poll_at LIMIT ?
+            ''', (now, limit))
+            return [self._shift_from_row(row) for row in cursor.fetchall()]
+    
+    async def get_due_shifts_async(self, now: float, limit: int) -> List[Dict[str, Any]]:
+        """Get open shifts whose next poll is due (async)"""
+        return await self.engine.run_read(self.get_due_shifts, now, limit)
+    
+    def get_open_shifts(self, user_id: int) -> List[Dict[str, Any]]:
+        """Get a user's open shifts, newest first"""
+        with self.engine.transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM wallets WHERE user_id = ?', (user_id,))
-            return cursor.fetchone()[0] > 0
+            cursor.execute('''
+                SELECT shift_id, user_id, chat_id, status, deposit_coin, settle_coin, deposit_amount,
+                       settle_amount, deposit_address, polls, unchanged_polls, next_poll_at
+                FROM shifts WHERE user_id = ? AND closed = 0
+                ORDER BY created_at DESC, rowid DESC
+            ''', (user_id,))
+            return [self._shift_from_row(row) for row in cursor.fetchall()]
+    
+    async def get_open_shifts_async(self, user_id: int) -> List[Dict[str, Any]]:
+        """Get a user's open shifts (async)"""
+        return await self.engine.run_read(self.get_open_shifts, user_id)
+    
+    def update_shifts_bulk(self, updates: List[Dict[str, Any]]):
+        """Record poll results (dicts with shift_id, status, settle_amount, unchanged_polls,
+        next_poll_at and closed) in one transaction"""
+        rows = [(
+            update['status'],
+            update.get('settle_amount'),
+            update['unchanged_polls'],
+            update['next_poll_at'],
+            1 if update['closed'] else 0,
+            update['shift_id']
+        ) for update in updates]
+        
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                UPDATE shifts SET
+                    status = ?,
+                    settle_amount = COALESCE(?, settle_amount),
+                    polls = polls + 1,
+                    unchanged_polls = ?,
+                    next_poll_at = ?,
+                    closed = ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE shift_id = ?
+            ''', rows)
+    
+    async def update_shifts_bulk_async(self, updates: List[Dict[str, Any]]):
+        """Record poll results in one transaction (async)"""
+        await self.engine.run_write(self.update_shifts_bulk, updates)
+    
+    def get_user_data(self, user_id: int) -> Dict[str, str]:
+        """Get a user's stored bot state as serialized values by key"""
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT key, value FROM user_data WHERE user_id = ?', (user_id,))
+            return dict(cursor.fetchall())
+    
+    async def get_user_data_async(self, user_id: int) -> Dict[str, str]:
+        """Get a user's stored bot state (async)"""
+        return await self.engine.run_read(self.get_user_data, user_id)
+    
+    def write_user_data_bulk(self, changes: List[Tuple[int, str, Optional[str]]]):
+        """Apply (user_id, key, serialized value) changes in one transaction; a None value deletes the key"""
+        upserts = [change for change in changes if change[2] is not None]
+        deletes = [(user_id, key) for user_id, key, value in changes if value is None]
+        
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO user_data (user_id, key, value, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (user_id, key) DO UPDATE SET
+                    value = excluded.value,
+                    updated_at = CURRENT_TIMESTAMP
+            ''', upserts)
+            cursor.executemany('DELETE FROM user_data WHERE user_id = ? AND key = ?', deletes)
+    
+    async def write_user_data_bulk_async(self, changes: List[Tuple[int, str, Optional[str]]]):
+        """Apply user data changes in one transaction (async)"""
+        await self.engine.run_write(self.write_user_data_bulk, changes)
+    
+    def delete_user_data(self, user_id: int):
+        """Delete all of a user's stored bot state"""
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM user_data WHERE user_id = ?', (user_id,))
+    
+    async def delete_user_data_async(self, user_id: int):
+        """Delete all of a user's stored bot state (async)"""
+        await self.engine.run_write(self.delete_user_data, user_id)
@@ -0,0 +1,151 @@
+"""
+Persistence - SQLite-backed user_data for the Telegram application
+"""
+import asyncio
+import json
+from typing import Dict, Optional, Any, Set, Tuple
+from telegram.ext import BasePersistence, PersistenceInput
+from config import Config
+from database.models import DatabaseManager
+
+class SQLitePersistence(BasePersistence):
+    """Keep context.user_data in the shared SQLite database
+
+    Only user_data is persisted. Nothing is read at startup: a user's data is loaded the first
+    time an update or job for that user is processed. Every update_interval seconds the
+    application hands over the users it touched, and only the keys whose serialized value
+    changed (or that were removed) are written, in one transaction per flush.
+    """
+    
+    def __init__(self, db: DatabaseManager = None, update_interval: float = None):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval if update_interval is not None else Config.PERSISTENCE_FLUSH_INTERVAL
+        )
+        self.db = db or DatabaseManager()
+        self._loaded: Set[int] = set()
+        self._stored: Dict[int, Dict[str, str]] = {}  # user_id -> key -> serialized value as last stored
+        self._dirty: Dict[Tuple[int, str], Optional[str]] = {}  # (user_id, key) -> value, None to delete
+        self._write_lock = asyncio.Lock()
+        self.loads = 0
+        self.writes = 0
+        self.keys_written = 0
+    
+    async def get_user_data(self) -> Dict[int, Dict[str, Any]]:
+        """Nothing is preloaded; users are loaded lazily by refresh_user_data"""
+        return {}
+    
+    async def refresh_user_data(self, user_id: int, user_data: Dict[str, Any]):
+        """Load a user's stored data the first time they are seen"""
+        if user_id in self._loaded:
+            return
+        
+        stored = await self.db.get_user_data_async(user_id)
+        if user_id in self._loaded:
+            return
+        self._loaded.add(user_id)
+        self._stored[user_id] = dict(stored)
+        self.loads += 1
+        
+        for key, value in stored.items():
+            # Values set since startup are newer than what was stored
+            user_data.setdefault(key, json.loads(value))
+    
+    async def update_user_data(self, user_id: int, data: Dict[str, Any]):
+        """Queue the keys of a user's data that changed since they were last stored, then write"""
+        stored = self._stored.setdefault(user_id, {})
+        for key, value in data.items():
+            try:
+                serialized = json.dumps(value, sort_keys=True)
+            except (TypeError, ValueError) as e:
+                print(f"Not persisting user_data[{key!r}] of {user_id}: {e}")
+                continue
+            if stored.get(key) != serialized:
+                stored[key] = serialized
+                self._dirty[(user_id, key)] = serialized
+        
+        for key in [key for key in stored if key not in data]:
+            del stored[key]
+            self._dirty[(user_id, key)] = None
+        
+        # The application updates every touched user concurrently; let the others queue their
+        # keys so they share this write
+        await asyncio.sleep(0)
+        await self._write_dirty()
+    
+    async def _write_dirty(self):
+        """Write every queued change in one transaction"""
+        async with self._write_lock:
+            if not self._dirty:
+                return
+            
+            changes, self._dirty = self._dirty, {}
+            try:
+                await self.db.write_user_data_bulk_async(
+                    [(user_id, key, value) for (user_id, key), value in changes.items()]
+                )
+            except Exception as e:
+                # Retry on the next flush unless the key changed again meanwhile
+                for change_key, value in changes.items():
+                    self._dirty.setdefault(change_key, value)
+                print(f"User data flush error: {e}")
+                return
+            
+            self.writes += 1
+            self.keys_written += len(changes)
+    
+    async def drop_user_data(self, user_id: int):
+        """Forget everything stored for a user"""
+        self._stored.pop(user_id, None)
+        for change_key in [change_key for change_key in self._dirty if change_key[0] == user_id]:
+            del self._dirty[change_key]
+        await self.db.delete_user_data_async(user_id)
+    
+    async def flush(self):
+        """Write whatever is still queued (called on shutdown)"""
+        await self._write_dirty()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get persistence counters"""
+        return {
+            'loaded_users': len(self._loaded),
+            'pending_keys': len(self._dirty),
+            'loads': self.loads,
+            'writes': self.writes,
+            'keys_written': self.keys_written
+        }
+    
+    # Only user_data is stored; the remaining persistence hooks are no-ops
+    
+    async def get_chat_data(self) -> Dict[int, Dict[str, Any]]:
+        return {}
+    
+    async def get_bot_data(self) -> Dict[str, Any]:
+        return {}
+    
+    async def get_callback_data(self) -> None:
+        return None
+    
+    async def get_conversations(self, name: str) -> Dict:
+        return {}
+    
+    async def update_conversation(self, name: str, key: Tuple[int, ...], new_state: Optional[object]):
+        pass
+    
+    async def update_chat_data(self, chat_id: int, data: Dict[str, Any]):
+        pass
+    
+    async def update_bot_data(self, data: Dict[str, Any]):
+        pass
+    
+    async def update_callback_data(self, data: Any):
+        pass
+    
+    async def drop_chat_data(self, chat_id: int):
+        pass
+    
+    async def refresh_chat_data(self, chat_id: int, chat_data: Dict[str, Any]):
+        pass
+    
+    async def refresh_bot_data(self, bot_data: Dict[str, Any]):
+        pass
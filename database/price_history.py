@@ -0,0 +1,109 @@
+"""
+Price history store - Local time series of CoinGecko prices
+"""
+import sqlite3
+from typing import Optional, List
+from database.engine import DatabaseEngine
+
+HOUR_MS = 3600 * 1000
+
+class PriceHistoryStore:
+    """Append-only USD price history keyed by CoinGecko coin_id"""
+    
+    def __init__(self, db_path: str = 'tokenshift.db'):
+        self.db_path = db_path
+        self.engine = DatabaseEngine.get(db_path)
+        self.engine.init_once('price_history', self._init_database)
+    
+    def _init_database(self):
+        """Initialize price history table"""
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            
+            # One row per point, clustered by coin and time so range queries are index scans
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS price_history (
+                    coin_id TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    price REAL NOT NULL,
+                    PRIMARY KEY (coin_id, timestamp)
+                ) WITHOUT ROWID
+            ''')
+            
+    
+    def append_prices(self, coin_id: str, points: List[List[float]]) -> int:
+        """Store [[timestamp_ms, price], ...] points, ignoring ones already stored; returns rows added"""
+        rows = [(coin_id, int(point[0]), point[1]) for point in points if point[1] is not None]
+        if not rows:
+            return 0
+        
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            before = conn.total_changes
+            cursor.executemany('''
+                INSERT OR IGNORE INTO price_history (coin_id, timestamp, price)
+                VALUES (?, ?, ?)
+            ''', rows)
+            added = conn.total_changes - before
+            return added
+    
+    async def append_prices_async(self, coin_id: str, points: List[List[float]]) -> int:
+        """Store price points (async)"""
+        return await self.engine.run_write(self.append_prices, coin_id, points)
+    
+    def get_last_timestamp(self, coin_id: str) -> Optional[int]:
+        """Get timestamp (ms) of the newest stored point for a coin"""
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT MAX(timestamp) FROM price_history WHERE coin_id = ?', (coin_id,))
+            return cursor.fetchone()[0]
+    
+    async def get_last_timestamp_async(self, coin_id: str) -> Optional[int]:
+        """Get timestamp (ms) of the newest stored point for a coin (async)"""
+        return await self.engine.run_read(self.get_last_timestamp, coin_id)
+    
+    def get_price_range(self, coin_id: str, start: int = None, end: int = None) -> List[List[float]]:
+        """Get [[timestamp_ms, price], ...] with start <= timestamp <= end, oldest first"""
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT timestamp, price FROM price_history
+                WHERE coin_id = ? AND timestamp >= ? AND timestamp <= ?
+                ORDER BY timestamp
+            ''', (coin_id, start if start is not None else 0,
+                  end if end is not None else 2 ** 63 - 1))
+            return [[row[0], row[1]] for row in cursor.fetchall()]
+    
+    async def get_price_range_async(self, coin_id: str, start: int = None, end: int = None) -> List[List[float]]:
+        """Get stored points in a time range (async)"""
+        return await self.engine.run_read(self.get_price_range, coin_id, start, end)
+    
+    def compact(self, coin_id: str, start: int, end: int) -> int:
+        """Keep only the last point per hour for start <= timestamp < end; returns rows deleted"""
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                DELETE FROM price_history
+                WHERE coin_id = ? AND timestamp >= ? AND timestamp < ?
+                AND timestamp NOT IN (
+                    SELECT MAX(timestamp) FROM price_history
+                    WHERE coin_id = ? AND timestamp >= ? AND timestamp < ?
+                    GROUP BY timestamp / ?
+                )
+            ''', (coin_id, start, end, coin_id, start, end, HOUR_MS))
+            return cursor.rowcount
+    
+    async def compact_async(self, coin_id: str, start: int, end: int) -> int:
+        """Keep only the last point per hour in a time range (async)"""
+        return await self.engine.run_write(self.compact, coin_id, start, end)
+    
+    def prune(self, coin_id: str, before: int) -> int:
+        """Delete points older than a timestamp (ms); returns rows deleted"""
+        with self.engine.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM price_history WHERE coin_id = ? AND timestamp < ?', (coin_id, before))
+            return cursor.rowcount
+    
+    async def prune_async(self, coin_id: str, before: int) -> int:
+        """Delete points older than a timestamp (ms) (async)"""
+        return await self.engine.run_write(self.prune, coin_id, before)
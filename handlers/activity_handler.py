@@ -0,0 +1,18 @@
+"""
+Activity handler - Record user activity for every update
+"""
+from telegram import Update
+from telegram.ext import ContextTypes
+from database.activity_recorder import ActivityRecorder
+
+class ActivityHandler:
+    """Record users on every update through the write-behind recorder"""
+    
+    def __init__(self):
+        self.recorder = ActivityRecorder()
+    
+    async def handle_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Record the user behind an update (no database I/O on this path)"""
+        user = update.effective_user
+        if user:
+            self.recorder.record(user.id, user.username, user.first_name, user.last_name)
@@ -5,7 +5,8 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from services.coingecko_service import CoinGeckoService
 from services.ai_service import AIService
-from services.technical_analysis import TechnicalAnalysis
+from services.technical_analysis import create_technical_analysis
+from services.price_history_service import PriceHistoryService
 
 class AnalysisHandler:
     """Handle /analysis command"""
@@ -13,7 +14,8 @@ class AnalysisHandler:
     def __init__(self):
         self.coingecko = CoinGeckoService()
         self.ai = AIService()
-        self.technical = TechnicalAnalysis()
+        self.technical = create_technical_analysis()
+        self.price_history = PriceHistoryService(self.coingecko)
     
     async def handle_analysis(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /analysis command - AI analysis of token trends"""
@@ -32,7 +34,7 @@ class AnalysisHandler:
             loading_msg = await update.message.reply_text("🔍 Fetching token data...")
             
             # Search for token in CoinGecko
-            search_results = self.coingecko.search_coins(token_symbol)
+            search_results = await self.coingecko.search_coins_async(token_symbol)
             if not search_results:
                 await loading_msg.edit_text(f"❌ Token not found: {token_symbol}")
                 return
@@ -44,38 +46,27 @@ class AnalysisHandler:
             await loading_msg.edit_text("📊 Fetching price data...")
             
             # Get detailed coin information
-            coin_info = self.coingecko.get_coin_info(coin_id)
+            coin_info = await self.coingecko.get_coin_info_async(coin_id)
             if not coin_info:
                 await loading_msg.edit_text(f"❌ Unable to get token info: {token_symbol}")
                 return
             
-            # Get market chart data for technical analysis (30 days)
-            chart_data = self.coingecko.get_coin_market_chart(coin_id, days=30)
-            if not chart_data or not chart_data.get('prices'):
+            # Get 30 days of hourly prices from the local history (only the missing tail is downloaded)
+            series = await self.price_history.get_series_async(coin_id, days=30)
+            if not series:
                 await loading_msg.edit_text(f"❌ Unable to get price chart data: {token_symbol}")
                 return
             
-            # Extract prices for technical analysis
-            prices = [price[1] for price in chart_data['prices']]  # Extract price values
+            # Technical indicators use daily closes
+            prices = series.resample('1d').prices
             
             # Calculate technical indicators
             await loading_msg.edit_text("📈 Calculating technical indicators...")
-            technical_indicators = self.technical.get_technical_indicators(prices)
+            technical_indicators = await self.technical.get_technical_indicators_async(prices)
             
-            # Get price changes for different timeframes
-            market_data = {}
+            # Get price changes for different timeframes from the same series
             timeframes = ['1d', '3d', '1w', '1m']
-            
-            for timeframe in timeframes:
-                days = 1 if timeframe == '1d' else 3 if timeframe == '3d' else 7 if timeframe == '1w' else 30
-                chart_data_tf = self.coingecko.get_coin_market_chart(coin_id, days=days)
-                if chart_data_tf and chart_data_tf.get('prices'):
-                    prices_tf = chart_data_tf['prices']
-                    if len(prices_tf) >= 2:
-                        start_price = prices_tf[0][1]
-                        end_price = prices_tf[-1][1]
-                        change = ((end_price - start_price) / start_price) * 100
-                        market_data[timeframe] = change
+            market_data = series.changes(timeframes)
             
             # Prepare comprehensive data for AI analysis
             analysis_data = {
@@ -97,7 +88,7 @@ class AnalysisHandler:
             await loading_msg.edit_text("🤖 AI is analyzing token trends, please wait...")
             
             # Get AI analysis
-            analysis = self.ai.analyze_token_trends(analysis_data)
+            analysis = await self.ai.analyze_token_trends_async(analysis_data)
             
             if not analysis:
                 await loading_msg.edit_text("❌ AI analysis failed, please try again later")
@@ -17,7 +17,7 @@ class BasicHandlers:
         user_id = user.id
         
         # Add user to database
-        self.db.add_user(
+        await self.db.add_user_async(
             user_id=user_id,
             username=user.username,
             first_name=user.first_name,
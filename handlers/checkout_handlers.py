@@ -29,7 +29,7 @@ class CheckoutHandlers:
             user_id = update.effective_user.id
             
             # Check if user has wallet
-            wallets = self.db.get_user_wallets(user_id)
+            wallets = await self.db.get_user_wallets_async(user_id)
             if not wallets:
                 await update.message.reply_text(
                     "❌ Please bind wallet first\n"
@@ -41,7 +41,7 @@ class CheckoutHandlers:
             wallet_address = wallets[0]['address']
             
             # Create checkout session
-            checkout = self.sideshift.create_checkout_session(
+            checkout = await self.sideshift.create_checkout_session_async(
                 settle_coin=token,
                 settle_network=network,
                 settle_amount=amount,
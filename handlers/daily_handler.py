@@ -1,10 +1,14 @@
 """
 Daily command handler - Get top gaining tokens
 """
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
 from telegram import Update
 from telegram.ext import ContextTypes
 from services.coingecko_service import CoinGeckoService
 from services.sideshift_service import SideShiftService
+from config import Config
 
 class DailyHandler:
     """Handle /daily command"""
@@ -12,67 +16,95 @@ class DailyHandler:
     def __init__(self):
         self.coingecko = CoinGeckoService()
         self.sideshift = SideShiftService()
+        # Rendered leaderboard, recomputed in the background by refresh_leaderboard
+        self.leaderboard: Optional[str] = None
+        self.leaderboard_updated_at: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
     
-    async def handle_daily(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle /daily command - show top gaining tokens"""
-        try:
-            await update.message.reply_text("Fetching market data...")
-            
-            # Get top gainers from CoinGecko
-            gainers = self.coingecko.get_top_gainers()
-            
-            if not gainers:
-                await update.message.reply_text("❌ Unable to fetch market data, please try again later")
-                return
-            
-            # Get supported coins from SideShift
-            supported_coins = self.sideshift.get_supported_coins()
-            if not supported_coins:
-                await update.message.reply_text("❌ Unable to fetch supported tokens list")
-                return
-            
-            # Create mapping of supported symbols (use 'coin' field from SideShift)
-            supported_symbols = set()
-            for coin in supported_coins.get('coins', []):
-                symbol = coin.get('coin', '').lower()
-                if symbol:
-                    supported_symbols.add(symbol)
-            
-            # Filter gainers to only include SideShift supported tokens
-            filtered_gainers = []
-            for coin in gainers:
-                symbol = coin.get('symbol', '').lower()
-                if symbol in supported_symbols:
-                    filtered_gainers.append(coin)
-            
-            # Sort by 24h change percentage (descending)
-            filtered_gainers.sort(key=lambda x: x.get('price_change_percentage_24h', 0), reverse=True)
+    @staticmethod
+    def _render(gainers: List[Dict]) -> str:
+        """Format the leaderboard message"""
+        message = "📈 Today's Top Gaining Tokens\n\n"
+        
+        for i, coin in enumerate(gainers, 1):
+            name = coin.get('name', 'N/A')
+            symbol = coin.get('symbol', 'N/A')
+            price = coin.get('current_price') or 0
+            change_24h = coin.get('price_change_percentage_24h') or 0
+            market_cap = coin.get('market_cap') or 0
             
-            # Take top 10
-            filtered_gainers = filtered_gainers[:10]
+            emoji = "🚀" if change_24h > 10 else "📈" if change_24h > 0 else "📉"
             
-            if not filtered_gainers:
-                await update.message.reply_text("❌ No SideShift supported gaining tokens found")
-                return
-            
-            # Format message
-            message = "📈 Today's Top Gaining Tokens\n\n"
+            message += f"{i}. {emoji} {name} ({symbol})\n"
+            message += f"   Price: ${price:.6f}\n"
+            message += f"   24h Change: {change_24h:+.2f}%\n"
+            message += f"   Market Cap: ${market_cap:,.0f}\n\n"
+        
+        return message
+    
+    def _publish(self, gainers: List[Dict]):
+        """Replace the served leaderboard with the top 10 of `gainers`"""
+        self.leaderboard = self._render(gainers[:10])
+        self.leaderboard_updated_at = time.time()
+    
+    async def _build_leaderboard(self) -> Tuple[Optional[str], Optional[str]]:
+        """Compute the leaderboard message; returns (message, error)"""
+        # Filter gainers to SideShift supported tokens (shared coin registry, matched on 'coin' field)
+        registry = self.sideshift.registry
+        if not await registry.ensure_fresh():
+            return None, "❌ Unable to fetch supported tokens list"
+        
+        # Scan CoinGecko pages until 10 supported gainers are found, publishing each page's
+        # matches as they arrive so a cold leaderboard fills in before the scan completes
+        cold = self.leaderboard is None
+        filtered_gainers = await self.coingecko.scan_top_gainers_async(
+            lambda coin: registry.is_supported(coin.get('symbol') or ''),
+            wanted=10,
+            on_matches=self._publish if cold else None
+        )
+        
+        if filtered_gainers is None:
+            return None, "❌ Unable to fetch market data, please try again later"
+        
+        if not filtered_gainers:
+            return None, "❌ No SideShift supported gaining tokens found"
+        
+        return self._render(filtered_gainers[:10]), None
+    
+    async def refresh_leaderboard(self, context: ContextTypes.DEFAULT_TYPE = None) -> Optional[str]:
+        """Recompute the leaderboard (JobQueue callback); keeps the previous one on failure and returns the error"""
+        async with self._refresh_lock:
+            message, error = await self._build_leaderboard()
+            if message:
+                self.leaderboard = message
+                self.leaderboard_updated_at = time.time()
+            else:
+                print(f"Daily leaderboard refresh failed: {error}")
+            return error
+    
+    def _staleness_note(self) -> str:
+        """Describe how old the leaderboard is"""
+        age = time.time() - self.leaderboard_updated_at
+        note = f"🕒 Updated {int(age // 60)} min ago" if age >= 60 else "🕒 Updated just now"
+        if age > 2 * Config.DAILY_REFRESH_INTERVAL:
+            note += " ⚠️ may be stale, use /daily refresh"
+        return note
+    
+    async def handle_daily(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /daily command - show top gaining tokens (/daily refresh recomputes them first)"""
+        try:
+            force_refresh = bool(context.args) and context.args[0].lower() == 'refresh'
             
-            for i, coin in enumerate(filtered_gainers, 1):
-                name = coin.get('name', 'N/A')
-                symbol = coin.get('symbol', 'N/A')
-                price = coin.get('current_price', 0)
-                change_24h = coin.get('price_change_percentage_24h', 0)
-                market_cap = coin.get('market_cap', 0)
-                
-                emoji = "🚀" if change_24h > 10 else "📈" if change_24h > 0 else "📉"
-                
-                message += f"{i}. {emoji} {name} ({symbol})\n"
-                message += f"   Price: ${price:.6f}\n"
-                message += f"   24h Change: {change_24h:+.2f}%\n"
-                message += f"   Market Cap: ${market_cap:,.0f}\n\n"
+            # Answer from memory unless nothing has been computed yet or a refresh was asked for
+            if force_refresh or self.leaderboard is None:
+                await update.message.reply_text("Fetching market data...")
+                error = await self.refresh_leaderboard()
+                if error:
+                    await update.message.reply_text(error)
+                if self.leaderboard is None:
+                    return
             
-            await update.message.reply_text(message)
+            await update.message.reply_text(f"{self.leaderboard}{self._staleness_note()}")
             
         except Exception as e:
             await update.message.reply_text(f"❌ Error processing command: {str(e)}")
@@ -23,7 +23,7 @@ class MessageHandlers:
             if context.user_data.get('pending_wallet_deletion', False):
                 if message_text == 'confirm':
                     # Delete user's wallets
-                    self.db.delete_user_wallets(user_id)
+                    await self.db.delete_user_wallets_async(user_id)
                     context.user_data['pending_wallet_deletion'] = False
                     
                     await update.message.reply_text(
@@ -3,8 +3,13 @@ Trade command handlers - Trading related commands
 """
 from telegram import Update
 from telegram.ext import ContextTypes
+from typing import Dict, Optional
 from services.sideshift_service import SideShiftService
+from services.quote_cache import QuoteCache
+from services.swap_service import SHIFT_QUOTE_REJECTED
+from services.shift_tracker import ShiftTracker, SETTLED_STATUSES, FAILED_STATUSES
 from database.models import DatabaseManager
+from config import Config
 
 class TradeHandlers:
     """Handle trading related commands"""
@@ -12,6 +17,70 @@ class TradeHandlers:
     def __init__(self):
         self.sideshift = SideShiftService()
         self.db = DatabaseManager()
+        self.tracker = ShiftTracker(self.db, self.sideshift)
+    
+    async def _check_supported(self, update: Update, *coins: str) -> bool:
+        """Reply and return False if SideShift does not support a coin on Ethereum (checked once the registry loads)"""
+        registry = self.sideshift.registry
+        if not await registry.ensure_fresh():
+            return True
+        
+        for coin in coins:
+            if not registry.supports(coin, 'ethereum'):
+                await update.message.reply_text(f"❌ {coin} is not supported on Ethereum by SideShift")
+                return False
+        return True
+    
+    async def _requote(self, swap_details: Dict) -> Optional[Dict]:
+        """Get a new quote for a pending swap, bypassing the quote cache"""
+        return await self.sideshift.get_quote_async(
+            deposit_coin=swap_details['from_token'],
+            deposit_network='ethereum',
+            settle_coin=swap_details['to_token'],
+            settle_network='ethereum',
+            deposit_amount=str(swap_details['amount']),
+            fresh=True
+        )
+    
+    @staticmethod
+    def _cancel_quote_refresh(context: ContextTypes.DEFAULT_TYPE, user_id: int):
+        """Drop the scheduled refresh of a user's pending quote"""
+        if context.job_queue is None:
+            return
+        for job in context.job_queue.get_jobs_by_name(f"quote_refresh:{user_id}"):
+            job.schedule_removal()
+    
+    def _schedule_quote_refresh(self, context: ContextTypes.DEFAULT_TYPE, user_id: int, quote: Dict,
+                                refreshes: int = 0):
+        """Replace the pending quote in the background QUOTE_PREFETCH_LEAD seconds before it expires"""
+        self._cancel_quote_refresh(context, user_id)
+        remaining = QuoteCache.remaining(quote)
+        if context.job_queue is None or remaining is None or refreshes >= Config.QUOTE_PREFETCH_MAX_REFRESHES:
+            return
+        context.job_queue.run_once(
+            self._refresh_pending_quote,
+            max(remaining - Config.QUOTE_PREFETCH_LEAD, 0),
+            data={'quote_id': quote.get('id'), 'refreshes': refreshes},
+            name=f"quote_refresh:{user_id}",
+            user_id=user_id
+        )
+    
+    async def _refresh_pending_quote(self, context: ContextTypes.DEFAULT_TYPE):
+        """JobQueue callback: swap the user's pending quote for a fresh one before it expires"""
+        job = context.job
+        quote = context.user_data.get('pending_quote')
+        swap_details = context.user_data.get('swap_details')
+        # Nothing to do once the swap was executed or replaced by a newer /swap
+        if not quote or not swap_details or quote.get('id') != job.data['quote_id']:
+            return
+        
+        fresh_quote = await self._requote(swap_details)
+        if not fresh_quote:
+            # /checkout requotes on demand if the pending quote expires meanwhile
+            return
+        
+        context.user_data['pending_quote'] = fresh_quote
+        self._schedule_quote_refresh(context, job.user_id, fresh_quote, job.data['refreshes'] + 1)
     
     async def handle_buy(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /buy command - buy tokens with USDT/USDC"""
@@ -28,7 +97,7 @@ class TradeHandlers:
             user_id = update.effective_user.id
             
             # Check if user has wallet
-            wallets = self.db.get_user_wallets(user_id)
+            wallets = await self.db.get_user_wallets_async(user_id)
             if not wallets:
                 await update.message.reply_text(
                     "❌ Please bind wallet first\n"
@@ -36,8 +105,12 @@ class TradeHandlers:
                 )
                 return
             
+            # Reject coins SideShift cannot shift on Ethereum before asking for a quote
+            if not await self._check_supported(update, token_symbol):
+                return
+            
             # Get quote from SideShift
-            quote = self.sideshift.get_quote(
+            quote = await self.sideshift.get_quote_async(
                 deposit_coin='usdt',
                 deposit_network='ethereum',
                 settle_coin=token_symbol,
@@ -79,7 +152,7 @@ class TradeHandlers:
             user_id = update.effective_user.id
             
             # Check if user has wallet
-            wallets = self.db.get_user_wallets(user_id)
+            wallets = await self.db.get_user_wallets_async(user_id)
             if not wallets:
                 await update.message.reply_text(
                     "❌ Please bind wallet first\n"
@@ -87,8 +160,12 @@ class TradeHandlers:
                 )
                 return
             
+            # Reject coins SideShift cannot shift on Ethereum before asking for a quote
+            if not await self._check_supported(update, token_symbol):
+                return
+            
             # Get quote from SideShift
-            quote = self.sideshift.get_quote(
+            quote = await self.sideshift.get_quote_async(
                 deposit_coin=token_symbol,
                 deposit_network='ethereum',
                 settle_coin='usdc',
@@ -130,7 +207,7 @@ class TradeHandlers:
             user_id = update.effective_user.id
             
             # Check if user has wallet
-            wallets = self.db.get_user_wallets(user_id)
+            wallets = await self.db.get_user_wallets_async(user_id)
             if not wallets:
                 await update.message.reply_text(
                     "❌ Please bind wallet first\n"
@@ -138,8 +215,12 @@ class TradeHandlers:
                 )
                 return
             
+            # Reject coins SideShift cannot shift on Ethereum before asking for a quote
+            if not await self._check_supported(update, token_symbol):
+                return
+            
             # Get quote from SideShift
-            quote = self.sideshift.get_quote(
+            quote = await self.sideshift.get_quote_async(
                 deposit_coin=token_symbol,
                 deposit_network='ethereum',
                 settle_coin='usdt',
@@ -182,7 +263,7 @@ class TradeHandlers:
             user_id = update.effective_user.id
             
             # Check if user has wallet
-            wallets = self.db.get_user_wallets(user_id)
+            wallets = await self.db.get_user_wallets_async(user_id)
             if not wallets:
                 await update.message.reply_text(
                     "❌ Please bind wallet first\n"
@@ -190,8 +271,12 @@ class TradeHandlers:
                 )
                 return
             
+            # Reject coins SideShift cannot shift on Ethereum before asking for a quote
+            if not await self._check_supported(update, token1, token2):
+                return
+            
             # Get quote from SideShift
-            quote = self.sideshift.get_quote(
+            quote = await self.sideshift.get_quote_async(
                 deposit_coin=token1,
                 deposit_network='ethereum',  # Default to ethereum
                 settle_coin=token2,
@@ -203,13 +288,14 @@ class TradeHandlers:
                 await update.message.reply_text("❌ Unable to get swap quote")
                 return
             
-            # Store quote in context for checkout
+            # Store quote in context for checkout, and keep it fresh until then
             context.user_data['pending_quote'] = quote
             context.user_data['swap_details'] = {
                 'from_token': token1,
                 'to_token': token2,
                 'amount': amount
             }
+            self._schedule_quote_refresh(context, user_id, quote)
             
             # Show quote to user
             message = f"💱 **Token Swap Quote**\n\n"
@@ -244,7 +330,7 @@ class TradeHandlers:
             swap_details = context.user_data.get('swap_details', {})
             
             # Get user's wallet address
-            wallets = self.db.get_user_wallets(user_id)
+            wallets = await self.db.get_user_wallets_async(user_id)
             if not wallets:
                 await update.message.reply_text(
                     "❌ Please bind wallet first\n"
@@ -255,8 +341,22 @@ class TradeHandlers:
             # Use first wallet address (in real implementation, let user choose)
             wallet_address = wallets[0]['address']
             
+            # Requote if the background refresh could not keep the quote from expiring
+            remaining = QuoteCache.remaining(quote)
+            if remaining is not None and remaining <= Config.QUOTE_CACHE_MIN_REMAINING and swap_details:
+                quote = await self._requote(swap_details) or quote
+            
             # Create fixed shift
-            shift = self.sideshift.create_fixed_shift(quote['id'], wallet_address)
+            result, shift = await self.sideshift.create_fixed_shift_result_async(quote['id'], wallet_address)
+            
+            # SideShift refused the quote (expired or spent server-side), so no shift was created;
+            # retry once with a new one. Other failures (e.g. a timeout) may have created a shift,
+            # so they are not retried.
+            if result == SHIFT_QUOTE_REJECTED and swap_details:
+                new_quote = await self._requote(swap_details)
+                if new_quote:
+                    quote = new_quote
+                    result, shift = await self.sideshift.create_fixed_shift_result_async(quote['id'], wallet_address)
             
             if not shift:
                 await update.message.reply_text("❌ Failed to create swap, please try again")
@@ -273,31 +373,94 @@ class TradeHandlers:
             message += f"Deposit Address: `{shift.get('depositAddress', 'N/A')}`\n"
             message += f"Status: {shift.get('status', 'N/A')}\n\n"
             message += "⚠️ Please send tokens to deposit address to complete swap\n"
-            message += "Use /status to check swap status"
+            message += "You will be notified as the swap progresses, or use /status"
             
             # Clear pending quote
             del context.user_data['pending_quote']
             del context.user_data['swap_details']
+            self._cancel_quote_refresh(context, user_id)
             
             await update.message.reply_text(message, parse_mode='Markdown')
             
+            # Track its status in the background; the deposit address is already sent
+            try:
+                await self.tracker.track(
+                    user_id, update.effective_chat.id, shift,
+                    deposit_coin=swap_details.get('from_token'),
+                    settle_coin=swap_details.get('to_token'),
+                    deposit_amount=str(swap_details.get('amount', '')),
+                    settle_amount=quote.get('settleAmount')
+                )
+            except Exception as e:
+                print(f"Error tracking shift {shift.get('id')}: {e}")
+            
         except Exception as e:
             await update.message.reply_text(f"❌ Error processing command: {str(e)}")
     
+    @staticmethod
+    def _status_message(shift_id: str, shift: Dict) -> str:
+        """Format a swap status report"""
+        status = shift.get('status', 'N/A')
+        message = f"📊 **Swap Status**\n\n"
+        message += f"Swap ID: `{shift_id}`\n"
+        message += f"Status: {status}\n"
+        message += f"Progress: {shift.get('progress', 'N/A')}\n"
+        
+        if status in SETTLED_STATUSES:
+            message += f"✅ Swap completed!\n"
+            message += f"Transaction Hash: `{shift.get('settleHash') or shift.get('transactionHash', 'N/A')}`\n"
+        elif status in FAILED_STATUSES:
+            message += f"❌ Swap failed\n"
+            message += f"Reason: {shift.get('error') or status}\n"
+        else:
+            message += f"⏳ Swap in progress...\n"
+            message += f"Use /status to check status again"
+        return message
+    
+    async def poll_shifts(self, context: ContextTypes.DEFAULT_TYPE):
+        """Poll due shifts and notify users of status changes (JobQueue callback)"""
+        try:
+            changes = await self.tracker.poll_due()
+        except Exception as e:
+            print(f"Shift tracker error: {e}")
+            return
+        
+        for tracked, shift in changes:
+            shift_id = tracked['shift_id']
+            # Keep /status in step with what the user was told
+            user_data = context.application.user_data.get(tracked['user_id'])
+            if user_data is not None and (user_data.get('active_shift') or {}).get('id') == shift_id:
+                if shift.get('status') in SETTLED_STATUSES | FAILED_STATUSES:
+                    del user_data['active_shift']
+                else:
+                    user_data['active_shift'] = shift
+                context.application.mark_data_for_update_persistence(user_ids=tracked['user_id'])
+            
+            try:
+                await context.bot.send_message(tracked['chat_id'], self._status_message(shift_id, shift),
+                                               parse_mode='Markdown')
+            except Exception as e:
+                print(f"Error notifying shift {shift_id} status: {e}")
+    
     async def handle_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /status command - check swap status"""
         try:
             user_id = update.effective_user.id
             
-            # Check if there's an active shift
-            if 'active_shift' not in context.user_data:
+            # Fall back to the tracked shifts, which survive restarts
+            shift = context.user_data.get('active_shift')
+            if shift is None:
+                open_shifts = await self.db.get_open_shifts_async(user_id)
+                if open_shifts:
+                    shift = {'id': open_shifts[0]['shift_id'], 'status': open_shifts[0]['status']}
+            
+            if shift is None:
                 await update.message.reply_text(
                     "❌ No active swap\n"
                     "Please use /swap and /checkout to create a swap first"
                 )
                 return
             
-            shift = context.user_data['active_shift']
             shift_id = shift.get('id')
             
             if not shift_id:
@@ -305,36 +468,19 @@ class TradeHandlers:
                 return
             
             # Get current shift status
-            current_status = self.sideshift.get_shift_status(shift_id)
+            current_status = await self.sideshift.get_shift_status_async(shift_id)
             
             if not current_status:
                 await update.message.reply_text("❌ Unable to get swap status")
                 return
             
-            # Update stored shift info
-            context.user_data['active_shift'] = current_status
-            
-            # Show status
-            message = f"📊 **Swap Status**\n\n"
-            message += f"Swap ID: `{shift_id}`\n"
-            message += f"Status: {current_status.get('status', 'N/A')}\n"
-            message += f"Progress: {current_status.get('progress', 'N/A')}\n"
-            
-            if current_status.get('status') == 'complete':
-                message += f"✅ Swap completed!\n"
-                message += f"Transaction Hash: `{current_status.get('transactionHash', 'N/A')}`\n"
-                # Clear completed shift
-                del context.user_data['active_shift']
-            elif current_status.get('status') == 'failed':
-                message += f"❌ Swap failed\n"
-                message += f"Reason: {current_status.get('error', 'N/A')}\n"
-                # Clear failed shift
-                del context.user_data['active_shift']
+            # Update stored shift info, clearing it once the swap is over
+            if current_status.get('status') in SETTLED_STATUSES | FAILED_STATUSES:
+                context.user_data.pop('active_shift', None)
             else:
-                message += f"⏳ Swap in progress...\n"
-                message += f"Use /status to check status again"
+                context.user_data['active_shift'] = current_status
             
-            await update.message.reply_text(message, parse_mode='Markdown')
+            await update.message.reply_text(self._status_message(shift_id, current_status), parse_mode='Markdown')
             
         except Exception as e:
             await update.message.reply_text(f"❌ Error processing command: {str(e)}")
@@ -21,7 +21,7 @@ class WalletHandler:
             if not context.args:
                 # Show current wallets
                 user_id = update.effective_user.id
-                wallets = self.db.get_user_wallets(user_id)
+                wallets = await self.db.get_user_wallets_async(user_id)
                 
                 if not wallets:
                     await update.message.reply_text(
@@ -48,7 +48,7 @@ class WalletHandler:
             user_id = update.effective_user.id
             
             # Check if user already has wallets
-            if self.db.has_wallets(user_id):
+            if await self.db.has_wallets_async(user_id):
                 await update.message.reply_text(
                     "⚠️ You already have a wallet bound!\n\n"
                     "Please delete your current wallet first:\n"
@@ -66,7 +66,7 @@ class WalletHandler:
                 return
             
             # Convert private key to address
-            address = self.wallet_utils.private_key_to_address(private_key)
+            address = await self.wallet_utils.private_key_to_address_async(private_key)
             
             if not address:
                 await update.message.reply_text(
@@ -75,10 +75,14 @@ class WalletHandler:
                 )
                 return
             
-            # Add wallet to database for all EVM networks
+            # Add wallet to database for all EVM networks in one transaction
             evm_networks = self.wallet_utils.get_evm_networks()
-            for network in evm_networks:
-                self.db.add_wallet(user_id, network["name"].lower(), address, private_key)
+            await self.db.add_wallets_bulk_async([{
+                'user_id': user_id,
+                'network': network["name"].lower(),
+                'address': address,
+                'private_key': private_key
+            } for network in evm_networks])
             
             await update.message.reply_text(
                 f"✅ Wallet added successfully!\n"
@@ -96,7 +100,7 @@ class WalletHandler:
             user_id = update.effective_user.id
             
             # Check if user has wallets
-            if not self.db.has_wallets(user_id):
+            if not await self.db.has_wallets_async(user_id):
                 await update.message.reply_text(
                     "❌ You don't have any wallet bound!\n\n"
                     "Use /wallet add <private_key> to bind a wallet first."
@@ -120,7 +124,7 @@ class WalletHandler:
         """Handle /balance command - check USDT/USDC balance"""
         try:
             user_id = update.effective_user.id
-            wallets = self.db.get_user_wallets(user_id)
+            wallets = await self.db.get_user_wallets_async(user_id)
             
             if not wallets:
                 await update.message.reply_text(
@@ -135,11 +139,11 @@ class WalletHandler:
             # Send loading message
             loading_msg = await update.message.reply_text("🔍 Querying balances across networks...")
             
-            # Get balances from all networks
-            balances = self.balance_service.get_wallet_balances(wallet_address)
+            # Get balances from all networks concurrently (partial results at the deadline)
+            report = await self.balance_service.get_wallet_balances_report_async(wallet_address)
             
             # Format and send balance message
-            message = self.balance_service.format_balance_message(balances)
+            message = self.balance_service.format_balance_message(report['balances'], report['timed_out'])
             
             await loading_msg.edit_text(message, parse_mode='Markdown')
             
@@ -4,7 +4,7 @@ TokenShift Telegram Bot - Main Application
 import asyncio
 import logging
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from telegram.ext import Application, CommandHandler, MessageHandler, TypeHandler, filters, ContextTypes
 from handlers.basic_handlers import BasicHandlers
 from handlers.daily_handler import DailyHandler
 from handlers.analysis_handler import AnalysisHandler
@@ -12,6 +12,15 @@ from handlers.trade_handlers import TradeHandlers
 from handlers.checkout_handlers import CheckoutHandlers
 from handlers.wallet_handler import WalletHandler
 from handlers.message_handlers import MessageHandlers
+from handlers.activity_handler import ActivityHandler
+from services.http_client import HTTPClient
+from services.sideshift_service import SideShiftService
+from services.cpu_executor import CPUExecutor
+from services.loop_monitor import LoopMonitor
+from database.engine import DatabaseEngine
+from database.models import DatabaseManager
+from database.persistence import SQLitePersistence
+from bot_application import BoundedApplication
 from config import Config
 
 # Configure logging
@@ -33,6 +42,8 @@ class TokenShiftBot:
         self.checkout_handlers = CheckoutHandlers()
         self.wallet_handler = WalletHandler()
         self.message_handlers = MessageHandlers()
+        self.activity_handler = ActivityHandler()
+        self.loop_monitor = LoopMonitor()
         
         # Validate configuration
         if not self.config.BOT_TOKEN:
@@ -46,7 +57,31 @@ class TokenShiftBot:
         """Create and configure the bot application"""
         
         # Create application
-        application = Application.builder().token(self.config.BOT_TOKEN).build()
+        application = (
+            Application.builder()
+            .token(self.config.BOT_TOKEN)
+            .application_class(BoundedApplication)
+            # Bounded, so a backlog blocks the webhook server or poller instead of growing
+            .update_queue(asyncio.Queue(maxsize=self.config.UPDATE_QUEUE_MAX_SIZE))
+            .persistence(SQLitePersistence())
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
+        
+        # Record user activity ahead of (and without blocking) the command handlers
+        application.add_handler(TypeHandler(Update, self.activity_handler.handle_update), group=-1)
+        
+        # Recompute the /daily leaderboard in the background
+        application.job_queue.run_repeating(self.daily_handler.refresh_leaderboard,
+                                            interval=self.config.DAILY_REFRESH_INTERVAL, first=0,
+                                            name='daily_leaderboard')
+        
+        # Poll open shifts and push status changes to their users
+        application.job_queue.run_repeating(self.trade_handlers.poll_shifts,
+                                            interval=self.config.SHIFT_TRACKER_INTERVAL,
+                                            first=self.config.SHIFT_TRACKER_INTERVAL,
+                                            name='shift_tracker')
         
         # Add command handlers
         application.add_handler(CommandHandler("start", self.basic_handlers.handle_start))
@@ -81,6 +116,21 @@ class TokenShiftBot:
             # Create application
             application = self.create_application()
             
+            if self.config.WEBHOOK_URL:
+                # Receive updates on the embedded webhook server
+                logger.info("Bot started webhook server...")
+                application.run_webhook(
+                    listen=self.config.WEBHOOK_LISTEN,
+                    port=self.config.WEBHOOK_PORT,
+                    url_path=self.config.WEBHOOK_PATH,
+                    webhook_url=f"{self.config.WEBHOOK_URL.rstrip('/')}/{self.config.WEBHOOK_PATH}",
+                    secret_token=self.config.WEBHOOK_SECRET_TOKEN,
+                    max_connections=self.config.WEBHOOK_MAX_CONNECTIONS,
+                    allowed_updates=Update.ALL_TYPES,
+                    drop_pending_updates=True
+                )
+                return
+            
             # Start polling
             logger.info("Bot started polling...")
             application.run_polling(
@@ -92,10 +142,33 @@ class TokenShiftBot:
             logger.error(f"Error starting bot: {e}")
             raise
     
+    async def _post_init(self, application: Application):
+        """Start background tasks once the application is initialized"""
+        self.activity_handler.recorder.start()
+        # Keep the shared SideShift coin registry warm
+        SideShiftService.registry.start()
+        # Report event loop stalls (see loop_monitor.stats() for totals)
+        self.loop_monitor.start()
+    
+    async def _post_shutdown(self, application: Application):
+        """Release resources once the application has shut down"""
+        await self.stop_bot()
+    
     async def stop_bot(self):
         """Stop the bot"""
         logger.info("Stopping TokenShift Bot...")
-        # Cleanup code here if needed
+        # Flush buffered user activity while the database is still open
+        await self.activity_handler.recorder.stop()
+        await SideShiftService.registry.stop()
+        await self.loop_monitor.stop()
+        # Stop the CPU worker threads and processes
+        CPUExecutor.shutdown()
+        # Close pooled HTTP connections shared by all services
+        await HTTPClient.close()
+        # Close the shared SQLite connections (checkpoints the WAL)
+        DatabaseEngine.close_all()
+        # Wipe decrypted wallet keys from memory
+        DatabaseManager.key_cache.clear()
 
 def main():
     """Main function"""
@@ -2,13 +2,20 @@
 OpenRouter AI service for token analysis
 """
 import requests
+import httpx
+import hashlib
 import json
 from typing import Dict, List, Optional, Any
 from config import Config
+from services.http_client import HTTPClient
+from services.single_flight import SingleFlight
 
 class AIService:
     """Service for AI-powered token analysis using OpenRouter"""
     
+    # Identical prompts in flight at the same time share one completion
+    single_flight = SingleFlight('openrouter')
+    
     def __init__(self):
         self.api_base = Config.OPENROUTER_API_BASE
         self.api_key = Config.OPENROUTER_API_KEY
@@ -21,6 +28,14 @@ class AIService:
     
     def analyze_token(self, token_symbol: str) -> Optional[str]:
         """Simple token analysis for testing"""
+        return self._call_openrouter_api(self._create_simple_prompt(token_symbol))
+    
+    async def analyze_token_async(self, token_symbol: str) -> Optional[str]:
+        """Simple token analysis for testing (async)"""
+        return await self._call_openrouter_api_async(self._create_simple_prompt(token_symbol))
+    
+    def _create_simple_prompt(self, token_symbol: str) -> str:
+        """Create simple analysis prompt for AI"""
         prompt = f"""
 As a professional cryptocurrency analyst, please provide a brief analysis of {token_symbol.upper()} token:
 
@@ -33,7 +48,7 @@ Please provide:
 Please respond in English, keeping it concise and professional.
 """
         
-        return self._call_openrouter_api(prompt)
+        return prompt
     
     def analyze_token_trends(self, token_data: Dict, timeframes: List[str] = ['1d', '3d', '1w', '1m']) -> Optional[str]:
         """Analyze token trends and provide investment advice"""
@@ -46,6 +61,12 @@ Please respond in English, keeping it concise and professional.
         
         return response
     
+    async def analyze_token_trends_async(self, token_data: Dict,
+                                         timeframes: List[str] = ['1d', '3d', '1w', '1m']) -> Optional[str]:
+        """Analyze token trends and provide investment advice (async)"""
+        prompt = self._create_analysis_prompt(token_data, timeframes)
+        return await self._call_openrouter_api_async(prompt)
+    
     def _create_analysis_prompt(self, token_data: Dict, timeframes: List[str]) -> str:
         """Create analysis prompt for AI"""
         
@@ -120,10 +141,8 @@ Please respond in English, keeping it professional, objective and practical.
         
         return prompt
     
-    def _call_openrouter_api(self, prompt: str) -> Optional[str]:
-        """Call OpenRouter API for analysis"""
-        
-        url = f"{self.api_base}/chat/completions"
+    def _completion_payload(self, prompt: str) -> Dict:
+        """Build chat completion request body"""
         
         data = {
             "model": "openai/gpt-3.5-turbo",
@@ -141,6 +160,14 @@ Please respond in English, keeping it professional, objective and practical.
             "temperature": 0.7
         }
         
+        return data
+    
+    def _call_openrouter_api(self, prompt: str) -> Optional[str]:
+        """Call OpenRouter API for analysis"""
+        
+        url = f"{self.api_base}/chat/completions"
+        data = self._completion_payload(prompt)
+        
         try:
             response = requests.post(url, headers=self.headers, json=data)
             response.raise_for_status()
@@ -152,8 +179,37 @@ Please respond in English, keeping it professional, objective and practical.
             print(f"Error calling OpenRouter API: {e}")
             return None
     
+    async def _call_openrouter_api_async(self, prompt: str) -> Optional[str]:
+        """Call OpenRouter API for analysis (async)"""
+        
+        data = self._completion_payload(prompt)
+        key = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        return await self.single_flight.do(key, lambda: self._post_completion_async(data))
+    
+    async def _post_completion_async(self, data: Dict) -> Optional[str]:
+        """Post a chat completion request to OpenRouter"""
+        
+        url = f"{self.api_base}/chat/completions"
+        
+        try:
+            result = await HTTPClient.post_json(url, data, headers=self.headers,
+                                               timeout=Config.OPENROUTER_TIMEOUT)
+            return result['choices'][0]['message']['content']
+        
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Error calling OpenRouter API: {e}")
+            return None
+    
     def generate_portfolio_analysis(self, portfolio_data: List[Dict]) -> Optional[str]:
         """Generate portfolio analysis"""
+        return self._call_openrouter_api(self._create_portfolio_prompt(portfolio_data))
+    
+    async def generate_portfolio_analysis_async(self, portfolio_data: List[Dict]) -> Optional[str]:
+        """Generate portfolio analysis (async)"""
+        return await self._call_openrouter_api_async(self._create_portfolio_prompt(portfolio_data))
+    
+    def _create_portfolio_prompt(self, portfolio_data: List[Dict]) -> str:
+        """Create portfolio analysis prompt for AI"""
         
         prompt = f"""
 As a professional portfolio analyst, please analyze the following portfolio:
@@ -180,10 +236,18 @@ Please provide:
 Please respond in English, keeping it professional and objective.
 """
         
-        return self._call_openrouter_api(prompt)
+        return prompt
     
     def get_market_sentiment(self, market_data: Dict) -> Optional[str]:
         """Analyze market sentiment"""
+        return self._call_openrouter_api(self._create_sentiment_prompt(market_data))
+    
+    async def get_market_sentiment_async(self, market_data: Dict) -> Optional[str]:
+        """Analyze market sentiment (async)"""
+        return await self._call_openrouter_api_async(self._create_sentiment_prompt(market_data))
+    
+    def _create_sentiment_prompt(self, market_data: Dict) -> str:
+        """Create market sentiment prompt for AI"""
         
         prompt = f"""
 As a market sentiment analyst, please analyze the current cryptocurrency market sentiment:
@@ -205,4 +269,4 @@ Please provide:
 Please respond in English, keeping it professional and objective.
 """
         
-        return self._call_openrouter_api(prompt)
+        return prompt
@@ -1,20 +1,25 @@
 """
 Balance service - Query USDT/USDC balances across EVM networks
 """
+import asyncio
 import requests
+import httpx
 import json
-from typing import Dict, List, Optional, Any
+import time
+from typing import Dict, List, Optional, Any, Tuple
 from decimal import Decimal
+from config import Config
+from services.http_client import HTTPClient
 
 class BalanceService:
     """Service for querying token balances across EVM networks"""
     
-    def __init__(self):
+    def __init__(self, rpc_endpoints: Dict[str, str] = None):
         # Token contract addresses for different networks
         self.token_contracts = {
             'ethereum': {
                 'USDT': '0xdAC17F958D2ee523a2206206994597C13D831ec7',
-                'USDC': '0xA0b86a33E6441b8C4C8C0e4b8b8C8C0e4b8b8C8C0'
+                'USDC': '0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48'
             },
             'arbitrum': {
                 'USDT': '0xFd086bC7CD5C481DCC9C85ebE478A1C0b69FCbb9',
@@ -38,6 +43,16 @@ class BalanceService:
             }
         }
         
+        # ERC-20 decimals per network (Binance-Peg USDT/USDC on BSC use 18, the rest 6)
+        self.token_decimals = {
+            'ethereum': {'USDT': 6, 'USDC': 6},
+            'arbitrum': {'USDT': 6, 'USDC': 6},
+            'polygon': {'USDT': 6, 'USDC': 6},
+            'bsc': {'USDT': 18, 'USDC': 18},
+            'avalanche': {'USDT': 6, 'USDC': 6},
+            'optimism': {'USDT': 6, 'USDC': 6}
+        }
+        
         # RPC endpoints for different networks
         self.rpc_endpoints = {
             'ethereum': 'https://eth.llamarpc.com',
@@ -47,6 +62,25 @@ class BalanceService:
             'avalanche': 'https://api.avax.network/ext/bc/C/rpc',
             'optimism': 'https://mainnet.optimism.io'
         }
+        if rpc_endpoints:
+            self.rpc_endpoints.update(rpc_endpoints)
+        
+        # RPC endpoints that rejected JSON-RPC batch requests (use single calls instead)
+        self.batch_unsupported = set()
+        # Statuses meaning the endpoint refuses batches; 429 and 5xx are transient and retried once
+        self.batch_rejected_statuses = {400, 405, 413}
+        self.batch_retry_delay = 0.5
+        
+        # Multicall3 contract (deployed at the same address on every supported network)
+        self.multicall_address = '0xcA11bde05977b3631167028862bE2a173976CA11'
+    
+    def _token_decimals(self, network: str, token: str) -> int:
+        """Decimals of a token, by symbol or contract address (18 when unknown)"""
+        if token.startswith('0x'):
+            contracts = self.token_contracts.get(network, {})
+            token = next((symbol for symbol, contract in contracts.items()
+                          if contract.lower() == token.lower()), token)
+        return self.token_decimals.get(network, {}).get(token, 18)
     
     def get_token_balance(self, wallet_address: str, token_contract: str, network: str) -> Optional[Decimal]:
         """Get token balance for a specific contract"""
@@ -55,36 +89,59 @@ class BalanceService:
             if not rpc_url:
                 return None
             
-            # ERC-20 balanceOf function call
-            data = {
-                "jsonrpc": "2.0",
-                "method": "eth_call",
-                "params": [
-                    {
-                        "to": token_contract,
-                        "data": f"0x70a08231000000000000000000000000{wallet_address[2:].lower()}"
-                    },
-                    "latest"
-                ],
-                "id": 1
-            }
+            data = self._token_balance_payload(wallet_address, token_contract)
             
             response = requests.post(rpc_url, json=data, timeout=10)
             if response.status_code == 200:
-                result = response.json()
-                if 'result' in result and result['result'] != '0x':
-                    # Convert hex to decimal
-                    balance_hex = result['result']
-                    balance_wei = int(balance_hex, 16)
-                    # Convert from wei to token units (18 decimals for most tokens)
-                    balance = Decimal(balance_wei) / Decimal(10**18)
-                    return balance
+                return self._parse_token_balance(response.json(), self._token_decimals(network, token_contract))
             return None
             
         except Exception as e:
             print(f"Error getting balance for {network}: {e}")
             return None
     
+    async def get_token_balance_async(self, wallet_address: str, token_contract: str,
+                                      network: str) -> Optional[Decimal]:
+        """Get token balance for a specific contract (async)"""
+        try:
+            rpc_url = self.rpc_endpoints.get(network)
+            if not rpc_url:
+                return None
+            
+            data = self._token_balance_payload(wallet_address, token_contract)
+            result = await HTTPClient.post_json(rpc_url, data, timeout=10)
+            return self._parse_token_balance(result, self._token_decimals(network, token_contract))
+        
+        except Exception as e:
+            print(f"Error getting balance for {network}: {e}")
+            return None
+    
+    def _token_balance_payload(self, wallet_address: str, token_contract: str, request_id: int = 1) -> Dict:
+        """Build ERC-20 balanceOf JSON-RPC request"""
+        return {
+            "jsonrpc": "2.0",
+            "method": "eth_call",
+            "params": [
+                {
+                    "to": token_contract,
+                    "data": f"0x70a08231000000000000000000000000{wallet_address[2:].lower()}"
+                },
+                "latest"
+            ],
+            "id": request_id
+        }
+    
+    def _parse_token_balance(self, result: Dict, decimals: int = 18) -> Optional[Decimal]:
+        """Parse ERC-20 balanceOf JSON-RPC response"""
+        if 'result' in result and result['result'] != '0x':
+            # Convert hex to decimal
+            balance_hex = result['result']
+            balance_wei = int(balance_hex, 16)
+            # Convert from base units to token units
+            balance = Decimal(balance_wei) / Decimal(10**decimals)
+            return balance
+        return None
+    
     def get_eth_balance(self, wallet_address: str, network: str) -> Optional[Decimal]:
         """Get native ETH balance"""
         try:
@@ -92,26 +149,49 @@ class BalanceService:
             if not rpc_url:
                 return None
             
-            data = {
-                "jsonrpc": "2.0",
-                "method": "eth_getBalance",
-                "params": [wallet_address, "latest"],
-                "id": 1
-            }
+            data = self._eth_balance_payload(wallet_address)
             
             response = requests.post(rpc_url, json=data, timeout=10)
             if response.status_code == 200:
-                result = response.json()
-                if 'result' in result:
-                    balance_wei = int(result['result'], 16)
-                    balance_eth = Decimal(balance_wei) / Decimal(10**18)
-                    return balance_eth
+                return self._parse_eth_balance(response.json())
             return None
             
         except Exception as e:
             print(f"Error getting ETH balance for {network}: {e}")
             return None
     
+    async def get_eth_balance_async(self, wallet_address: str, network: str) -> Optional[Decimal]:
+        """Get native ETH balance (async)"""
+        try:
+            rpc_url = self.rpc_endpoints.get(network)
+            if not rpc_url:
+                return None
+            
+            data = self._eth_balance_payload(wallet_address)
+            result = await HTTPClient.post_json(rpc_url, data, timeout=10)
+            return self._parse_eth_balance(result)
+        
+        except Exception as e:
+            print(f"Error getting ETH balance for {network}: {e}")
+            return None
+    
+    def _eth_balance_payload(self, wallet_address: str, request_id: int = 1) -> Dict:
+        """Build eth_getBalance JSON-RPC request"""
+        return {
+            "jsonrpc": "2.0",
+            "method": "eth_getBalance",
+            "params": [wallet_address, "latest"],
+            "id": request_id
+        }
+    
+    def _parse_eth_balance(self, result: Dict) -> Optional[Decimal]:
+        """Parse eth_getBalance JSON-RPC response"""
+        if 'result' in result:
+            balance_wei = int(result['result'], 16)
+            balance_eth = Decimal(balance_wei) / Decimal(10**18)
+            return balance_eth
+        return None
+    
     def get_wallet_balances(self, wallet_address: str) -> Dict[str, Dict[str, Any]]:
         """Get all balances for a wallet across all networks"""
         balances = {}
@@ -147,7 +227,325 @@ class BalanceService:
         
         return balances
     
-    def format_balance_message(self, balances: Dict[str, Dict[str, Any]]) -> str:
+    async def get_wallet_balances_async(self, wallet_address: str,
+                                        deadline: float = None) -> Dict[str, Dict[str, Any]]:
+        """Get all balances for a wallet across all networks (async)"""
+        report = await self.get_wallet_balances_report_async(wallet_address, deadline)
+        return report['balances']
+    
+    def _balance_batch_payload(self, wallet_address: str, network: str) -> Tuple[List[Dict], Dict[int, str]]:
+        """Build one JSON-RPC batch with eth_getBalance plus every ERC-20 balanceOf for a network"""
+        batch = [self._eth_balance_payload(wallet_address, request_id=1)]
+        ids = {1: 'ETH'}
+        
+        for token, contract in self.token_contracts.get(network, {}).items():
+            request_id = len(batch) + 1
+            batch.append(self._token_balance_payload(wallet_address, contract, request_id=request_id))
+            ids[request_id] = token
+        
+        return batch, ids
+    
+    def _parse_balance_batch(self, results: List[Dict], ids: Dict[int, str],
+                             network: str) -> Dict[str, Optional[Decimal]]:
+        """Demultiplex a JSON-RPC batch response by id (order is not guaranteed)"""
+        balances = {}
+        for result in results:
+            token = ids.get(result.get('id')) if isinstance(result, dict) else None
+            if token is None:
+                continue
+            try:
+                if token == 'ETH':
+                    balances[token] = self._parse_eth_balance(result)
+                else:
+                    balances[token] = self._parse_token_balance(result, self._token_decimals(network, token))
+            except (TypeError, ValueError):
+                balances[token] = None
+        return balances
+    
+    async def _get_network_balances_single_async(self, wallet_address: str, network: str,
+                                                 tokens: List[str]) -> Dict[str, Optional[Decimal]]:
+        """Query balances with one JSON-RPC call per token, concurrently"""
+        contracts = self.token_contracts.get(network, {})
+        calls = []
+        for token in tokens:
+            if token == 'ETH':
+                calls.append(self.get_eth_balance_async(wallet_address, network))
+            else:
+                calls.append(self.get_token_balance_async(wallet_address, contracts[token], network))
+        
+        results = await asyncio.gather(*calls)
+        return dict(zip(tokens, results))
+    
+    async def get_network_balances_async(self, wallet_address: str, network: str) -> Dict[str, Optional[Decimal]]:
+        """Get ETH and token balances for one network in a single JSON-RPC batch round trip"""
+        rpc_url = self.rpc_endpoints.get(network)
+        if not rpc_url:
+            return {}
+        
+        batch, ids = self._balance_batch_payload(wallet_address, network)
+        tokens = list(ids.values())
+        
+        if rpc_url in self.batch_unsupported:
+            return await self._get_network_balances_single_async(wallet_address, network, tokens)
+        
+        for attempt in range(2):
+            try:
+                results = await HTTPClient.post_json(rpc_url, batch, timeout=10)
+                break
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                if status in self.batch_rejected_statuses:
+                    # Endpoint refuses batches; remember and fall back
+                    print(f"Batch request rejected by {network}, using single calls: {e}")
+                    self.batch_unsupported.add(rpc_url)
+                    return await self._get_network_balances_single_async(wallet_address, network, tokens)
+                if attempt == 0 and (status == 429 or status >= 500):
+                    # Rate limited or overloaded: one more batch, not a burst of single calls
+                    await asyncio.sleep(self.batch_retry_delay)
+                    continue
+                print(f"Error getting balances for {network}: {e}")
+                return {token: None for token in tokens}
+            except Exception as e:
+                print(f"Error getting balances for {network}: {e}")
+                return {token: None for token in tokens}
+        
+        if not isinstance(results, list):
+            # A single error object instead of an array means batches are not supported
+            print(f"Batch request rejected by {network}, using single calls: {results}")
+            self.batch_unsupported.add(rpc_url)
+            return await self._get_network_balances_single_async(wallet_address, network, tokens)
+        
+        balances = self._parse_balance_batch(results, ids, network)
+        
+        # Some providers drop entries from oversized batches; retry those individually
+        missing = [token for token in tokens if token not in balances]
+        if missing:
+            balances.update(await self._get_network_balances_single_async(wallet_address, network, missing))
+        
+        return balances
+    
+    async def get_wallet_balances_report_async(self, wallet_address: str,
+                                               deadline: float = None) -> Dict[str, Any]:
+        """Query all networks concurrently, returning partial results and per-network latency"""
+        if deadline is None:
+            deadline = Config.BALANCE_QUERY_DEADLINE
+        
+        started = time.monotonic()
+        finished_at = {}
+        
+        async def timed(network):
+            result = await self.get_network_balances_async(wallet_address, network)
+            finished_at[network] = time.monotonic() - started
+            return result
+        
+        tasks = {
+            network: asyncio.ensure_future(timed(network))
+            for network in self.token_contracts
+        }
+        
+        _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+        
+        balances = {}
+        timed_out = []
+        for network, task in tasks.items():
+            network_balances = {
+                'ETH': None,
+                'USDT': None,
+                'USDC': None
+            }
+            
+            if task in pending:
+                timed_out.append(network)
+            else:
+                for token, balance in task.result().items():
+                    if balance is not None:
+                        network_balances[token] = float(balance)
+            
+            balances[network] = network_balances
+        
+        # latency: seconds until a network's query finished (None if it timed out)
+        return {
+            'balances': balances,
+            'latency': {network: finished_at.get(network) for network in tasks},
+            'timed_out': timed_out
+        }
+    
+    def _encode_word(self, value: int) -> bytes:
+        """ABI-encode an unsigned integer as one 32-byte word"""
+        return value.to_bytes(32, 'big')
+    
+    def _encode_address(self, address: str) -> bytes:
+        """ABI-encode an address as one left-padded 32-byte word"""
+        address_bytes = bytes.fromhex(address[2:] if address.startswith('0x') else address)
+        if len(address_bytes) != 20:
+            raise ValueError(f"Invalid address: {address}")
+        return bytes(12) + address_bytes
+    
+    def _encode_aggregate3(self, calls: List[Tuple[str, bytes]]) -> str:
+        """ABI-encode Multicall3 aggregate3((address,bool,bytes)[]) with allowFailure set on every call"""
+        encoded_calls = []
+        for target, call_data in calls:
+            padding = bytes(-len(call_data) % 32)
+            encoded_calls.append(
+                self._encode_address(target)
+                + self._encode_word(1)
+                + self._encode_word(3 * 32)  # callData offset, relative to the tuple
+                + self._encode_word(len(call_data))
+                + call_data + padding
+            )
+        
+        # Offsets of each dynamic tuple, relative to the first offset word
+        offsets = []
+        position = 32 * len(encoded_calls)
+        for encoded_call in encoded_calls:
+            offsets.append(self._encode_word(position))
+            position += len(encoded_call)
+        
+        body = (
+            self._encode_word(32)
+            + self._encode_word(len(encoded_calls))
+            + b''.join(offsets)
+            + b''.join(encoded_calls)
+        )
+        return '0x82ad56cb' + body.hex()
+    
+    def _decode_aggregate3(self, result_hex: str) -> List[Tuple[bool, bytes]]:
+        """Decode the (bool success, bytes returnData)[] returned by aggregate3"""
+        data = bytes.fromhex(result_hex[2:] if result_hex.startswith('0x') else result_hex)
+        
+        def word(position: int) -> int:
+            if position < 0 or position + 32 > len(data):
+                raise ValueError("Malformed aggregate3 response")
+            return int.from_bytes(data[position:position + 32], 'big')
+        
+        array_start = word(0)
+        count = word(array_start)
+        heads_start = array_start + 32
+        
+        results = []
+        for i in range(count):
+            tuple_start = heads_start + word(heads_start + 32 * i)
+            success = word(tuple_start) != 0
+            bytes_start = tuple_start + word(tuple_start + 32)
+            length = word(bytes_start)
+            if bytes_start + 32 + length > len(data):
+                raise ValueError("Malformed aggregate3 response")
+            results.append((success, data[bytes_start + 32:bytes_start + 32 + length]))
+        
+        return results
+    
+    def _multicall_plan(self, addresses: List[str], network: str) -> List[Tuple[str, str, str, bytes]]:
+        """List (wallet, token, target, callData) for every balance of every wallet on a network"""
+        plan = []
+        for address in addresses:
+            owner = self._encode_address(address)
+            # Native balance is read through Multicall3's own getEthBalance(address)
+            plan.append((address, 'ETH', self.multicall_address, bytes.fromhex('4d2301cc') + owner))
+            for token, contract in self.token_contracts.get(network, {}).items():
+                plan.append((address, token, contract, bytes.fromhex('70a08231') + owner))
+        return plan
+    
+    def _multicall_chunks(self, addresses: List[str], network: str) -> List[Tuple[List[Tuple], Dict]]:
+        """Split a network's plan into eth_call payloads of at most MULTICALL_MAX_CALLS calls"""
+        plan = self._multicall_plan(addresses, network)
+        chunk_size = Config.MULTICALL_MAX_CALLS
+        
+        chunks = []
+        for start in range(0, len(plan), chunk_size):
+            chunk = plan[start:start + chunk_size]
+            payload = {
+                "jsonrpc": "2.0",
+                "method": "eth_call",
+                "params": [
+                    {
+                        "to": self.multicall_address,
+                        "data": self._encode_aggregate3([(target, call_data) for _, _, target, call_data in chunk])
+                    },
+                    "latest"
+                ],
+                "id": 1
+            }
+            chunks.append((chunk, payload))
+        return chunks
+    
+    def _apply_multicall_result(self, balances: Dict, network: str, chunk: List[Tuple], result: Dict):
+        """Write decoded aggregate3 results for one chunk into the bulk balances dict"""
+        if 'result' not in result:
+            print(f"Multicall error on {network}: {result.get('error')}")
+            return
+        
+        decoded = self._decode_aggregate3(result['result'])
+        for (address, token, _, _), (success, return_data) in zip(chunk, decoded):
+            if success and len(return_data) >= 32:
+                balance_wei = int.from_bytes(return_data[:32], 'big')
+                decimals = 18 if token == 'ETH' else self._token_decimals(network, token)
+                balances[address][network][token] = float(Decimal(balance_wei) / Decimal(10**decimals))
+    
+    def _empty_bulk_balances(self, addresses: List[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Build {address: {network: {token: None}}} for the bulk balance APIs"""
+        return {
+            address: {
+                network: {'ETH': None, 'USDT': None, 'USDC': None}
+                for network in self.token_contracts
+            }
+            for address in addresses
+        }
+    
+    def _valid_addresses(self, addresses: List[str]) -> List[str]:
+        """Drop addresses that cannot be ABI-encoded"""
+        valid = []
+        for address in addresses:
+            try:
+                self._encode_address(address)
+                valid.append(address)
+            except ValueError:
+                print(f"Skipping invalid wallet address: {address}")
+        return valid
+    
+    def get_balances_for_wallets(self, addresses: List[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Get ETH/USDT/USDC balances for many wallets with one Multicall3 eth_call per network"""
+        addresses = self._valid_addresses(addresses)
+        balances = self._empty_bulk_balances(addresses)
+        
+        for network, rpc_url in self.rpc_endpoints.items():
+            if network not in self.token_contracts:
+                continue
+            for chunk, payload in self._multicall_chunks(addresses, network):
+                try:
+                    response = requests.post(rpc_url, json=payload, timeout=30)
+                    response.raise_for_status()
+                    self._apply_multicall_result(balances, network, chunk, response.json())
+                except Exception as e:
+                    print(f"Error getting multicall balances for {network}: {e}")
+        
+        return balances
+    
+    async def get_balances_for_wallets_async(self, addresses: List[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Get ETH/USDT/USDC balances for many wallets, one Multicall3 eth_call per network (async)"""
+        addresses = self._valid_addresses(addresses)
+        balances = self._empty_bulk_balances(addresses)
+        
+        async def query(network: str, rpc_url: str, chunk: List[Tuple], payload: Dict):
+            try:
+                result = await HTTPClient.post_json(rpc_url, payload, timeout=30)
+                self._apply_multicall_result(balances, network, chunk, result)
+            except Exception as e:
+                print(f"Error getting multicall balances for {network}: {e}")
+        
+        queries = []
+        for network, rpc_url in self.rpc_endpoints.items():
+            if network not in self.token_contracts:
+                continue
+            for chunk, payload in self._multicall_chunks(addresses, network):
+                queries.append(query(network, rpc_url, chunk, payload))
+        
+        await asyncio.gather(*queries)
+        return balances
+    
+    def format_balance_message(self, balances: Dict[str, Dict[str, Any]],
+                               timed_out: List[str] = None) -> str:
         """Format balance data into a readable message"""
         if not balances:
             return "💰 **Balance Query**\n\n❌ No balances found or unable to query balances"
@@ -167,7 +565,9 @@ class BalanceService:
                     else:
                         message += f"  • {token}: {balance:.2f}\n"
             
-            if not has_balance:
+            if timed_out and network in timed_out:
+                message += f"  • ⏱ Network timed out, some balances unavailable\n"
+            elif not has_balance:
                 message += f"  • No balances found\n"
             
             message += "\n"
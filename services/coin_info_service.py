@@ -2,12 +2,20 @@
 Coin info service - Token info service
 """
 import requests
+import httpx
 from typing import Dict, List, Optional, Any
 from config import Config
+from services.http_client import HTTPClient
+from services.single_flight import SingleFlight
+from services.coin_registry import CoinRegistry
 
 class CoinInfoService:
     """Token info service"""
     
+    # Shared by every SideShift service instance
+    single_flight = SingleFlight('sideshift_coins')
+    registry = CoinRegistry()
+    
     def __init__(self):
         self.api_base = Config.SIDESHIFT_API_BASE
         self.secret = Config.SIDESHIFT_SECRET
@@ -33,6 +41,12 @@ class CoinInfoService:
             print(f"Error getting supported coins: {e}")
             return None
     
+    async def get_supported_coins_async(self) -> Optional[Dict]:
+        """Get list of supported coins (async, served from the shared registry)"""
+        if not await self.registry.ensure_fresh():
+            return None
+        return {"coins": self.registry.coins}
+    
     def get_coin_info(self, coin: str) -> Optional[Dict]:
         """Get information about a specific coin"""
         url = f"{self.api_base}/coins/{coin}"
@@ -45,9 +59,33 @@ class CoinInfoService:
             print(f"Error getting coin info: {e}")
             return None
     
+    async def get_coin_info_async(self, coin: str) -> Optional[Dict]:
+        """Get information about a specific coin (async)"""
+        return await self.single_flight.do(f"coins/{coin.lower()}", lambda: self._fetch_coin_info_async(coin))
+    
+    async def _fetch_coin_info_async(self, coin: str) -> Optional[Dict]:
+        """Fetch information about a specific coin from SideShift"""
+        url = f"{self.api_base}/coins/{coin}"
+        
+        try:
+            return await HTTPClient.get_json(url)
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Error getting coin info: {e}")
+            return None
+    
     def get_coin_networks(self, coin: str) -> Optional[List[str]]:
         """Get supported networks for a coin"""
         coin_info = self.get_coin_info(coin)
         if coin_info and 'networks' in coin_info:
             return list(coin_info['networks'].keys())
         return None
+    
+    async def get_coin_networks_async(self, coin: str) -> Optional[List[str]]:
+        """Get supported networks for a coin (async)"""
+        if await self.registry.ensure_fresh():
+            return self.registry.get_networks(coin)
+        
+        coin_info = await self.get_coin_info_async(coin)
+        if coin_info and 'networks' in coin_info:
+            return list(coin_info['networks'].keys())
+        return None
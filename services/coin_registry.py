@@ -0,0 +1,159 @@
+"""
+Coin registry - Cached, indexed SideShift supported-coin list
+"""
+import asyncio
+import time
+import httpx
+from typing import Dict, List, Optional, Any, Set, Tuple
+from config import Config
+from services.http_client import HTTPClient
+from services.single_flight import SingleFlight
+
+class CoinRegistry:
+    """SideShift /coins list kept in memory with O(1) lookups, revalidated with ETag/Last-Modified
+
+    Indexes are rebuilt as a whole on every change and swapped in at once, so readers never
+    see a partially built registry.
+    """
+    
+    def __init__(self, refresh_interval: float = None):
+        self.url = f"{Config.SIDESHIFT_API_BASE}/coins"
+        self.refresh_interval = (refresh_interval if refresh_interval is not None
+                                 else Config.SIDESHIFT_COINS_REFRESH_INTERVAL)
+        self.coins: List[Dict[str, Any]] = []
+        self.by_symbol: Dict[str, Dict[str, Any]] = {}
+        self.by_coin_network: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.by_network: Dict[str, Set[str]] = {}
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.checked_at: Optional[float] = None  # monotonic time of the last successful check
+        self._single_flight = SingleFlight('sideshift_coin_registry')
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.not_modified = 0
+    
+    @property
+    def loaded(self) -> bool:
+        """Whether a coin list has been loaded"""
+        return bool(self.by_symbol)
+    
+    def age(self) -> Optional[float]:
+        """Seconds since the list was last confirmed fresh"""
+        return time.monotonic() - self.checked_at if self.checked_at is not None else None
+    
+    @staticmethod
+    def _networks(coin: Dict[str, Any]) -> List[str]:
+        """Networks of a coin record (list in /coins, dict keyed by network in some responses)"""
+        networks = coin.get('networks') or []
+        return [network.lower() for network in networks]
+    
+    def _build(self, coins: List[Dict[str, Any]]):
+        """Rebuild every index from a /coins response"""
+        by_symbol = {}
+        by_coin_network = {}
+        by_network = {}
+        for coin in coins:
+            symbol = coin.get('coin', '').lower()
+            if not symbol:
+                continue
+            by_symbol[symbol] = coin
+            token_details = coin.get('tokenDetails') or {}
+            for network in self._networks(coin):
+                by_coin_network[(symbol, network)] = {
+                    'coin': symbol,
+                    'network': network,
+                    'name': coin.get('name'),
+                    'token_details': token_details.get(network)
+                }
+                by_network.setdefault(network, set()).add(symbol)
+        
+        self.coins, self.by_symbol, self.by_coin_network, self.by_network = (
+            coins, by_symbol, by_coin_network, by_network
+        )
+    
+    async def refresh(self) -> bool:
+        """Revalidate the coin list with SideShift; returns False if it could not be checked"""
+        return await self._single_flight.do('coins', self._refresh)
+    
+    async def _refresh(self) -> bool:
+        """Fetch /coins unless the server says our copy is current"""
+        try:
+            data, etag, last_modified = await HTTPClient.get_json_conditional(
+                self.url, etag=self.etag, last_modified=self.last_modified
+            )
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Error refreshing supported coins: {e}")
+            return False
+        
+        if data is None:
+            self.not_modified += 1
+        else:
+            # Handle both list and dict responses
+            self._build(data if isinstance(data, list) else data.get('coins', []))
+            self.etag, self.last_modified = etag, last_modified
+            self.refreshes += 1
+        self.checked_at = time.monotonic()
+        return True
+    
+    async def ensure_fresh(self) -> bool:
+        """Refresh if the list is missing or older than the refresh interval; returns whether it is loaded"""
+        age = self.age()
+        if age is None or age >= self.refresh_interval:
+            await self.refresh()
+        return self.loaded
+    
+    async def _run(self):
+        """Revalidate on the refresh interval until stopped"""
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+    
+    def start(self):
+        """Start periodic revalidation on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+    
+    async def stop(self):
+        """Stop periodic revalidation"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def is_supported(self, symbol: str) -> bool:
+        """Check whether SideShift supports a coin symbol"""
+        return symbol.lower() in self.by_symbol
+    
+    def supports(self, symbol: str, network: str) -> bool:
+        """Check whether SideShift supports a coin on a network"""
+        return (symbol.lower(), network.lower()) in self.by_coin_network
+    
+    def get_coin(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get the SideShift record for a coin symbol"""
+        return self.by_symbol.get(symbol.lower())
+    
+    def get_coin_network(self, symbol: str, network: str) -> Optional[Dict[str, Any]]:
+        """Get a coin's details on one network (name, token contract and decimals)"""
+        return self.by_coin_network.get((symbol.lower(), network.lower()))
+    
+    def get_networks(self, symbol: str) -> Optional[List[str]]:
+        """Get the networks a coin is supported on"""
+        coin = self.get_coin(symbol)
+        return self._networks(coin) if coin else None
+    
+    def get_coins_on_network(self, network: str) -> Set[str]:
+        """Get the coin symbols supported on a network"""
+        return self.by_network.get(network.lower(), set())
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get registry counters"""
+        return {
+            'coins': len(self.by_symbol),
+            'networks': len(self.by_network),
+            'age': self.age(),
+            'refreshes': self.refreshes,
+            'not_modified': self.not_modified
+        }
@@ -1,14 +1,14 @@
 """
 Coin service - Token data service
 """
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from services.price_service import PriceService
 
 class CoinService(PriceService):
     """Token data service"""
     
-    def get_coin_price(self, coin_id: str, vs_currencies: str = 'usd') -> Optional[Dict]:
-        """Get current price of a coin"""
+    def _coin_price_request(self, coin_id: str, vs_currencies: str) -> Tuple[str, Dict]:
+        """Build URL and params for the simple price endpoint"""
         url = f"{self.api_base}/simple/price"
         params = {
             'ids': coin_id,
@@ -17,28 +17,34 @@ class CoinService(PriceService):
             'include_24hr_vol': True,
             'include_market_cap': True
         }
-        return self._make_request(url, params)
+        return url, params
     
-    def get_coin_market_chart(self, coin_id: str, vs_currency: str = 'usd', 
-                            days: int = 1) -> Optional[Dict]:
-        """Get market chart data for a coin"""
+    def _market_chart_request(self, coin_id: str, vs_currency: str, days: int,
+                              auto_interval: bool = False) -> Tuple[str, Dict]:
+        """Build URL and params for the market chart endpoint"""
         url = f"{self.api_base}/coins/{coin_id}/market_chart"
         params = {
             'vs_currency': vs_currency,
-            'days': days,
-            'interval': 'hourly' if days <= 1 else 'daily'
+            'days': days
         }
-        return self._make_request(url, params)
+        # Without an interval CoinGecko picks the granularity (hourly for 2-90 days)
+        if not auto_interval:
+            params['interval'] = 'hourly' if days <= 1 else 'daily'
+        return url, params
     
-    def search_coins(self, query: str) -> Optional[List[Dict]]:
-        """Search for coins by name or symbol"""
-        url = f"{self.api_base}/search"
-        params = {'query': query}
-        data = self._make_request(url, params)
-        return data.get('coins', []) if data else None
+    def _market_chart_range_request(self, coin_id: str, vs_currency: str, start: float,
+                                    end: float) -> Tuple[str, Dict]:
+        """Build URL and params for the market chart range endpoint (unix seconds)"""
+        url = f"{self.api_base}/coins/{coin_id}/market_chart/range"
+        params = {
+            'vs_currency': vs_currency,
+            'from': int(start),
+            'to': int(end)
+        }
+        return url, params
     
-    def get_coin_info(self, coin_id: str) -> Optional[Dict]:
-        """Get detailed information about a coin"""
+    def _coin_info_request(self, coin_id: str) -> Tuple[str, Dict]:
+        """Build URL and params for the coin detail endpoint"""
         url = f"{self.api_base}/coins/{coin_id}"
         params = {
             'localization': False,
@@ -48,4 +54,56 @@ class CoinService(PriceService):
             'developer_data': False,
             'sparkline': False
         }
-        return self._make_request(url, params)
+        return url, params
+    
+    def get_coin_price(self, coin_id: str, vs_currencies: str = 'usd') -> Optional[Dict]:
+        """Get current price of a coin"""
+        return self._make_request(*self._coin_price_request(coin_id, vs_currencies))
+    
+    async def get_coin_price_async(self, coin_id: str, vs_currencies: str = 'usd') -> Optional[Dict]:
+        """Get current price of a coin (async)"""
+        return await self._make_request_async(*self._coin_price_request(coin_id, vs_currencies))
+    
+    def get_coin_market_chart(self, coin_id: str, vs_currency: str = 'usd', 
+                            days: int = 1, auto_interval: bool = False) -> Optional[Dict]:
+        """Get market chart data for a coin"""
+        return self._make_request(*self._market_chart_request(coin_id, vs_currency, days, auto_interval))
+    
+    async def get_coin_market_chart_async(self, coin_id: str, vs_currency: str = 'usd',
+                                          days: int = 1, auto_interval: bool = False) -> Optional[Dict]:
+        """Get market chart data for a coin (async)"""
+        return await self._make_request_async(*self._market_chart_request(coin_id, vs_currency, days,
+                                                                          auto_interval))
+    
+    def get_coin_market_chart_range(self, coin_id: str, start: float, end: float,
+                                    vs_currency: str = 'usd') -> Optional[Dict]:
+        """Get market chart data for a coin between two unix timestamps (seconds)"""
+        return self._make_request(*self._market_chart_range_request(coin_id, vs_currency, start, end))
+    
+    async def get_coin_market_chart_range_async(self, coin_id: str, start: float, end: float,
+                                                vs_currency: str = 'usd') -> Optional[Dict]:
+        """Get market chart data for a coin between two unix timestamps (seconds) (async)"""
+        return await self._make_request_async(*self._market_chart_range_request(coin_id, vs_currency,
+                                                                                start, end))
+    
+    def search_coins(self, query: str) -> Optional[List[Dict]]:
+        """Search for coins by name or symbol"""
+        url = f"{self.api_base}/search"
+        params = {'query': query}
+        data = self._make_request(url, params)
+        return data.get('coins', []) if data else None
+    
+    async def search_coins_async(self, query: str) -> Optional[List[Dict]]:
+        """Search for coins by name or symbol (async)"""
+        url = f"{self.api_base}/search"
+        params = {'query': query}
+        data = await self._make_request_async(url, params)
+        return data.get('coins', []) if data else None
+    
+    def get_coin_info(self, coin_id: str) -> Optional[Dict]:
+        """Get detailed information about a coin"""
+        return self._make_request(*self._coin_info_request(coin_id))
+    
+    async def get_coin_info_async(self, coin_id: str) -> Optional[Dict]:
+        """Get detailed information about a coin (async)"""
+        return await self._make_request_async(*self._coin_info_request(coin_id))
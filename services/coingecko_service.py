@@ -15,3 +15,8 @@ class CoinGeckoService(MarketService, CoinService):
         """Get list of supported vs currencies"""
         url = f"{self.api_base}/simple/supported_vs_currencies"
         return self._make_request(url)
+    
+    async def get_supported_vs_currencies_async(self) -> Optional[List[str]]:
+        """Get list of supported vs currencies (async)"""
+        url = f"{self.api_base}/simple/supported_vs_currencies"
+        return await self._make_request_async(url)
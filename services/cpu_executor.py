@@ -0,0 +1,81 @@
+"""
+CPU executor - Routes CPU-bound work off the event loop to shared thread and process pools
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from config import Config
+
+class CPUExecutor:
+    """Process-wide executors for CPU-bound tasks, chosen per task name
+
+    CPU_TASK_ROUTES maps a task name to an executor: 'process' for pure-Python work that
+    holds the GIL, 'thread' for work that releases it (C extensions such as OpenSSL or NumPy)
+    or whose arguments should not leave the process, 'inline' to run on the event loop. More
+    executors can be registered under new names. Functions routed to 'process' and their
+    arguments must be picklable. Calls whose size is below the task's CPU_TASK_MIN_SIZE run
+    inline, since the hand-off would cost more than the work.
+    """
+    
+    _executors: Dict[str, Executor] = {}
+    _factories: Dict[str, Callable[[], Executor]] = {
+        'thread': lambda: ThreadPoolExecutor(max_workers=Config.CPU_THREAD_WORKERS, thread_name_prefix='cpu'),
+        # spawn: forking a process that already runs database and HTTP threads is unsafe
+        'process': lambda: ProcessPoolExecutor(max_workers=Config.CPU_PROCESS_WORKERS,
+                                               mp_context=multiprocessing.get_context('spawn'))
+    }
+    _stats: Dict[str, Dict[str, float]] = {}
+    
+    @classmethod
+    def register(cls, name: str, factory: Callable[[], Executor]):
+        """Make an executor available to routes under a name (created on first use)"""
+        cls._factories[name] = factory
+    
+    @classmethod
+    def get_executor(cls, name: str) -> Optional[Executor]:
+        """Get a named executor, creating it lazily; None for 'inline' or an unknown name"""
+        if name not in cls._executors:
+            factory = cls._factories.get(name)
+            if factory is None:
+                return None
+            cls._executors[name] = factory()
+        return cls._executors[name]
+    
+    @classmethod
+    def route(cls, task: str, size: int = None) -> str:
+        """Executor name a task runs on, given the size of its input if known"""
+        if size is not None and size < Config.CPU_TASK_MIN_SIZE.get(task, 0):
+            return 'inline'
+        return Config.CPU_TASK_ROUTES.get(task, Config.CPU_TASK_ROUTES.get('default', 'thread'))
+    
+    @classmethod
+    async def run(cls, task: str, fn: Callable, *args, size: int = None) -> Any:
+        """Run fn(*args) on the executor routed for task (and input size) and await its result"""
+        executor_name = cls.route(task, size)
+        executor = cls.get_executor(executor_name)
+        start = time.perf_counter()
+        try:
+            if executor is None:
+                return fn(*args)
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            stats = cls._stats.setdefault(task, {'executor': executor_name, 'calls': 0, 'seconds': 0.0, 'max': 0.0})
+            elapsed = time.perf_counter() - start
+            stats['executor'] = executor_name
+            stats['calls'] += 1
+            stats['seconds'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+    
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, float]]:
+        """Get per-task counters (calls, total and max seconds from submit to result)"""
+        return {task: dict(stats) for task, stats in cls._stats.items()}
+    
+    @classmethod
+    def shutdown(cls):
+        """Shut down every executor, waiting for running tasks"""
+        executors, cls._executors = cls._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,81 @@
+"""
+HTTP client - Shared async HTTP transport for all services
+"""
+import httpx
+from typing import Dict, Optional, Any, Tuple
+from config import Config
+
+class HTTPClient:
+    """Process-wide pooled, keep-alive async HTTP client"""
+    
+    _client: Optional[httpx.AsyncClient] = None
+    
+    @classmethod
+    def get_client(cls) -> httpx.AsyncClient:
+        """Get the shared client, creating it lazily inside the running event loop"""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                timeout=Config.HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=Config.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
+        return cls._client
+    
+    @staticmethod
+    def _clean_headers(headers: Optional[Dict]) -> Optional[Dict]:
+        """Drop unset header values (requests silently skipped them, httpx rejects them)"""
+        if headers is None:
+            return None
+        return {key: value for key, value in headers.items() if value is not None}
+    
+    @classmethod
+    async def close(cls):
+        """Close the shared client and release pooled connections"""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+    
+    @classmethod
+    async def get_json(cls, url: str, headers: Dict = None, params: Dict = None,
+                       timeout: float = None) -> Any:
+        """GET a URL and return the decoded JSON body"""
+        kwargs = {'headers': cls._clean_headers(headers), 'params': params}
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        
+        response = await cls.get_client().get(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+    
+    @classmethod
+    async def get_json_conditional(cls, url: str, etag: str = None, last_modified: str = None,
+                                   headers: Dict = None) -> Tuple[Optional[Any], Optional[str], Optional[str]]:
+        """GET a URL with ETag/If-Modified-Since revalidation
+        
+        Returns (data, etag, last_modified); data is None when the server answers 304 Not Modified.
+        """
+        headers = dict(cls._clean_headers(headers) or {})
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        
+        response = await cls.get_client().get(url, headers=headers)
+        if response.status_code == 304:
+            return None, etag, last_modified
+        response.raise_for_status()
+        return response.json(), response.headers.get('ETag'), response.headers.get('Last-Modified')
+    
+    @classmethod
+    async def post_json(cls, url: str, data: Any = None, headers: Dict = None,
+                        timeout: float = None) -> Any:
+        """POST a JSON payload and return the decoded JSON body"""
+        kwargs = {'headers': cls._clean_headers(headers), 'json': data}
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        
+        response = await cls.get_client().post(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
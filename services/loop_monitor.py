@@ -0,0 +1,66 @@
+"""
+Loop monitor - Measures how long the event loop is blocked
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Any
+from config import Config
+
+class LoopMonitor:
+    """Wake up every `interval` seconds and record how late each wake-up was
+
+    Lateness beyond `threshold` is time the loop spent running something else without
+    yielding, i.e. blocking every other handler. Stalls longer than warn_after are printed.
+    """
+    
+    def __init__(self, interval: float = None, threshold: float = 0.002, warn_after: float = None):
+        self.interval = interval if interval is not None else Config.LOOP_MONITOR_INTERVAL
+        self.threshold = threshold
+        self.warn_after = warn_after if warn_after is not None else Config.LOOP_MONITOR_WARN_AFTER
+        self._task: Optional[asyncio.Task] = None
+        self.reset()
+    
+    def reset(self):
+        """Zero the counters"""
+        self.samples = 0
+        self.stalls = 0
+        self.blocked = 0.0
+        self.max_lag = 0.0
+    
+    async def _run(self):
+        """Sample scheduling lag until stopped"""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - start - self.interval
+            self.samples += 1
+            if lag > self.threshold:
+                self.stalls += 1
+                self.blocked += lag
+                self.max_lag = max(self.max_lag, lag)
+                if self.warn_after and lag > self.warn_after:
+                    print(f"Event loop blocked for {lag * 1000:.0f} ms")
+    
+    def start(self):
+        """Start sampling on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+    
+    async def stop(self):
+        """Stop sampling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get monitor counters (seconds)"""
+        return {
+            'samples': self.samples,
+            'stalls': self.stalls,
+            'blocked': self.blocked,
+            'max_lag': self.max_lag
+        }
@@ -1,7 +1,10 @@
 """
 Market service - Market data service
 """
-from typing import Dict, List, Optional, Any
+import asyncio
+import inspect
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Tuple, Union
+from config import Config
 from services.price_service import PriceService
 
 class MarketService(PriceService):
@@ -13,20 +16,101 @@ class MarketService(PriceService):
         data = self._make_request(url)
         return data.get('coins', []) if data else None
     
-    def get_top_gainers(self, vs_currency: str = 'usd', days: int = 1) -> Optional[List[Dict]]:
-        """Get top gaining coins"""
+    async def get_trending_coins_async(self) -> Optional[List[Dict]]:
+        """Get trending coins (async)"""
+        url = f"{self.api_base}/search/trending"
+        data = await self._make_request_async(url)
+        return data.get('coins', []) if data else None
+    
+    def _top_gainers_request(self, vs_currency: str, days: int, page: int = 1,
+                             per_page: int = 50) -> Tuple[str, Dict]:
+        """Build URL and params for the top gainers endpoint"""
         url = f"{self.api_base}/coins/markets"
         params = {
             'vs_currency': vs_currency,
             'order': 'price_change_percentage_24h_desc',
-            'per_page': 50,
-            'page': 1,
+            'per_page': per_page,
+            'page': page,
             'sparkline': False,
             'price_change_percentage': f'{days}d'
         }
-        return self._make_request(url, params)
+        return url, params
+    
+    def get_top_gainers(self, vs_currency: str = 'usd', days: int = 1) -> Optional[List[Dict]]:
+        """Get top gaining coins"""
+        return self._make_request(*self._top_gainers_request(vs_currency, days))
+    
+    async def get_top_gainers_async(self, vs_currency: str = 'usd', days: int = 1) -> Optional[List[Dict]]:
+        """Get top gaining coins (async)"""
+        return await self._make_request_async(*self._top_gainers_request(vs_currency, days))
+    
+    async def scan_top_gainers_async(self, is_match: Callable[[Dict], bool], wanted: int = 10,
+                                     vs_currency: str = 'usd', days: int = 1,
+                                     on_matches: Callable[[List[Dict]], Union[None, Awaitable[None]]] = None
+                                     ) -> Optional[List[Dict]]:
+        """Scan top gainer pages concurrently until `wanted` coins match
+        
+        Pages are fetched MARKET_SCAN_CONCURRENCY at a time (each through the CoinGecko rate
+        budget) but consumed in page order, so the matches found so far are always the best ones.
+        on_matches, if given, receives the sorted matches after every page that adds some.
+        Returns matches sorted by 24h change, or None if the first page could not be fetched.
+        """
+        per_page = Config.MARKET_SCAN_PER_PAGE
+        max_pages = Config.MARKET_SCAN_MAX_PAGES
+        concurrency = max(Config.MARKET_SCAN_CONCURRENCY, 1)
+        
+        def by_change(coin: Dict) -> float:
+            return coin.get('price_change_percentage_24h') or 0
+        
+        matches = []
+        arrived = {}  # page -> coins, waiting for earlier pages
+        in_flight = {}  # task -> page
+        next_page = 1
+        next_to_consume = 1
+        finished = False
+        
+        try:
+            while not finished:
+                while len(in_flight) < concurrency and next_page <= max_pages:
+                    request = self._top_gainers_request(vs_currency, days, next_page, per_page)
+                    in_flight[asyncio.ensure_future(self._make_request_async(*request))] = next_page
+                    next_page += 1
+                if not in_flight:
+                    break
+                
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    arrived[in_flight.pop(task)] = task.result()
+                
+                while next_to_consume in arrived and not finished:
+                    coins = arrived.pop(next_to_consume)
+                    if coins is None and next_to_consume == 1:
+                        return None
+                    next_to_consume += 1
+                    
+                    page_matches = [coin for coin in coins or [] if is_match(coin)]
+                    if page_matches:
+                        matches.extend(page_matches)
+                        matches.sort(key=by_change, reverse=True)
+                        if on_matches:
+                            result = on_matches(list(matches))
+                            if inspect.isawaitable(result):
+                                await result
+                    
+                    # Enough matches, a failed page, or the last page of the market
+                    finished = len(matches) >= wanted or not coins or len(coins) < per_page
+        finally:
+            for task in in_flight:
+                task.cancel()
+        
+        return matches
     
     def get_market_cap_global(self) -> Optional[Dict]:
         """Get global market cap data"""
         url = f"{self.api_base}/global"
         return self._make_request(url)
+    
+    async def get_market_cap_global_async(self) -> Optional[Dict]:
+        """Get global market cap data (async)"""
+        url = f"{self.api_base}/global"
+        return await self._make_request_async(url)
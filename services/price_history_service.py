@@ -0,0 +1,56 @@
+"""
+Price history service - Incrementally refreshed local price history
+"""
+import time
+from typing import Optional
+from config import Config
+from database.price_history import PriceHistoryStore, HOUR_MS
+from services.coingecko_service import CoinGeckoService
+from services.price_series import PriceSeries
+
+DAY_MS = 86400 * 1000
+
+class PriceHistoryService:
+    """Serve price series from the local store, fetching only the missing tail from CoinGecko"""
+    
+    def __init__(self, coingecko: CoinGeckoService = None, store: PriceHistoryStore = None):
+        self.coingecko = coingecko or CoinGeckoService()
+        self.store = store or PriceHistoryStore(Config.DATABASE_PATH)
+        self.refresh_interval = Config.PRICE_HISTORY_REFRESH_INTERVAL
+        self.retention_days = Config.PRICE_HISTORY_RETENTION_DAYS
+    
+    async def refresh_async(self, coin_id: str, days: int = 30) -> bool:
+        """Bring the stored history up to date; returns False if CoinGecko could not be reached"""
+        now = int(time.time() * 1000)
+        last_timestamp = await self.store.get_last_timestamp_async(coin_id)
+        
+        if last_timestamp is not None and now - last_timestamp < self.refresh_interval * 1000:
+            return True
+        
+        if last_timestamp is None or last_timestamp < now - days * DAY_MS:
+            # Nothing usable stored yet: backfill the whole window (hourly granularity)
+            chart_data = await self.coingecko.get_coin_market_chart_async(coin_id, days=days, auto_interval=True)
+        else:
+            # Only the tail since the newest stored point
+            chart_data = await self.coingecko.get_coin_market_chart_range_async(
+                coin_id, last_timestamp / 1000, now / 1000
+            )
+        
+        if not chart_data or chart_data.get('prices') is None:
+            return False
+        
+        await self.store.append_prices_async(coin_id, chart_data['prices'])
+        
+        # Short tails come back at 5-minute granularity; keep hourly points for completed hours
+        if last_timestamp is not None:
+            await self.store.compact_async(coin_id, last_timestamp - last_timestamp % HOUR_MS, now - now % HOUR_MS)
+        await self.store.prune_async(coin_id, now - self.retention_days * DAY_MS)
+        return True
+    
+    async def get_series_async(self, coin_id: str, days: int = 30) -> Optional[PriceSeries]:
+        """Get the last `days` of prices, refreshing the store first; serves stale data if CoinGecko fails"""
+        await self.refresh_async(coin_id, days)
+        
+        start = int(time.time() * 1000) - days * DAY_MS
+        series = PriceSeries(await self.store.get_price_range_async(coin_id, start))
+        return series if len(series) else None
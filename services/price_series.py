@@ -0,0 +1,88 @@
+"""
+Price series - Timestamped price series slicing
+"""
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Union
+
+class PriceSeries:
+    """Timestamped price series (CoinGecko market_chart format) with window lookups by binary search"""
+    
+    # Window units in seconds ('m' is a 30-day month, matching the /analysis timeframes)
+    WINDOW_UNITS = {
+        'h': 3600,
+        'd': 86400,
+        'w': 7 * 86400,
+        'm': 30 * 86400,
+        'y': 365 * 86400
+    }
+    
+    def __init__(self, points: List[List[float]]):
+        # points: [[timestamp_ms, price], ...]
+        points = sorted((point for point in points if point[1] is not None), key=lambda point: point[0])
+        self.timestamps = [point[0] for point in points]
+        self.prices = [point[1] for point in points]
+    
+    def __len__(self) -> int:
+        return len(self.prices)
+    
+    def parse_window(self, window: Union[str, int, float]) -> float:
+        """Convert a window like '1d', '3d', '1w', '1m', '12h' (or seconds) to milliseconds"""
+        if isinstance(window, (int, float)):
+            return window * 1000
+        
+        unit = window[-1].lower()
+        if unit not in self.WINDOW_UNITS:
+            raise ValueError(f"Unknown window unit: {window}")
+        return float(window[:-1]) * self.WINDOW_UNITS[unit] * 1000
+    
+    def price_at(self, timestamp: float) -> Optional[float]:
+        """Get price at a timestamp (ms), interpolating between the surrounding points"""
+        if not self.timestamps:
+            return None
+        if timestamp <= self.timestamps[0]:
+            return self.prices[0]
+        if timestamp >= self.timestamps[-1]:
+            return self.prices[-1]
+        
+        right = bisect_left(self.timestamps, timestamp)
+        if self.timestamps[right] == timestamp:
+            return self.prices[right]
+        
+        left = right - 1
+        span = self.timestamps[right] - self.timestamps[left]
+        weight = (timestamp - self.timestamps[left]) / span
+        return self.prices[left] + (self.prices[right] - self.prices[left]) * weight
+    
+    def change(self, window: Union[str, int, float]) -> Optional[float]:
+        """Get percentage change over a window ending at the latest point"""
+        if len(self.prices) < 2:
+            return None
+        
+        end_price = self.prices[-1]
+        start_price = self.price_at(self.timestamps[-1] - self.parse_window(window))
+        if not start_price:
+            return None
+        return ((end_price - start_price) / start_price) * 100
+    
+    def changes(self, windows: List[Union[str, int, float]]) -> Dict[Union[str, int, float], float]:
+        """Get percentage change for each window that can be computed"""
+        result = {}
+        for window in windows:
+            change = self.change(window)
+            if change is not None:
+                result[window] = change
+        return result
+    
+    def slice(self, start: float = None, end: float = None) -> 'PriceSeries':
+        """Get the points with start <= timestamp (ms) <= end"""
+        lo = 0 if start is None else bisect_left(self.timestamps, start)
+        hi = len(self.timestamps) if end is None else bisect_right(self.timestamps, end)
+        return PriceSeries([[self.timestamps[i], self.prices[i]] for i in range(lo, hi)])
+    
+    def resample(self, interval: Union[str, int, float]) -> 'PriceSeries':
+        """Downsample to one point per interval bucket, keeping the last point in each bucket"""
+        bucket_size = self.parse_window(interval)
+        points = {}
+        for timestamp, price in zip(self.timestamps, self.prices):
+            points[int(timestamp // bucket_size)] = [timestamp, price]
+        return PriceSeries(list(points.values()))
@@ -1,13 +1,29 @@
 """
 Price service - Price data service
 """
+import re
 import requests
+import httpx
 from typing import Dict, List, Optional, Any
 from config import Config
+from services.http_client import HTTPClient
+from services.response_cache import ResponseCache
+from services.single_flight import SingleFlight
+from services.rate_limiter import RateLimiter
 
 class PriceService:
     """Base class for price data service"""
     
+    # Response cache shared by every CoinGecko service instance
+    cache = ResponseCache(Config.COINGECKO_CACHE_MAX_ENTRIES)
+    cache_ttls = [
+        (re.compile('^' + re.escape(endpoint).replace(re.escape('{id}'), '[^/]+') + '$'), ttl)
+        for endpoint, ttl in Config.COINGECKO_CACHE_TTLS.items()
+    ]
+    single_flight = SingleFlight('coingecko')
+    # Request budget shared by every upstream CoinGecko call
+    rate_limiter = RateLimiter(Config.COINGECKO_RATE_LIMIT, Config.COINGECKO_RATE_BURST)
+    
     def __init__(self):
         self.api_base = Config.COINGECKO_API_BASE
         self.api_key = Config.COINGECKO_API_KEY
@@ -15,12 +31,58 @@ class PriceService:
         if self.api_key:
             self.headers['x-cg-demo-api-key'] = self.api_key
     
+    def _cache_ttl(self, url: str) -> Optional[float]:
+        """Get cache TTL for an endpoint URL, or None if it should not be cached"""
+        if not url.startswith(self.api_base):
+            return None
+        path = url[len(self.api_base):]
+        for pattern, ttl in self.cache_ttls:
+            if pattern.match(path):
+                return ttl
+        return None
+    
     def _make_request(self, url: str, params: Dict = None) -> Optional[Dict]:
         """Make API request"""
+        ttl = self._cache_ttl(url)
+        key = ResponseCache.make_key(url, params)
+        if ttl:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
         try:
             response = requests.get(url, headers=self.headers, params=params)
             response.raise_for_status()
-            return response.json()
+            data = response.json()
         except requests.exceptions.RequestException as e:
             print(f"API request error: {e}")
             return None
+        
+        if ttl and data is not None:
+            self.cache.set(key, data, ttl)
+        return data
+
+    async def _make_request_async(self, url: str, params: Dict = None) -> Optional[Dict]:
+        """Make API request without blocking the event loop"""
+        ttl = self._cache_ttl(url)
+        key = ResponseCache.make_key(url, params)
+        if ttl:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        # Concurrent identical requests share one upstream call
+        return await self.single_flight.do(key, lambda: self._fetch_async(url, params, key, ttl))
+    
+    async def _fetch_async(self, url: str, params: Dict, key: str, ttl: Optional[float]) -> Optional[Dict]:
+        """Fetch from CoinGecko and populate the response cache"""
+        await self.rate_limiter.acquire()
+        try:
+            data = await HTTPClient.get_json(url, headers=self.headers, params=params)
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"API request error: {e}")
+            return None
+        
+        if ttl and data is not None:
+            self.cache.set(key, data, ttl)
+        return data
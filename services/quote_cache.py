@@ -0,0 +1,128 @@
+"""
+Quote cache - Short-lived cache of SideShift quotes bounded by their expiresAt
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Optional, Any, Tuple
+
+class QuoteCache:
+    """Thread-safe LRU cache of quotes keyed by pair and amount bucket
+
+    An entry is served only while its quote has at least `min_remaining` seconds left before
+    SideShift's expiresAt, so a cached quote always leaves time to create a shift from it.
+    Quotes are indexed by id so one that was spent on a shift can be dropped.
+    """
+    
+    def __init__(self, max_entries: int = 512, amount_digits: int = 6):
+        self.max_entries = max_entries
+        self.amount_digits = amount_digits
+        self._entries = OrderedDict()  # key -> (expires_at, quote)
+        self._ids: Dict[str, Tuple] = {}  # quote id -> key
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    @staticmethod
+    def expires_at(quote: Dict[str, Any]) -> Optional[float]:
+        """Parse a quote's expiresAt (ISO 8601) into a Unix timestamp"""
+        value = quote.get('expiresAt') if quote else None
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except (AttributeError, ValueError):
+            return None
+    
+    @classmethod
+    def remaining(cls, quote: Dict[str, Any]) -> Optional[float]:
+        """Seconds until a quote expires, or None if it carries no expiry"""
+        expires_at = cls.expires_at(quote)
+        return expires_at - time.time() if expires_at is not None else None
+    
+    def amount_bucket(self, amount: Optional[str]) -> Optional[str]:
+        """Round an amount to amount_digits significant digits so '0.1', '0.10' and 0.1 share a key"""
+        if amount is None:
+            return None
+        try:
+            return str(Decimal(format(Decimal(str(amount)), f'.{self.amount_digits}g')).normalize())
+        except InvalidOperation:
+            return str(amount).strip().lower()
+    
+    def make_key(self, deposit_coin: str, deposit_network: str, settle_coin: str, settle_network: str,
+                 deposit_amount: str = None, settle_amount: str = None) -> Tuple:
+        """Build a cache key; deposit- and settle-denominated quotes never share one"""
+        return (
+            deposit_coin.lower(), deposit_network.lower(), settle_coin.lower(), settle_network.lower(),
+            self.amount_bucket(deposit_amount), self.amount_bucket(settle_amount)
+        )
+    
+    def _remove(self, key: Tuple):
+        """Drop an entry and its id index (lock held)"""
+        _, quote = self._entries.pop(key)
+        self._ids.pop(quote.get('id'), None)
+    
+    def get(self, key: Tuple, min_remaining: float = 0) -> Optional[Dict[str, Any]]:
+        """Return a cached quote with at least min_remaining seconds left, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            if entry[0] - time.time() <= min_remaining:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key: Tuple, quote: Dict[str, Any]):
+        """Cache a quote until its expiresAt; quotes without a parseable expiry are not cached"""
+        expires_at = self.expires_at(quote)
+        if expires_at is None or expires_at <= time.time():
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, quote)
+            if quote.get('id'):
+                self._ids[quote['id']] = key
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def discard(self, quote_id: str):
+        """Stop serving a quote, e.g. once a shift has been created from it"""
+        with self._lock:
+            key = self._ids.get(quote_id)
+            if key is not None and key in self._entries:
+                self._remove(key)
+    
+    def clear(self):
+        """Drop every cached quote"""
+        with self._lock:
+            self._entries.clear()
+            self._ids.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,49 @@
+"""
+Rate limiter - Token bucket for upstream request budgets
+"""
+import asyncio
+import time
+from typing import Dict, Any
+
+class RateLimiter:
+    """Async token bucket: `rate` requests per minute with bursts of up to `burst`"""
+    
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate / 60
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.waited = 0.0
+    
+    def _refill(self):
+        """Add the tokens earned since the last update"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+    
+    async def acquire(self):
+        """Wait until a request fits in the budget, then spend one token"""
+        if self.rate <= 0:
+            return
+        
+        # Waiters queue on the lock, so they are served in arrival order
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                delay = (1 - self.tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self.tokens -= 1
+            self.acquired += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get limiter counters"""
+        return {
+            'rate_per_minute': self.rate * 60,
+            'burst': self.burst,
+            'acquired': self.acquired,
+            'waited': self.waited
+        }
@@ -0,0 +1,84 @@
+"""
+Response cache - Bounded TTL/LRU cache for upstream API responses
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+from urllib.parse import urlencode
+
+class ResponseCache:
+    """Thread-safe LRU cache whose entries expire after a per-entry TTL
+
+    Cached responses are shared between callers and must be treated as read-only.
+    """
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    @staticmethod
+    def make_key(url: str, params: Dict = None) -> str:
+        """Build a cache key from a URL and its params, independent of param order and value types"""
+        if not params:
+            return url
+        normalized = []
+        for name, value in sorted(params.items()):
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                value = 'true' if value else 'false'
+            normalized.append((name, str(value).lower()))
+        return f"{url}?{urlencode(normalized)}"
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return a fresh cached value, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: str, value: Any, ttl: float):
+        """Store a value for ttl seconds, evicting the least recently used entries when full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,109 @@
+"""
+Shift tracker - Background status polling for open SideShift shifts
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Any, Tuple
+from config import Config
+from database.models import DatabaseManager
+from services.sideshift_service import SideShiftService
+
+# Statuses after which a shift never changes again
+SETTLED_STATUSES = {'settled', 'complete'}
+FAILED_STATUSES = {'refunded', 'expired', 'failed'}
+TERMINAL_STATUSES = SETTLED_STATUSES | FAILED_STATUSES
+
+class ShiftTracker:
+    """Poll open shifts stored in SQLite and report the ones whose status changed
+
+    Each poll looks at no more than SHIFT_TRACKER_BATCH_SIZE * SHIFT_TRACKER_MAX_BATCHES due
+    shifts, with one bulk SideShift request per batch, so the request rate stays bounded however
+    many shifts are open; the most overdue shifts go first. A shift is polled again after the
+    interval for its status, stretched by SHIFT_POLL_BACKOFF for every poll that saw no change.
+    """
+    
+    def __init__(self, db: DatabaseManager = None, sideshift: SideShiftService = None):
+        self.db = db or DatabaseManager()
+        self.sideshift = sideshift or SideShiftService()
+        self.polls = 0
+        self.requests = 0
+        self.changes = 0
+    
+    @staticmethod
+    def poll_interval(status: str, unchanged_polls: int = 0) -> float:
+        """Seconds until a shift in `status` is polled again"""
+        intervals = Config.SHIFT_POLL_INTERVALS
+        base = intervals.get(status, intervals['default'])
+        return min(base * Config.SHIFT_POLL_BACKOFF ** unchanged_polls, max(Config.SHIFT_POLL_MAX_INTERVAL, base))
+    
+    async def track(self, user_id: int, chat_id: int, shift: Dict[str, Any], deposit_coin: str = None,
+                    settle_coin: str = None, deposit_amount: str = None, settle_amount: str = None):
+        """Start tracking a shift created for a user"""
+        status = shift.get('status', 'waiting')
+        await self.db.add_shift_async({
+            'shift_id': shift['id'],
+            'user_id': user_id,
+            'chat_id': chat_id,
+            'status': status,
+            'deposit_coin': deposit_coin,
+            'settle_coin': settle_coin,
+            'deposit_amount': deposit_amount,
+            'settle_amount': settle_amount,
+            'deposit_address': shift.get('depositAddress'),
+            'next_poll_at': time.time() + self.poll_interval(status)
+        })
+    
+    async def _fetch_batch(self, shift_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get current statuses for one batch, keyed by shift id (empty if the request failed)"""
+        self.requests += 1
+        shifts = await self.sideshift.get_shifts_bulk_async(shift_ids)
+        if not isinstance(shifts, list):
+            return {}
+        return {shift['id']: shift for shift in shifts if isinstance(shift, dict) and 'id' in shift}
+    
+    async def poll_due(self) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Poll the shifts that are due; returns (tracked shift, current shift) for every status change"""
+        batch_size = Config.SHIFT_TRACKER_BATCH_SIZE
+        now = time.time()
+        due = await self.db.get_due_shifts_async(now, batch_size * Config.SHIFT_TRACKER_MAX_BATCHES)
+        if not due:
+            return []
+        
+        batches = [due[i:i + batch_size] for i in range(0, len(due), batch_size)]
+        results = await asyncio.gather(*[
+            self._fetch_batch([tracked['shift_id'] for tracked in batch]) for batch in batches
+        ])
+        current = {shift_id: shift for result in results for shift_id, shift in result.items()}
+        
+        updates = []
+        changes = []
+        now = time.time()
+        for tracked in due:
+            shift: Optional[Dict[str, Any]] = current.get(tracked['shift_id'])
+            status = shift.get('status', tracked['status']) if shift else tracked['status']
+            changed = status != tracked['status']
+            # Missing from the response (request failed or unknown id) counts as unchanged
+            unchanged_polls = 0 if changed else tracked['unchanged_polls'] + 1
+            updates.append({
+                'shift_id': tracked['shift_id'],
+                'status': status,
+                'settle_amount': shift.get('settleAmount') if shift else None,
+                'unchanged_polls': unchanged_polls,
+                'next_poll_at': now + self.poll_interval(status, unchanged_polls),
+                'closed': status in TERMINAL_STATUSES
+            })
+            if changed:
+                changes.append((tracked, shift))
+        
+        await self.db.update_shifts_bulk_async(updates)
+        self.polls += len(due)
+        self.changes += len(changes)
+        return changes
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get tracker counters"""
+        return {
+            'polls': self.polls,
+            'requests': self.requests,
+            'changes': self.changes
+        }
@@ -30,6 +30,24 @@ class SideShiftService(SwapService, CoinInfoService):
         shift = self.create_fixed_shift(quote['id'], user_address)
         return shift
     
+    async def swap_tokens_async(self, from_token: str, to_token: str, amount: str,
+                                from_network: str, to_network: str, user_address: str) -> Optional[Dict]:
+        """Execute token swap (async)"""
+        # First get a quote
+        quote = await self.get_quote_async(
+            deposit_coin=from_token,
+            deposit_network=from_network,
+            settle_coin=to_token,
+            settle_network=to_network,
+            deposit_amount=amount
+        )
+        
+        if not quote:
+            return None
+        
+        # Create the shift
+        return await self.create_fixed_shift_async(quote['id'], user_address)
+    
     def create_checkout_session(self, settle_coin: str, settle_network: str, settle_amount: str, 
                                settle_address: str, success_url: str = None, cancel_url: str = None) -> Optional[Dict]:
         """Create a checkout session for easy token purchase"""
@@ -42,3 +60,16 @@ class SideShiftService(SwapService, CoinInfoService):
             cancel_url=cancel_url
         )
     
+    async def create_checkout_session_async(self, settle_coin: str, settle_network: str, settle_amount: str,
+                                            settle_address: str, success_url: str = None,
+                                            cancel_url: str = None) -> Optional[Dict]:
+        """Create a checkout session for easy token purchase (async)"""
+        return await self.create_checkout_async(
+            settle_coin=settle_coin,
+            settle_network=settle_network,
+            settle_amount=settle_amount,
+            settle_address=settle_address,
+            success_url=success_url,
+            cancel_url=cancel_url
+        )
+
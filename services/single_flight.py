@@ -0,0 +1,53 @@
+"""
+Single flight - In-flight deduplication of identical upstream calls
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Any
+
+class SingleFlight:
+    """Let concurrent identical requests share one upstream call instead of fanning out
+
+    Results are shared between callers and must be treated as read-only.
+    """
+    
+    # Every named group, for metrics
+    groups: Dict[str, 'SingleFlight'] = {}
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+        SingleFlight.groups[name] = self
+    
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run call() for key, or join the call already in flight for the same key"""
+        task = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        
+        # Shield so one cancelled caller does not cancel the call shared with the others
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: str, task: asyncio.Task):
+        """Drop a finished call so the next request starts a fresh one"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get upstream calls made and calls saved by coalescing"""
+        return {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._in_flight)
+        }
+    
+    @classmethod
+    def all_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Get stats for every named group"""
+        return {name: group.stats() for name, group in cls.groups.items()}
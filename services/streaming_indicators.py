@@ -0,0 +1,285 @@
+"""
+Streaming indicators - Incremental technical indicators with O(1) updates
+"""
+import json
+import math
+from collections import deque
+from typing import Dict, Optional, Any
+
+class StreamingEMA:
+    """Exponential moving average seeded with the first price (same recursion as TechnicalAnalysis)"""
+    
+    def __init__(self, period: int):
+        self.period = period
+        self.multiplier = 2 / (period + 1)
+        self.value: Optional[float] = None
+        self.count = 0
+    
+    def update(self, price: float) -> float:
+        """Ingest one price and return the new EMA"""
+        if self.value is None:
+            self.value = price
+        else:
+            self.value = (price * self.multiplier) + (self.value * (1 - self.multiplier))
+        self.count += 1
+        return self.value
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize state to a JSON-compatible dict"""
+        return {'period': self.period, 'value': self.value, 'count': self.count}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StreamingEMA':
+        """Restore state from to_dict() output"""
+        ema = cls(data['period'])
+        ema.value = data['value']
+        ema.count = data['count']
+        return ema
+
+class StreamingRSI:
+    """Wilder-smoothed RSI; neutral 50 until period + 1 prices have been seen"""
+    
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.previous: Optional[float] = None
+        self.count = 0  # number of price changes seen
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+    
+    @property
+    def value(self) -> float:
+        """Current RSI"""
+        if self.count < self.period:
+            return 50.0
+        if self.avg_loss == 0:
+            return 100.0
+        rs = self.avg_gain / self.avg_loss
+        return 100 - (100 / (1 + rs))
+    
+    def update(self, price: float) -> float:
+        """Ingest one price and return the new RSI"""
+        if self.previous is not None:
+            change = price - self.previous
+            gain = change if change > 0 else 0.0
+            loss = -change if change < 0 else 0.0
+            self.count += 1
+            
+            if self.count <= self.period:
+                # Seed with the simple average of the first period changes
+                self.avg_gain += (gain - self.avg_gain) / self.count
+                self.avg_loss += (loss - self.avg_loss) / self.count
+            else:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        
+        self.previous = price
+        return self.value
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize state to a JSON-compatible dict"""
+        return {
+            'period': self.period,
+            'previous': self.previous,
+            'count': self.count,
+            'avg_gain': self.avg_gain,
+            'avg_loss': self.avg_loss
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StreamingRSI':
+        """Restore state from to_dict() output"""
+        rsi = cls(data['period'])
+        rsi.previous = data['previous']
+        rsi.count = data['count']
+        rsi.avg_gain = data['avg_gain']
+        rsi.avg_loss = data['avg_loss']
+        return rsi
+
+class StreamingMACD:
+    """MACD line, signal line and histogram updated one price at a time"""
+    
+    def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9):
+        self.fast = StreamingEMA(fast_period)
+        self.slow = StreamingEMA(slow_period)
+        self.signal = StreamingEMA(signal_period)
+    
+    @property
+    def value(self) -> Dict[str, float]:
+        """Current MACD values"""
+        # Matches TechnicalAnalysis.calculate_macd, which reports zeros until slow_period prices
+        if self.slow.count < self.slow.period or self.signal.value is None:
+            return {"macd": 0, "signal": 0, "histogram": 0}
+        macd = self.fast.value - self.slow.value
+        return {"macd": macd, "signal": self.signal.value, "histogram": macd - self.signal.value}
+    
+    def update(self, price: float) -> Dict[str, float]:
+        """Ingest one price and return the new MACD values"""
+        macd = self.fast.update(price) - self.slow.update(price)
+        self.signal.update(macd)
+        return self.value
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize state to a JSON-compatible dict"""
+        return {'fast': self.fast.to_dict(), 'slow': self.slow.to_dict(), 'signal': self.signal.to_dict()}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StreamingMACD':
+        """Restore state from to_dict() output"""
+        macd = cls()
+        macd.fast = StreamingEMA.from_dict(data['fast'])
+        macd.slow = StreamingEMA.from_dict(data['slow'])
+        macd.signal = StreamingEMA.from_dict(data['signal'])
+        return macd
+
+class StreamingBollinger:
+    """Bollinger Bands over a rolling window, mean/variance maintained with Welford's algorithm"""
+    
+    def __init__(self, period: int = 20, std_dev: float = 2):
+        self.period = period
+        self.std_dev = std_dev
+        self.window = deque()
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+    
+    @property
+    def value(self) -> Dict[str, float]:
+        """Current bands"""
+        if not self.window:
+            return {"upper": 0, "middle": 0, "lower": 0}
+        if len(self.window) < self.period:
+            current_price = self.window[-1]
+            return {"upper": current_price * 1.1, "middle": current_price, "lower": current_price * 0.9}
+        
+        std = math.sqrt(max(self.m2, 0.0) / len(self.window))
+        return {
+            "upper": self.mean + (std * self.std_dev),
+            "middle": self.mean,
+            "lower": self.mean - (std * self.std_dev)
+        }
+    
+    def update(self, price: float) -> Dict[str, float]:
+        """Ingest one price and return the new bands"""
+        self.window.append(price)
+        count = len(self.window)
+        delta = price - self.mean
+        self.mean += delta / count
+        self.m2 += delta * (price - self.mean)
+        
+        if count > self.period:
+            oldest = self.window.popleft()
+            count -= 1
+            delta = oldest - self.mean
+            self.mean -= delta / count
+            self.m2 -= delta * (oldest - self.mean)
+        
+        return self.value
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize state to a JSON-compatible dict"""
+        return {
+            'period': self.period,
+            'std_dev': self.std_dev,
+            'window': list(self.window),
+            'mean': self.mean,
+            'm2': self.m2
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StreamingBollinger':
+        """Restore state from to_dict() output"""
+        bands = cls(data['period'], data['std_dev'])
+        bands.window = deque(data['window'])
+        bands.mean = data['mean']
+        bands.m2 = data['m2']
+        return bands
+
+class IndicatorStream:
+    """All streaming indicators for one token, serializable so state survives restarts"""
+    
+    def __init__(self):
+        self.rsi = StreamingRSI()
+        self.macd = StreamingMACD()
+        self.bollinger = StreamingBollinger()
+        # Last 20 prices for support/resistance and trend (fixed size, so updates stay O(1))
+        self.recent = deque(maxlen=20)
+        self.count = 0  # prices seen
+    
+    def update(self, price: float) -> Dict[str, Any]:
+        """Ingest one price and return the indicator snapshot"""
+        self.rsi.update(price)
+        self.macd.update(price)
+        self.bollinger.update(price)
+        self.recent.append(price)
+        self.count += 1
+        return self.snapshot()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Current indicators in the same shape as TechnicalAnalysis.get_technical_indicators"""
+        if len(self.recent) < 5:
+            return {
+                "rsi": 50,
+                "macd": {"macd": 0, "signal": 0, "histogram": 0},
+                "support_resistance": {"support": 0, "resistance": 0},
+                "bollinger_bands": {"upper": 0, "middle": 0, "lower": 0},
+                "trend": "Sideways"
+            }
+        
+        recent = list(self.recent)
+        if self.count < 10:
+            support_resistance = {"support": recent[-1] * 0.95, "resistance": recent[-1] * 1.05}
+        else:
+            support_resistance = {
+                "support": round(min(recent) * 0.9, 4),
+                "resistance": round(max(recent) * 1.1, 4)
+            }
+        
+        short_ma = sum(recent[-3:]) / 3
+        long_ma = sum(recent[-5:]) / 5
+        if short_ma > long_ma * 1.02:
+            trend = "Uptrend"
+        elif short_ma < long_ma * 0.98:
+            trend = "Downtrend"
+        else:
+            trend = "Sideways"
+        
+        return {
+            "rsi": round(self.rsi.value, 2),
+            "macd": {name: round(value, 4) for name, value in self.macd.value.items()},
+            "support_resistance": support_resistance,
+            "bollinger_bands": {
+                name: round(value, 4) if len(self.bollinger.window) >= self.bollinger.period else value
+                for name, value in self.bollinger.value.items()
+            },
+            "trend": trend
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize state to a JSON-compatible dict"""
+        return {
+            'rsi': self.rsi.to_dict(),
+            'macd': self.macd.to_dict(),
+            'bollinger': self.bollinger.to_dict(),
+            'recent': list(self.recent),
+            'count': self.count
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'IndicatorStream':
+        """Restore state from to_dict() output"""
+        stream = cls()
+        stream.rsi = StreamingRSI.from_dict(data['rsi'])
+        stream.macd = StreamingMACD.from_dict(data['macd'])
+        stream.bollinger = StreamingBollinger.from_dict(data['bollinger'])
+        stream.recent = deque(data['recent'], maxlen=20)
+        # State saved before the counter existed: every price also went through the slow EMA
+        stream.count = data.get('count', stream.macd.slow.count)
+        return stream
+    
+    def to_json(self) -> str:
+        """Serialize state to JSON"""
+        return json.dumps(self.to_dict())
+    
+    @classmethod
+    def from_json(cls, payload: str) -> 'IndicatorStream':
+        """Restore state from JSON"""
+        return cls.from_dict(json.loads(payload))
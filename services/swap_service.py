@@ -2,12 +2,25 @@
 Swap service - Token swap service
 """
 import requests
-from typing import Dict, List, Optional, Any
+import httpx
+from typing import Dict, List, Optional, Any, Tuple
 from config import Config
+from services.http_client import HTTPClient
+from services.quote_cache import QuoteCache
+from services.single_flight import SingleFlight
+
+# Outcomes of a shift creation attempt
+SHIFT_CREATED = 'created'
+SHIFT_QUOTE_REJECTED = 'quote_rejected'  # SideShift refused the quote (expired or already used); no shift exists
+SHIFT_FAILED = 'failed'  # Anything else, including timeouts after which the shift may exist
 
 class SwapService:
     """Token swap service"""
     
+    # Quotes shared by every SideShift service instance until shortly before they expire
+    quote_cache = QuoteCache(Config.QUOTE_CACHE_MAX_ENTRIES, Config.QUOTE_CACHE_AMOUNT_DIGITS)
+    quote_flight = SingleFlight('sideshift_quotes')
+    
     def __init__(self):
         self.api_base = Config.SIDESHIFT_API_BASE
         self.secret = Config.SIDESHIFT_SECRET
@@ -17,11 +30,10 @@ class SwapService:
             'x-sideshift-secret': self.secret
         }
     
-    def get_quote(self, deposit_coin: str, deposit_network: str, 
-                  settle_coin: str, settle_network: str, 
-                  deposit_amount: str = None, settle_amount: str = None) -> Optional[Dict]:
-        """Get a quote for token swap"""
-        url = f"{self.api_base}/quotes"
+    def _quote_payload(self, deposit_coin: str, deposit_network: str,
+                       settle_coin: str, settle_network: str,
+                       deposit_amount: str = None, settle_amount: str = None) -> Dict:
+        """Build request body for a quote"""
         data = {
             "depositCoin": deposit_coin,
             "depositNetwork": deposit_network,
@@ -34,18 +46,65 @@ class SwapService:
             data["depositAmount"] = deposit_amount
         if settle_amount:
             data["settleAmount"] = settle_amount
+        return data
+    
+    def get_quote(self, deposit_coin: str, deposit_network: str, 
+                  settle_coin: str, settle_network: str, 
+                  deposit_amount: str = None, settle_amount: str = None,
+                  fresh: bool = False) -> Optional[Dict]:
+        """Get a quote for token swap (fresh=True skips the quote cache)"""
+        url = f"{self.api_base}/quotes"
+        data = self._quote_payload(deposit_coin, deposit_network, settle_coin, settle_network,
+                                   deposit_amount, settle_amount)
+        key = self.quote_cache.make_key(deposit_coin, deposit_network, settle_coin, settle_network,
+                                        deposit_amount, settle_amount)
+        if not fresh:
+            cached = self.quote_cache.get(key, Config.QUOTE_CACHE_MIN_REMAINING)
+            if cached is not None:
+                return cached
             
         try:
             response = requests.post(url, headers=self.headers, json=data)
             response.raise_for_status()
-            return response.json()
+            quote = response.json()
         except requests.exceptions.RequestException as e:
             print(f"Error getting quote: {e}")
             return None
+        
+        self.quote_cache.set(key, quote)
+        return quote
     
-    def create_fixed_shift(self, quote_id: str, settle_address: str, refund_address: str = None) -> Optional[Dict]:
-        """Create a fixed shift"""
-        url = f"{self.api_base}/shifts/fixed"
+    async def get_quote_async(self, deposit_coin: str, deposit_network: str,
+                              settle_coin: str, settle_network: str,
+                              deposit_amount: str = None, settle_amount: str = None,
+                              fresh: bool = False) -> Optional[Dict]:
+        """Get a quote for token swap (async; fresh=True skips the quote cache)"""
+        url = f"{self.api_base}/quotes"
+        data = self._quote_payload(deposit_coin, deposit_network, settle_coin, settle_network,
+                                   deposit_amount, settle_amount)
+        key = self.quote_cache.make_key(deposit_coin, deposit_network, settle_coin, settle_network,
+                                        deposit_amount, settle_amount)
+        if not fresh:
+            cached = self.quote_cache.get(key, Config.QUOTE_CACHE_MIN_REMAINING)
+            if cached is not None:
+                return cached
+        
+        # Concurrent requests for the same pair and amount share one upstream quote
+        return await self.quote_flight.do(key, lambda: self._fetch_quote_async(url, data, key))
+    
+    async def _fetch_quote_async(self, url: str, data: Dict, key: Tuple) -> Optional[Dict]:
+        """Request a quote from SideShift and populate the quote cache"""
+        try:
+            quote = await HTTPClient.post_json(url, data, headers=self.headers)
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Error getting quote: {e}")
+            return None
+        
+        self.quote_cache.set(key, quote)
+        return quote
+    
+    def _fixed_shift_payload(self, quote_id: str, settle_address: str, refund_address: str = None) -> Dict:
+        """Build request body for a fixed shift"""
         data = {
             "quoteId": quote_id,
             "settleAddress": settle_address,
@@ -55,6 +114,14 @@ class SwapService:
         # Add refund address if provided
         if refund_address:
             data["refundAddress"] = refund_address
+        return data
+    
+    def create_fixed_shift(self, quote_id: str, settle_address: str, refund_address: str = None) -> Optional[Dict]:
+        """Create a fixed shift"""
+        url = f"{self.api_base}/shifts/fixed"
+        data = self._fixed_shift_payload(quote_id, settle_address, refund_address)
+        # A quote backs at most one shift, so stop handing it out
+        self.quote_cache.discard(quote_id)
         
         try:
             response = requests.post(url, headers=self.headers, json=data)
@@ -64,6 +131,43 @@ class SwapService:
             print(f"Error creating shift: {e}")
             return None
     
+    @staticmethod
+    def _is_quote_rejection(response: httpx.Response) -> bool:
+        """Whether an error response says the quote expired or was already used"""
+        if not 400 <= response.status_code < 500:
+            return False
+        try:
+            error = response.json().get('error', {})
+        except (ValueError, AttributeError):
+            return False
+        message = (error.get('message', '') if isinstance(error, dict) else str(error)).lower()
+        return 'quote' in message and any(word in message for word in ('expired', 'used', 'not found'))
+    
+    async def create_fixed_shift_result_async(self, quote_id: str, settle_address: str,
+                                              refund_address: str = None) -> Tuple[str, Optional[Dict]]:
+        """Create a fixed shift (async); returns (SHIFT_CREATED | SHIFT_QUOTE_REJECTED | SHIFT_FAILED, shift)"""
+        url = f"{self.api_base}/shifts/fixed"
+        data = self._fixed_shift_payload(quote_id, settle_address, refund_address)
+        # A quote backs at most one shift, so stop handing it out
+        self.quote_cache.discard(quote_id)
+        
+        try:
+            return SHIFT_CREATED, await HTTPClient.post_json(url, data, headers=self.headers)
+        except httpx.HTTPStatusError as e:
+            print(f"Error creating shift: {e}")
+            if self._is_quote_rejection(e.response):
+                return SHIFT_QUOTE_REJECTED, None
+            return SHIFT_FAILED, None
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Error creating shift: {e}")
+            return SHIFT_FAILED, None
+    
+    async def create_fixed_shift_async(self, quote_id: str, settle_address: str,
+                                       refund_address: str = None) -> Optional[Dict]:
+        """Create a fixed shift (async)"""
+        _, shift = await self.create_fixed_shift_result_async(quote_id, settle_address, refund_address)
+        return shift
+    
     def get_shift_status(self, shift_id: str) -> Optional[Dict]:
         """Get shift status"""
         url = f"{self.api_base}/shifts/{shift_id}"
@@ -76,10 +180,41 @@ class SwapService:
             print(f"Error getting shift status: {e}")
             return None
     
-    def create_checkout(self, settle_coin: str, settle_network: str, settle_amount: str, 
-                       settle_address: str, success_url: str, cancel_url: str) -> Optional[Dict]:
-        """Create a checkout session"""
-        url = f"{self.api_base}/checkout"
+    async def get_shift_status_async(self, shift_id: str) -> Optional[Dict]:
+        """Get shift status (async)"""
+        url = f"{self.api_base}/shifts/{shift_id}"
+        
+        try:
+            return await HTTPClient.get_json(url, headers=self.headers)
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Error getting shift status: {e}")
+            return None
+    
+    def get_shifts_bulk(self, shift_ids: List[str]) -> Optional[List[Dict]]:
+        """Get the status of several shifts in one request"""
+        url = f"{self.api_base}/shifts"
+        
+        try:
+            response = requests.get(url, headers=self.headers, params={'ids': ','.join(shift_ids)})
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Error getting shift statuses: {e}")
+            return None
+    
+    async def get_shifts_bulk_async(self, shift_ids: List[str]) -> Optional[List[Dict]]:
+        """Get the status of several shifts in one request (async)"""
+        url = f"{self.api_base}/shifts"
+        
+        try:
+            return await HTTPClient.get_json(url, headers=self.headers, params={'ids': ','.join(shift_ids)})
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Error getting shift statuses: {e}")
+            return None
+    
+    def _checkout_request(self, settle_coin: str, settle_network: str, settle_amount: str,
+                          settle_address: str, success_url: str, cancel_url: str) -> Tuple[Dict, Dict]:
+        """Build request body and headers for a checkout session"""
         data = {
             "settleCoin": settle_coin,
             "settleNetwork": settle_network,
@@ -95,6 +230,14 @@ class SwapService:
             'Accept': 'application/json',
             'x-sideshift-secret': self.secret
         }
+        return data, headers
+    
+    def create_checkout(self, settle_coin: str, settle_network: str, settle_amount: str, 
+                       settle_address: str, success_url: str, cancel_url: str) -> Optional[Dict]:
+        """Create a checkout session"""
+        url = f"{self.api_base}/checkout"
+        data, headers = self._checkout_request(settle_coin, settle_network, settle_amount,
+                                               settle_address, success_url, cancel_url)
         
         try:
             response = requests.post(url, headers=headers, json=data)
@@ -104,3 +247,16 @@ class SwapService:
             print(f"Error creating checkout: {e}")
             return None
     
+    async def create_checkout_async(self, settle_coin: str, settle_network: str, settle_amount: str,
+                                    settle_address: str, success_url: str, cancel_url: str) -> Optional[Dict]:
+        """Create a checkout session (async)"""
+        url = f"{self.api_base}/checkout"
+        data, headers = self._checkout_request(settle_coin, settle_network, settle_amount,
+                                               settle_address, success_url, cancel_url)
+        
+        try:
+            return await HTTPClient.post_json(url, data, headers=headers)
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Error creating checkout: {e}")
+            return None
+
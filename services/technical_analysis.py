@@ -3,10 +3,15 @@ Technical analysis service - Technical analysis service
 """
 import math
 from typing import Dict, List, Optional, Any
+from config import Config
+from services.cpu_executor import CPUExecutor
 
 class TechnicalAnalysis:
     """Technical analysis service"""
     
+    # CPU_TASK_ROUTES entry deciding where get_technical_indicators_async runs
+    cpu_task = 'indicators'
+    
     def calculate_rsi(self, prices: List[float], period: int = 14) -> float:
         """Calculate RSI indicator"""
         if len(prices) < period + 1:
@@ -168,3 +173,18 @@ class TechnicalAnalysis:
             "bollinger_bands": self.calculate_bollinger_bands(prices),
             "trend": self.analyze_trend(prices)
         }
+
+    async def get_technical_indicators_async(self, prices: List[float]) -> Dict[str, Any]:
+        """Get all technical indicators without blocking the event loop"""
+        return await CPUExecutor.run(self.cpu_task, self.get_technical_indicators, list(prices), size=len(prices))
+
+def create_technical_analysis(backend: str = None) -> TechnicalAnalysis:
+    """Create the technical analysis implementation for a backend ('python' or 'numpy')"""
+    backend = (backend or Config.TECHNICAL_ANALYSIS_BACKEND).lower()
+    if backend == 'numpy':
+        try:
+            from services.technical_analysis_numpy import NumpyTechnicalAnalysis
+            return NumpyTechnicalAnalysis()
+        except ImportError as e:
+            print(f"NumPy backend unavailable, using pure Python technical analysis: {e}")
+    return TechnicalAnalysis()
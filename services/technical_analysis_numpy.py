@@ -0,0 +1,187 @@
+"""
+Technical analysis service - Vectorized NumPy backend
+"""
+from functools import lru_cache
+from typing import Dict, List, Any, Tuple, Union
+import numpy as np
+from services.technical_analysis import TechnicalAnalysis
+
+PriceInput = Union[List[float], np.ndarray]
+
+@lru_cache(maxsize=128)
+def _ema_weights(length: int, period: int) -> np.ndarray:
+    """Weights w such that w @ prices is the last value of the recursive EMA seeded with prices[0]"""
+    if length < period:
+        # The list implementation returns the data unchanged when it is shorter than the period
+        weights = np.zeros(length)
+        weights[-1] = 1.0
+        return weights
+    
+    multiplier = 2 / (period + 1)
+    decay = 1 - multiplier
+    weights = multiplier * decay ** np.arange(length - 1, -1, -1, dtype=float)
+    weights[0] = decay ** (length - 1)
+    return weights
+
+def _ema_series_adjoint(weights: np.ndarray, period: int) -> np.ndarray:
+    """Map weights over an EMA series to weights over its input (weights @ EMA matrix)"""
+    length = len(weights)
+    if length < period:
+        return weights.copy()
+    
+    multiplier = 2 / (period + 1)
+    decay = 1 - multiplier
+    adjoint = np.empty(length)
+    tail = 0.0
+    for i in range(length - 1, 0, -1):
+        tail = weights[i] + decay * tail
+        adjoint[i] = multiplier * tail
+    adjoint[0] = weights[0] + decay * tail
+    return adjoint
+
+@lru_cache(maxsize=128)
+def _macd_weights(length: int, fast_period: int, slow_period: int,
+                  signal_period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Weights for the last MACD and signal values; both are linear in the prices"""
+    macd_weights = _ema_weights(length, fast_period) - _ema_weights(length, slow_period)
+    signal_on_macd = _ema_weights(length, signal_period)
+    signal_weights = (_ema_series_adjoint(signal_on_macd, fast_period)
+                      - _ema_series_adjoint(signal_on_macd, slow_period))
+    return macd_weights, signal_weights
+
+class NumpyTechnicalAnalysis(TechnicalAnalysis):
+    """Vectorized technical analysis; accepts a price list or a 2D array with one token per row"""
+    
+    # NumPy releases the GIL, so a thread is enough
+    cpu_task = 'indicators_numpy'
+    
+    def _as_array(self, prices: PriceInput) -> np.ndarray:
+        """Convert prices to a float array (1D for one token, 2D for a batch)"""
+        return np.asarray(prices, dtype=float)
+    
+    def _result(self, values: np.ndarray, digits: int = None) -> Union[float, np.ndarray]:
+        """Return a rounded float for 1D input, or an array for batch input"""
+        if np.ndim(values) == 0:
+            value = float(values)
+            return round(value, digits) if digits is not None else value
+        return np.round(values, digits) if digits is not None else values
+    
+    def calculate_rsi(self, prices: PriceInput, period: int = 14) -> Union[float, np.ndarray]:
+        """Calculate RSI indicator"""
+        data = self._as_array(prices)
+        if data.shape[-1] < period + 1:
+            return self._result(np.full(data.shape[:-1], 50.0))
+        
+        changes = np.diff(data[..., -(period + 1):], axis=-1)
+        avg_gain = np.where(changes > 0, changes, 0).sum(axis=-1) / period
+        avg_loss = np.where(changes > 0, 0, -changes).sum(axis=-1) / period
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        rsi = np.where(avg_loss == 0, 100.0, rsi)
+        
+        return self._result(rsi, 2)
+    
+    def calculate_macd(self, prices: PriceInput, fast_period: int = 12,
+                      slow_period: int = 26, signal_period: int = 9) -> Dict[str, Any]:
+        """Calculate MACD indicator"""
+        data = self._as_array(prices)
+        length = data.shape[-1]
+        if length < slow_period or length < signal_period:
+            zeros = self._result(np.zeros(data.shape[:-1]))
+            return {"macd": zeros, "signal": zeros, "histogram": zeros}
+        
+        macd_weights, signal_weights = _macd_weights(length, fast_period, slow_period, signal_period)
+        macd = data @ macd_weights
+        signal = data @ signal_weights
+        
+        return {
+            "macd": self._result(macd, 4),
+            "signal": self._result(signal, 4),
+            "histogram": self._result(macd - signal, 4)
+        }
+    
+    def calculate_support_resistance(self, prices: PriceInput) -> Dict[str, Any]:
+        """Calculate support and resistance levels"""
+        data = self._as_array(prices)
+        if data.shape[-1] < 10:
+            return {
+                "support": self._result(data[..., -1] * 0.95),
+                "resistance": self._result(data[..., -1] * 1.05)
+            }
+        
+        recent_prices = data[..., -20:]
+        return {
+            "support": self._result(recent_prices.min(axis=-1) * 0.9, 4),
+            "resistance": self._result(recent_prices.max(axis=-1) * 1.1, 4)
+        }
+    
+    def calculate_bollinger_bands(self, prices: PriceInput, period: int = 20,
+                                 std_dev: float = 2) -> Dict[str, Any]:
+        """Calculate Bollinger Bands"""
+        data = self._as_array(prices)
+        if data.shape[-1] < period:
+            current_price = data[..., -1] if data.shape[-1] else np.zeros(data.shape[:-1])
+            return {
+                "upper": self._result(current_price * 1.1),
+                "middle": self._result(current_price),
+                "lower": self._result(current_price * 0.9)
+            }
+        
+        recent_prices = data[..., -period:]
+        sma = recent_prices.mean(axis=-1)
+        std = recent_prices.std(axis=-1)
+        
+        return {
+            "upper": self._result(sma + (std * std_dev), 4),
+            "middle": self._result(sma, 4),
+            "lower": self._result(sma - (std * std_dev), 4)
+        }
+    
+    def analyze_trend(self, prices: PriceInput) -> Union[str, np.ndarray]:
+        """Analyze trend"""
+        data = self._as_array(prices)
+        if data.shape[-1] < 5:
+            trend = np.full(data.shape[:-1], "Sideways", dtype=object)
+            return trend if trend.ndim else str(trend)
+        
+        short_ma = data[..., -3:].sum(axis=-1) / 3
+        long_ma = data[..., -5:].sum(axis=-1) / 5
+        trend = np.where(short_ma > long_ma * 1.02, "Uptrend",
+                         np.where(short_ma < long_ma * 0.98, "Downtrend", "Sideways")).astype(object)
+        return trend if trend.ndim else str(trend)
+    
+    def get_technical_indicators(self, prices: PriceInput) -> Dict[str, Any]:
+        """Get all technical indicators (arrays per indicator for batch input)"""
+        data = self._as_array(prices)
+        if data.ndim == 1 and data.shape[-1] < 5:
+            return super().get_technical_indicators([])
+        
+        return {
+            "rsi": self.calculate_rsi(data),
+            "macd": self.calculate_macd(data),
+            "support_resistance": self.calculate_support_resistance(data),
+            "bollinger_bands": self.calculate_bollinger_bands(data),
+            "trend": self.analyze_trend(data)
+        }
+    
+    def get_technical_indicators_batch(self, prices: PriceInput) -> List[Dict[str, Any]]:
+        """Get technical indicators for a batch of tokens (2D array, equal-length rows), one dict per token"""
+        data = self._as_array(prices)
+        if data.ndim != 2:
+            raise ValueError("Batch prices must be a 2D array with one token per row")
+        if data.shape[-1] < 5:
+            return [super(NumpyTechnicalAnalysis, self).get_technical_indicators([]) for _ in range(len(data))]
+        
+        batch = self.get_technical_indicators(data)
+        results = []
+        for i in range(len(data)):
+            results.append({
+                "rsi": float(batch["rsi"][i]),
+                "macd": {name: float(values[i]) for name, values in batch["macd"].items()},
+                "support_resistance": {name: float(values[i])
+                                       for name, values in batch["support_resistance"].items()},
+                "bollinger_bands": {name: float(values[i]) for name, values in batch["bollinger_bands"].items()},
+                "trend": batch["trend"][i]
+            })
+        return results
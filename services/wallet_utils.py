@@ -7,6 +7,7 @@ from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
 from typing import Optional, Dict, List
 import re
 import hashlib
+from services.cpu_executor import CPUExecutor
 
 class WalletUtils:
     """Wallet utility functions"""
@@ -71,6 +72,10 @@ class WalletUtils:
             print(f"Error converting private key to address: {e}")
             return None
     
+    async def private_key_to_address_async(self, private_key: str) -> Optional[str]:
+        """Convert private key to Ethereum address without blocking the event loop"""
+        return await CPUExecutor.run('derive_address', self.private_key_to_address, private_key)
+    
     def get_evm_networks(self) -> List[Dict[str, str]]:
         """Get supported EVM networks"""
         return [
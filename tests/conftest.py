@@ -0,0 +1,7 @@
+"""
+Test configuration - Make the bot's packages importable when running pytest from the repository root
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
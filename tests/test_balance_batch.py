@@ -0,0 +1,148 @@
+"""
+Tests - Per-network JSON-RPC batch balances against a local stub server
+"""
+import asyncio
+import json
+import random
+import threading
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.balance_service import BalanceService
+from services.http_client import HTTPClient
+
+WALLET = '0x' + '11' * 20
+ETH_WEI = 2 * 10**18
+TOKEN_UNITS = 5 * 10**6  # 5 USDT/USDC (6 decimals on ethereum)
+
+class StubHandler(BaseHTTPRequestHandler):
+    """JSON-RPC endpoint whose batch behaviour is set by server.mode"""
+    
+    def log_message(self, *args):
+        pass
+    
+    def _send(self, body, status: int = 200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    @staticmethod
+    def _answer(request):
+        if request['method'] == 'eth_getBalance':
+            value = ETH_WEI
+        else:
+            # balanceOf: encode the token contract's last byte into the amount to tell calls apart
+            value = TOKEN_UNITS + int(request['params'][0]['to'][-2:], 16)
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': hex(value)}
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server = self.server
+        if not isinstance(body, list):
+            server.requests.append('single')
+            return self._send(self._answer(body))
+        
+        server.requests.append('batch')
+        batches = server.requests.count('batch')
+        mode = server.mode
+        if isinstance(mode, int) and (server.fail_batches is None or batches <= server.fail_batches):
+            return self._send({'error': 'stub status'}, mode)
+        if mode == 'error_object':
+            return self._send({'jsonrpc': '2.0', 'id': None,
+                               'error': {'code': -32600, 'message': 'batch requests are not supported'}})
+        
+        results = [self._answer(request) for request in body]
+        random.Random(batches).shuffle(results)
+        if mode == 'drop':
+            results = [result for result in results if result['id'] != 2]
+        return self._send(results)
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.mode, server.fail_batches, server.requests = 'ok', None, []
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_service(server) -> BalanceService:
+    """BalanceService whose ethereum endpoint is the stub"""
+    service = BalanceService(rpc_endpoints={'ethereum': f"http://127.0.0.1:{server.server_address[1]}"})
+    service.batch_retry_delay = 0
+    return service
+
+def fetch(service):
+    """Query the ethereum balances of WALLET in a fresh event loop"""
+    async def run():
+        try:
+            return await service.get_network_balances_async(WALLET, 'ethereum')
+        finally:
+            await HTTPClient.close()
+    
+    return asyncio.run(run())
+
+def query(server):
+    """Query through the stub; returns (service, endpoint url, balances)"""
+    service = make_service(server)
+    return service, service.rpc_endpoints['ethereum'], fetch(service)
+
+def expected_balances(service):
+    contracts = service.token_contracts['ethereum']
+    balances = {'ETH': Decimal(2)}
+    for token, contract in contracts.items():
+        balances[token] = Decimal(TOKEN_UNITS + int(contract[-2:], 16)) / Decimal(10**6)
+    return balances
+
+def test_out_of_order_batch_is_matched_by_id(stub):
+    service, url, balances = query(stub)
+    
+    assert stub.requests == ['batch']
+    assert balances == expected_balances(service)
+    assert url not in service.batch_unsupported
+
+def test_missing_entries_are_retried_singly(stub):
+    stub.mode = 'drop'
+    service, url, balances = query(stub)
+    
+    assert stub.requests == ['batch', 'single']
+    assert balances == expected_balances(service)
+    assert url not in service.batch_unsupported
+
+@pytest.mark.parametrize('mode', ['error_object', 400, 405, 413])
+def test_rejected_batch_marks_endpoint_unsupported(stub, mode):
+    stub.mode = mode
+    service, url, balances = query(stub)
+    
+    assert stub.requests == ['batch', 'single', 'single', 'single']
+    assert balances == expected_balances(service)
+    assert url in service.batch_unsupported
+    
+    # Later queries go straight to single calls
+    stub.requests.clear()
+    fetch(service)
+    assert stub.requests == ['single', 'single', 'single']
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_transient_error_is_retried_once(stub, status):
+    stub.mode, stub.fail_batches = status, 1
+    service, url, balances = query(stub)
+    
+    assert stub.requests == ['batch', 'batch']
+    assert balances == expected_balances(service)
+    assert url not in service.batch_unsupported
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_persistent_transient_error_fails_only_this_call(stub, status):
+    stub.mode = status
+    service, url, balances = query(stub)
+    
+    assert stub.requests == ['batch', 'batch']
+    assert balances == {token: None for token in expected_balances(service)}
+    assert url not in service.batch_unsupported
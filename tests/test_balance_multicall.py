@@ -0,0 +1,49 @@
+"""
+Tests - Multicall3 aggregate3 ABI encoding/decoding against reference fixtures
+"""
+import json
+import os
+
+import pytest
+
+from services.balance_service import BalanceService
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'multicall3_aggregate3.json')
+
+@pytest.fixture
+def fixture():
+    with open(FIXTURE) as f:
+        return json.load(f)
+
+def test_encode_matches_fixture(fixture):
+    service = BalanceService()
+    chunks = service._multicall_chunks([fixture['wallet']], fixture['network'])
+    
+    assert len(chunks) == 1
+    _, payload = chunks[0]
+    assert payload['params'][0]['to'] == service.multicall_address
+    assert payload['params'][0]['data'] == fixture['calldata']
+
+def test_decode_matches_fixture(fixture):
+    decoded = BalanceService()._decode_aggregate3(fixture['response']['result'])
+    assert [[success, data.hex()] for success, data in decoded] == fixture['decoded']
+
+def test_apply_result_uses_token_decimals(fixture):
+    service = BalanceService()
+    wallet, network = fixture['wallet'], fixture['network']
+    balances = service._empty_bulk_balances([wallet])
+    chunk, _ = service._multicall_chunks([wallet], network)[0]
+    
+    service._apply_multicall_result(balances, network, chunk, fixture['response'])
+    
+    assert balances[wallet][network] == pytest.approx(fixture['balances'])
+
+def test_bsc_stablecoins_use_18_decimals():
+    service = BalanceService()
+    assert service._token_decimals('bsc', 'USDT') == 18
+    assert service._token_decimals('ethereum', 'USDC') == 6
+    assert service._token_decimals('ethereum', service.token_contracts['ethereum']['USDT'].lower()) == 6
+
+def test_decode_rejects_truncated_response(fixture):
+    with pytest.raises(ValueError):
+        BalanceService()._decode_aggregate3(fixture['response']['result'][:-64])
@@ -0,0 +1,60 @@
+"""
+Tests - Decrypted wallet key cache eviction
+"""
+import pytest
+
+from database.engine import DatabaseEngine
+from database.key_cache import KeyCache
+from database.models import DatabaseManager
+
+def test_set_after_evict_owner_is_dropped():
+    cache = KeyCache(ttl=60)
+    generation = cache.generation('alice')
+    cache.evict_owner('alice')
+    
+    cache.set('key', 'alice', 'secret', generation)
+    
+    assert cache.get('key') is None
+    assert cache.stats()['stale_sets'] == 1
+
+def test_set_after_clear_is_dropped():
+    cache = KeyCache(ttl=60)
+    generation = cache.generation('alice')
+    cache.clear()
+    
+    cache.set('key', 'alice', 'secret', generation)
+    
+    assert cache.get('key') is None
+
+def test_other_owners_are_unaffected():
+    cache = KeyCache(ttl=60)
+    generation = cache.generation('bob')
+    cache.evict_owner('alice')
+    
+    cache.set('key', 'bob', 'secret', generation)
+    
+    assert cache.get('key') == 'secret'
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # encryption.key is created in the working directory
+    monkeypatch.chdir(tmp_path)
+    yield DatabaseManager(str(tmp_path / 'tokenshift.db'))
+    DatabaseManager.key_cache.clear()
+    DatabaseEngine.close_all()
+
+def test_wallet_deleted_during_get_wallet_is_not_cached(db, monkeypatch):
+    db.add_wallet(1, 'ethereum', '0x' + '11' * 20, 'ab' * 32)
+    decrypt = db.decrypt_data
+    
+    def decrypt_then_delete(encrypted):
+        # The row has been read; the wallet is deleted before the plaintext is cached
+        plaintext = decrypt(encrypted)
+        db.delete_user_wallets(1)
+        return plaintext
+    
+    monkeypatch.setattr(db, 'decrypt_data', decrypt_then_delete)
+    assert db.get_wallet(1, 'ethereum')['private_key'] == 'ab' * 32
+    
+    assert DatabaseManager.key_cache.stats()['entries'] == 0
+    assert db.get_wallet(1, 'ethereum') is None
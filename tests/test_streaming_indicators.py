@@ -0,0 +1,106 @@
+"""
+Tests - Streaming indicators match TechnicalAnalysis step by step and survive serialization
+"""
+import math
+import random
+
+import pytest
+
+from services.streaming_indicators import IndicatorStream, StreamingEMA, StreamingRSI
+from services.technical_analysis import TechnicalAnalysis
+
+def random_walk(length: int, seed: int):
+    """Random-walk prices around 100"""
+    rng = random.Random(seed)
+    prices = [100.0]
+    for _ in range(length - 1):
+        prices.append(prices[-1] * math.exp(rng.gauss(0, 0.03)))
+    return prices[:length]
+
+def wilder_rsi(prices, period: int = 14):
+    """Reference Wilder RSI per price: simple average of the first period changes, then smoothing"""
+    changes = [b - a for a, b in zip(prices, prices[1:])]
+    gains = [max(change, 0.0) for change in changes]
+    losses = [max(-change, 0.0) for change in changes]
+    
+    values = [50.0] * min(period, len(prices))
+    for end in range(period, len(changes) + 1):
+        avg_gain = sum(gains[:period]) / period
+        avg_loss = sum(losses[:period]) / period
+        for i in range(period, end):
+            avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+            avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+        values.append(100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss))
+    return values
+
+@pytest.mark.parametrize('period', [5, 12, 26])
+def test_ema_matches_technical_analysis(period):
+    prices = random_walk(80, period)
+    technical = TechnicalAnalysis()
+    ema = StreamingEMA(period)
+    for i, price in enumerate(prices, 1):
+        value = ema.update(price)
+        if i < period:
+            continue
+        # With a 1-period slow EMA (the price itself) and 1-period signal, MACD = EMA(period) - price
+        expected = technical.calculate_macd(prices[:i], fast_period=period, slow_period=1,
+                                            signal_period=1)['macd'] + price
+        assert value == pytest.approx(expected, abs=1.1e-4)
+
+@pytest.mark.parametrize('seed', range(3))
+def test_stream_matches_technical_analysis_at_every_step(seed):
+    prices = random_walk(120, seed)
+    technical = TechnicalAnalysis()
+    stream = IndicatorStream()
+    for i, price in enumerate(prices, 1):
+        snapshot = stream.update(price)
+        expected = technical.get_technical_indicators(prices[:i])
+        
+        # RSI differs by design (Wilder smoothing vs the last period's simple average)
+        for name in ('macd', 'support_resistance', 'bollinger_bands'):
+            assert snapshot[name] == pytest.approx(expected[name], rel=1e-9, abs=1.1e-4), (i, name)
+        assert snapshot['trend'] == expected['trend'], i
+        assert stream.count == i
+
+@pytest.mark.parametrize('seed', range(3))
+def test_rsi_matches_wilder_reference(seed):
+    prices = random_walk(60, seed)
+    rsi = StreamingRSI()
+    for price, expected in zip(prices, wilder_rsi(prices)):
+        assert rsi.update(price) == pytest.approx(expected, rel=1e-9)
+
+def test_rsi_without_losses_is_100():
+    rsi = StreamingRSI()
+    for price in range(1, 20):
+        rsi.update(float(price))
+    assert rsi.value == 100.0
+
+def test_state_stays_bounded():
+    stream = IndicatorStream()
+    for price in random_walk(1000, 0):
+        stream.update(price)
+    assert len(stream.bollinger.window) == stream.bollinger.period
+    assert len(stream.recent) == 20
+    assert stream.count == 1000
+
+@pytest.mark.parametrize('split', [3, 9, 15, 30, 60])
+def test_json_round_trip_continues_identically(split):
+    prices = random_walk(100, split)
+    original = IndicatorStream()
+    for price in prices[:split]:
+        original.update(price)
+    
+    restored = IndicatorStream.from_json(original.to_json())
+    assert restored.to_dict() == original.to_dict()
+    for price in prices[split:]:
+        assert restored.update(price) == original.update(price)
+    assert restored.to_dict() == original.to_dict()
+
+def test_state_saved_without_count_is_restored():
+    stream = IndicatorStream()
+    for price in random_walk(12, 0):
+        stream.update(price)
+    data = stream.to_dict()
+    del data['count']
+    
+    assert IndicatorStream.from_dict(data).count == 12
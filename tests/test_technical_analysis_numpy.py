@@ -0,0 +1,64 @@
+"""
+Tests - NumpyTechnicalAnalysis matches the list-based TechnicalAnalysis
+"""
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from services.technical_analysis import TechnicalAnalysis
+from services.technical_analysis_numpy import NumpyTechnicalAnalysis
+
+# Below and above every indicator's minimum length: trend 5, support/resistance 10,
+# RSI 15, Bollinger 20, MACD 26 (slow EMA), plus typical /analysis and longer inputs
+LENGTHS = [0, 1, 4, 5, 9, 10, 14, 15, 19, 20, 21, 25, 26, 27, 31, 60, 200]
+
+def random_walk(length: int, seed: int):
+    """Random-walk prices around 100"""
+    rng = random.Random(seed)
+    prices = [100.0]
+    for _ in range(length - 1):
+        prices.append(prices[-1] * math.exp(rng.gauss(0, 0.03)))
+    return prices[:length]
+
+def assert_close(actual, expected, path='indicators'):
+    """Compare nested indicator dicts; values may differ by one unit in the last rounded digit"""
+    if isinstance(expected, dict):
+        assert set(actual) == set(expected), path
+        for key in expected:
+            assert_close(actual[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, str):
+        assert actual == expected, path
+    else:
+        assert float(actual) == pytest.approx(expected, rel=1e-9, abs=1.1e-2 if path.endswith('rsi') else 1.1e-4), path
+
+@pytest.mark.parametrize('length', LENGTHS)
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_list_implementation(length, seed):
+    prices = random_walk(length, seed)
+    assert_close(NumpyTechnicalAnalysis().get_technical_indicators(prices),
+                 TechnicalAnalysis().get_technical_indicators(prices))
+
+@pytest.mark.parametrize('prices', [
+    [100.0 + i for i in range(40)],  # no losses: RSI 100
+    [100.0] * 40,  # flat
+    [140.0 - i for i in range(40)]  # no gains: RSI 0
+], ids=['rising', 'flat', 'falling'])
+def test_matches_on_monotonic_series(prices):
+    assert_close(NumpyTechnicalAnalysis().get_technical_indicators(prices),
+                 TechnicalAnalysis().get_technical_indicators(prices))
+
+@pytest.mark.parametrize('length', [4, 27, 60])
+def test_batch_matches_per_token(length):
+    rows = [random_walk(length, seed) for seed in range(8)]
+    batch = NumpyTechnicalAnalysis().get_technical_indicators_batch(np.array(rows))
+    
+    assert len(batch) == len(rows)
+    for result, prices in zip(batch, rows):
+        assert_close(result, TechnicalAnalysis().get_technical_indicators(prices))
+
+def test_batch_rejects_1d_input():
+    with pytest.raises(ValueError):
+        NumpyTechnicalAnalysis().get_technical_indicators_batch(random_walk(30, 0))